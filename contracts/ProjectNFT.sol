@@ -70,6 +70,24 @@ contract ProjectNFT is ERC721, AccessControl, Pausable {
         whenNotPaused 
         onlyRole(VALIDATOR_ROLE) 
     {
+        _verifyProject(projectId);
+    }
+
+    // Verifies many projects in one transaction to amortize per-transaction overhead.
+    // Reverts as a whole if any project does not exist.
+    function verifyProjectStatusBatch(uint256[] calldata projectIds) 
+        external 
+        whenNotPaused 
+        onlyRole(VALIDATOR_ROLE) 
+    {
+        uint256 count = projectIds.length;
+        for (uint256 i = 0; i < count; ) {
+            _verifyProject(projectIds[i]);
+            unchecked { ++i; }
+        }
+    }
+
+    function _verifyProject(uint256 projectId) internal {
         require(_exists(projectId), "Project does not exist");
         _projects[projectId].status = Status.Verified;
         emit ProjectVerified(projectId);
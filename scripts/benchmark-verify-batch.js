@@ -0,0 +1,57 @@
+// Compares gas per project and wall time of verifyProjectStatus (one transaction
+// per project) against verifyProjectStatusBatch on a local Hardhat network.
+//
+//   npx hardhat run scripts/benchmark-verify-batch.js --network hardhat
+//
+// PROJECTS and BATCH_SIZE environment variables control the workload.
+const { ethers } = require("hardhat");
+
+const PROJECTS = parseInt(process.env.PROJECTS || "200", 10);
+const BATCH_SIZE = parseInt(process.env.BATCH_SIZE || "100", 10);
+
+async function deployWithProjects(owner) {
+    const ProjectNFT = await ethers.getContractFactory("ProjectNFT");
+    const projectNFT = await ProjectNFT.deploy();
+    await projectNFT.deployed();
+    for (let i = 0; i < PROJECTS; i++) {
+        await projectNFT.registerProject(owner.address, "ipfs://QmBenchmark");
+    }
+    return projectNFT;
+}
+
+async function main() {
+    const [owner] = await ethers.getSigners();
+    const projectIds = Array.from({ length: PROJECTS }, (_, i) => i + 1);
+
+    let projectNFT = await deployWithProjects(owner);
+    let gasUsed = ethers.BigNumber.from(0);
+    let start = Date.now();
+    for (const projectId of projectIds) {
+        const receipt = await (await projectNFT.verifyProjectStatus(projectId)).wait();
+        gasUsed = gasUsed.add(receipt.gasUsed);
+    }
+    const singleMs = Date.now() - start;
+    const singleGas = gasUsed.toNumber() / PROJECTS;
+
+    projectNFT = await deployWithProjects(owner);
+    gasUsed = ethers.BigNumber.from(0);
+    start = Date.now();
+    for (let i = 0; i < projectIds.length; i += BATCH_SIZE) {
+        const chunk = projectIds.slice(i, i + BATCH_SIZE);
+        const gas = await projectNFT.estimateGas.verifyProjectStatusBatch(chunk);
+        const receipt = await (await projectNFT.verifyProjectStatusBatch(chunk, { gasLimit: gas })).wait();
+        gasUsed = gasUsed.add(receipt.gasUsed);
+    }
+    const batchMs = Date.now() - start;
+    const batchGas = gasUsed.toNumber() / PROJECTS;
+
+    console.log(`projects: ${PROJECTS}, batch size: ${BATCH_SIZE}`);
+    console.log(`verifyProjectStatus:      ${singleGas.toFixed(0)} gas/project, ${singleMs} ms`);
+    console.log(`verifyProjectStatusBatch: ${batchGas.toFixed(0)} gas/project, ${batchMs} ms`);
+    console.log(`gas saved per project:    ${(100 * (1 - batchGas / singleGas)).toFixed(1)}%`);
+}
+
+main().catch((error) => {
+    console.error(error);
+    process.exitCode = 1;
+});
@@ -57,6 +57,30 @@ describe("ProjectNFT", function () {
             await expect(projectNFT.connect(user).verifyProjectStatus(1))
                 .to.be.revertedWith("AccessControl: account");
         });
+
+        it("Should verify a batch of projects by validator", async function () {
+            await projectNFT.registerProject(user.address, metadataURI);
+            await projectNFT.registerProject(user.address, metadataURI);
+
+            await expect(projectNFT.verifyProjectStatusBatch([1, 2, 3]))
+                .to.emit(projectNFT, "ProjectVerified").withArgs(1)
+                .and.to.emit(projectNFT, "ProjectVerified").withArgs(3);
+
+            for (const projectId of [1, 2, 3]) {
+                expect(await projectNFT.getProjectStatus(projectId)).to.equal(2); // Verified
+            }
+        });
+
+        it("Should revert the whole batch if a project does not exist", async function () {
+            await expect(projectNFT.verifyProjectStatusBatch([1, 99]))
+                .to.be.revertedWith("Project does not exist");
+            expect(await projectNFT.getProjectStatus(1)).to.equal(0); // Unverified
+        });
+
+        it("Should not verify a batch by non-validator", async function () {
+            await expect(projectNFT.connect(user).verifyProjectStatusBatch([1]))
+                .to.be.revertedWith("AccessControl: account");
+        });
     });
 
     describe("Metadata Updates", function () {
@@ -1,20 +1,27 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from fastapi.responses import JSONResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pydantic import BaseModel, ValidationError
+from typing import List, Dict, Optional, Set, Tuple
+from contextlib import asynccontextmanager
 import uvicorn
 from datetime import datetime
-import json
+from functools import partial
+import asyncio
 import logging
-from web3 import Web3
-from eth_account import Account
-import ipfshttpclient
 import os
+import math
+import time
 from dotenv import load_dotenv
 
-from engine.validation_engine import ValidationEngine
-from utils.signature_utils import sign_validation_result
-from utils.web3_bridge import Web3Bridge
+from components import BACKGROUND_WORKERS, Components
+from utils.admission import BULK, INTERACTIVE, AdmissionMiddleware, Overloaded, overloaded_response
+from utils.metrics import IDEMPOTENT_REQUESTS, IPFS_PENDING, QUEUE_DEPTH, TELEMETRY_READINGS, stage_timer
+from utils.profiler import ProfilingMiddleware, bind_to_request
+from utils.result_store import ResultKey, payload_hash
+from utils import serialization
 
 # Load environment variables
 load_dotenv()
@@ -23,10 +30,65 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MAX_STATUS_QUERY_IDS = int(os.getenv("MAX_STATUS_QUERY_IDS", "5000"))
+BATCH_SIGNING_MODE = os.getenv("BATCH_SIGNING_MODE", "merkle")
+READINESS_TIMEOUT = float(os.getenv("READINESS_TIMEOUT_SECONDS", "2"))
+TELEMETRY_BLOCK_BYTES = int(os.getenv("TELEMETRY_BLOCK_BYTES", str(1 << 20)))
+# Time a request waited for pipeline slots, reported on every validation response
+QUEUE_WAIT_HEADER = "X-Queue-Wait-Ms"
+# A pending verification job not updated for this long is taken as lost with its worker;
+# keep it above the receipt timeout plus the time jobs wait in the queue
+JOB_LOST_AFTER = float(os.getenv("JOB_LOST_AFTER_SECONDS", "600"))
+
+# Service singletons are built on first use, so importing this module stays cheap
+components = Components()
+_warmup_task: Optional[asyncio.Task] = None
+
+async def startup():
+    """Start background workers and load the validation model off the request path"""
+    global _warmup_task
+    await components.start()
+    _warmup_task = asyncio.create_task(run_cpu(warm_up))
+
+def warm_up():
+    """Build the model and signer, whose heavy imports would otherwise land on the first request"""
+    components.validation_engine
+    components.validation_signer
+    components.model_updater.start()
+
+async def shutdown():
+    """Stop background workers and release pooled connections and threads"""
+    if _warmup_task is not None:
+        await asyncio.gather(_warmup_task, return_exceptions=True)
+    await components.close()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
+
 # Initialize FastAPI app
-app = FastAPI(title="Carbon Credit Validation API")
+app = FastAPI(title="Carbon Credit Validation API", lifespan=lifespan)
+
+# Requests for a saturated pipeline are refused before their bodies are parsed
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=lambda: components.admission,
+    paths=("/validate-project", "/validate-projects")
+)
+
+# Requests carrying X-Profile: $PROFILE_TOKEN are profiled; a no-op when the token is unset
+app.add_middleware(
+    ProfilingMiddleware,
+    token=os.getenv("PROFILE_TOKEN"),
+    output_dir=os.getenv("PROFILE_DIR"),
+    interval=float(os.getenv("PROFILE_INTERVAL_SECONDS", "0.001"))
+)
 
-# Add CORS middleware
+# Add CORS middleware; added last so it is outermost and 503s from admission carry its headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -35,16 +97,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize components
-validation_engine = ValidationEngine()
-web3_bridge = Web3Bridge(
-    rpc_url=os.getenv("ETHEREUM_RPC_URL"),
-    contract_address=os.getenv("PROJECT_NFT_CONTRACT_ADDRESS"),
-    private_key=os.getenv("VALIDATOR_PRIVATE_KEY")
-)
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return overloaded_response(exc)
+
+def client_id(request: Request) -> str:
+    """Rate-limit key of a request: the X-Client-Id header, else the peer address"""
+    return request.headers.get("X-Client-Id") or (request.client.host if request.client else "unknown")
 
-# Initialize IPFS client
-ipfs_client = ipfshttpclient.connect(os.getenv("IPFS_API_URL", "/ip4/127.0.0.1/tcp/5001"))
+async def run_cpu(func, *args, **kwargs):
+    """Run a CPU-bound callable on the bounded worker pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(components.cpu_executor, partial(bind_to_request(func), *args, **kwargs))
 
 class ProjectData(BaseModel):
     tokenId: int
@@ -62,74 +126,514 @@ class ValidationResponse(BaseModel):
     signature: str
     ipfsHash: str
     timestamp: str
+    modelVersion: Optional[str] = None
+    anomalyScore: Optional[float] = None
+    jobId: Optional[str] = None
+    merkleRoot: Optional[str] = None
+    merkleProof: Optional[List[str]] = None
+
+def parse_project(body: bytes, content_type: str) -> Dict:
+    """Decode a JSON or msgpack request body and validate it as a project; returns the normalized fields"""
+    try:
+        return ProjectData.model_validate(serialization.decode(body, content_type)).model_dump()
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid project: {str(e)}")
+
+def encoded_response(request: Request, content, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Response body in the media type the request's Accept header prefers: JSON, msgpack or NDJSON"""
+    kind = serialization.negotiate(request.headers.get("accept", ""))
+    with stage_timer("serialization"):
+        body = serialization.encode(content, kind)
+    return Response(body, media_type=kind, headers=headers)
 
-@app.post("/validate-project", response_model=ValidationResponse)
-async def validate_project(project_data: ProjectData):
+@app.post("/validate-project", response_model=ValidationResponse, openapi_extra={"requestBody": {
+    "required": True,
+    "content": {media: {"schema": ProjectData.model_json_schema()}
+                for media in (serialization.JSON, serialization.MSGPACK)}
+}})
+async def validate_project(request: Request):
     """
     Validate a carbon project and update blockchain if valid
+
+    The project is sent as JSON or msgpack (Content-Type:
+    application/msgpack); the response is JSON unless the Accept header asks
+    for msgpack or NDJSON. Idempotent: a retry of an answered request gets
+    the stored signed response, and identical requests in flight share one
+    validation. Admitted at interactive priority; 429 or 503 with
+    Retry-After when the client or the service is over capacity.
     """
+    components.admission.check_rate(client_id(request))
+    data_dict = parse_project(await request.body(), request.headers.get("content-type", ""))
+    key = (data_dict["tokenId"], payload_hash(data_dict))
+    stored = components.result_store.get(*key)
+    if stored is not None:
+        IDEMPOTENT_REQUESTS.labels("stored").inc()
+        stored = (await requeue_lost_jobs({key: stored}))[key]
+        return encoded_response(request, stored, {QUEUE_WAIT_HEADER: "0.0"})
+
+    coalescer = components.request_coalescer
+    IDEMPOTENT_REQUESTS.labels("coalesced" if key in coalescer else "validated").inc()
+    validation, queue_wait = await coalescer.run(key, lambda: validate_and_store(key, data_dict))
+    return encoded_response(request, validation, {QUEUE_WAIT_HEADER: f"{queue_wait * 1000:.1f}"})
+
+async def validate_and_store(key: ResultKey, data_dict: Dict) -> Tuple[Dict, float]:
+    """
+    Validate, sign and queue one project, then persist the response under its request key
+
+    Returns:
+        Tuple of (response, seconds spent waiting for pipeline slots)
+    """
+    admission = components.admission
     try:
-        # Convert Pydantic model to dict
-        data_dict = project_data.dict()
-        
         # Perform validation
-        is_valid, reason, validation_details = validation_engine.validate_project(data_dict)
+        async with admission.cpu.slot(INTERACTIVE) as cpu_wait:
+            record, encoded, signature = await run_cpu(validate_and_sign, data_dict)
         
-        # Prepare response data
-        response_data = {
-            "projectId": project_data.tokenId,
-            "status": "VERIFIED" if is_valid else "REJECTED",
-            "reason": reason,
-            "timestamp": datetime.utcnow().isoformat(),
-            "validation_details": validation_details
-        }
+        async with admission.io.slot(INTERACTIVE) as io_wait:
+            response = await finalize_validation(record, encoded, signature)
+        return components.result_store.put(*key, response), cpu_wait + io_wait
         
-        # Store validation result in IPFS
-        ipfs_hash = await store_in_ipfs(response_data)
-        
-        # Sign the validation result
-        signature = sign_validation_result(response_data)
+    except (Overloaded, HTTPException):
+        raise
+    except Exception as e:
+        logger.error(f"Validation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/validate-projects", response_model=List[ValidationResponse])
+async def validate_projects(request: Request):
+    """
+    Validate a batch of carbon projects
+
+    Accepts a JSON array of projects, NDJSON (one project per line,
+    Content-Type: application/x-ndjson) or a msgpack array. Results are
+    returned in input order, as a JSON array unless the Accept header asks
+    for msgpack or NDJSON. Projects answered before get their stored
+    responses; the rest are validated once each, even if repeated within the
+    batch. Batches are admitted at bulk priority, behind single validations,
+    and each project counts against the client's rate.
+    """
+    projects = parse_project_batch(await request.body(), request.headers.get("content-type", ""))
+    components.admission.check_rate(client_id(request), cost=len(projects))
+    
+    try:
+        data_dicts = [project.model_dump() for project in projects]
+        keys = [(project.tokenId, payload_hash(data)) for project, data in zip(projects, data_dicts)]
+        stored = await requeue_lost_jobs(components.result_store.get_many(keys))
+        fresh = {}
+        for key, data in zip(keys, data_dicts):
+            if key not in stored:
+                fresh.setdefault(key, data)
+        IDEMPOTENT_REQUESTS.labels("stored").inc(len(keys) - len(fresh))
+        IDEMPOTENT_REQUESTS.labels("validated").inc(len(fresh))
         
-        # If valid, update blockchain
-        if is_valid:
-            try:
-                tx_hash = await web3_bridge.verify_project(project_data.tokenId)
-                response_data["tx_hash"] = tx_hash
-            except Exception as e:
-                logger.error(f"Blockchain update failed: {str(e)}")
-                raise HTTPException(status_code=500, detail="Blockchain update failed")
+        queue_wait = 0.0
+        if fresh:
+            responses, queue_wait = await validate_and_sign_batch(list(fresh.values()), BULK)
+            stored.update(zip(fresh, components.result_store.put_many(list(zip(fresh, responses)))))
         
-        return ValidationResponse(
-            projectId=project_data.tokenId,
-            status=response_data["status"],
-            reason=reason,
-            signature=signature,
-            ipfsHash=ipfs_hash,
-            timestamp=response_data["timestamp"]
-        )
+        return encoded_response(request, [stored[key] for key in keys],
+                                {QUEUE_WAIT_HEADER: f"{queue_wait * 1000:.1f}"})
         
+    except (Overloaded, HTTPException):
+        raise
     except Exception as e:
-        logger.error(f"Validation error: {str(e)}")
+        logger.error(f"Batch validation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def store_in_ipfs(data: Dict) -> str:
-    """Store validation data in IPFS"""
+async def validate_and_sign_batch(data_dicts: List[Dict],
+                                  priority: int = BULK) -> Tuple[List[Dict], float]:
+    """
+    Validate, store, sign and queue a batch of projects
+
+    Returns:
+        Tuple of (responses in input order, seconds spent waiting for pipeline slots)
+    """
+    admission = components.admission
+    # Perform validation across the whole batch
+    async with admission.cpu.slot(priority) as cpu_wait:
+        records, encoded, signatures = await run_cpu(validate_and_sign_records, data_dicts)
+    async with admission.io.slot(priority) as io_wait:
+        responses = await store_and_queue_batch(records, encoded, signatures)
+    return responses, cpu_wait + io_wait
+
+def validate_and_sign_records(data_dicts: List[Dict]) -> Tuple[List[Dict], List[bytes], List[Dict]]:
+    """
+    Validate a batch and sign its result records
+
+    Returns:
+        Tuple of (records, their canonical encodings, signature fields of each response)
+    """
+    results = components.validation_engine.validate_batch(data_dicts)
+    records = [
+        build_result_record(data["tokenId"], is_valid, reason, validation_details)
+        for data, (is_valid, reason, validation_details) in zip(data_dicts, results)
+    ]
+    signer = components.validation_signer
+    with stage_timer("serialization"):
+        encoded = [signer.encoder(record) for record in records]
+    if BATCH_SIGNING_MODE == "merkle" and records:
+        # One signature over the batch root; each result carries its inclusion proof
+        with stage_timer("signing"):
+            signed = signer.sign_merkle_encoded(encoded)
+        return records, encoded, [{"signature": signed.signature, "merkleRoot": signed.root, "merkleProof": proof}
+                                  for proof in signed.proofs]
+    with stage_timer("signing"):
+        signatures = signer.sign_many_encoded(encoded)
+    return records, encoded, [{"signature": signature} for signature in signatures]
+
+async def store_and_queue_batch(records: List[Dict], encoded: List[bytes], signatures: List[Dict]) -> List[Dict]:
+    """Store signed results of a batch and queue its verified projects; responses in input order"""
+    with stage_timer("ipfs_store"):
+        ipfs_hashes = await asyncio.gather(*(store_in_ipfs(content) for content in encoded))
+    responses = [
+        make_validation_response(record, ipfs_hash, **fields)
+        for record, ipfs_hash, fields in zip(records, ipfs_hashes, signatures)
+    ]
+    
+    # Queue all verified projects together so they are submitted as batch transactions
+    verified = [response for response in responses if response["status"] == "VERIFIED"]
     try:
-        # Convert data to JSON string
-        json_data = json.dumps(data)
-        
-        # Add to IPFS
-        result = ipfs_client.add_json(json_data)
-        return result
+        jobs = components.verification_queue.enqueue_many([response["projectId"] for response in verified])
+    except Exception as e:
+        logger.error(f"Blockchain update failed: {str(e)}")
+        raise HTTPException(status_code=503, detail="Blockchain update unavailable")
+    for response, job in zip(verified, jobs):
+        response["jobId"] = job.job_id
+    
+    return responses
+
+async def requeue_lost_jobs(stored: Dict[ResultKey, Dict]) -> Dict[ResultKey, Dict]:
+    """
+    Re-queue the on-chain verification of stored responses whose job is gone
+
+    Every worker records its jobs in the shared result store. A job that
+    confirmed, or is still queued or awaiting its receipt and was updated
+    within JOB_LOST_AFTER seconds, is left alone even if another worker owns
+    it. A failed job, or one whose worker went away, is gone: projects
+    already verified on chain lose the stale jobId; the others get a new job.
+    Updated responses are written back to the result store.
+
+    Args:
+        stored: Stored responses by request key
+
+    Returns:
+        The responses with current jobIds
+
+    Raises:
+        HTTPException: 503 if the verification queue is unavailable
+    """
+    live = live_job_ids([response["jobId"] for response in stored.values()
+                         if response["status"] == "VERIFIED" and response.get("jobId")])
+    lost = {
+        key: response for key, response in stored.items()
+        if response["status"] == "VERIFIED" and response.get("jobId") not in live
+    }
+    if not lost:
+        return stored
+    
+    try:
+        statuses = await components.web3_bridge.get_project_statuses(
+            [response["projectId"] for response in lost.values()])
+        pending = [key for key, response in lost.items() if statuses.get(response["projectId"]) != "Verified"]
+        jobs = components.verification_queue.enqueue_many([lost[key]["projectId"] for key in pending])
+    except Exception as e:
+        logger.error(f"Blockchain update failed: {str(e)}")
+        raise HTTPException(status_code=503, detail="Blockchain update unavailable")
+    
+    job_ids = dict(zip(pending, (job.job_id for job in jobs)))
+    updated = {
+        key: dict(response, jobId=job_ids.get(key)) for key, response in lost.items()
+        if response.get("jobId") != job_ids.get(key)
+    }
+    if updated:
+        components.result_store.replace_many(list(updated.items()))
+    return {**stored, **updated}
+
+def live_job_ids(job_ids: List[str]) -> Set[str]:
+    """Jobs that confirmed, or are pending and were updated within JOB_LOST_AFTER seconds"""
+    if not job_ids:
+        return set()
+    from utils.tx_queue import JOB_CONFIRMED, JOB_FAILED
+    lost_before = time.time() - JOB_LOST_AFTER
+    return {
+        job_id for job_id, (job, updated_at) in components.result_store.get_jobs(job_ids).items()
+        if job["status"] == JOB_CONFIRMED or (job["status"] != JOB_FAILED and updated_at >= lost_before)
+    }
+
+def parse_project_batch(body: bytes, content_type: str) -> List[ProjectData]:
+    """Parse a JSON array, NDJSON or msgpack array request body into project models"""
+    try:
+        items = serialization.decode(body, content_type)
+        if not isinstance(items, list):
+            raise ValueError("Expected an array of projects")
+        return [ProjectData(**item) for item in items]
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid project batch: {str(e)}")
+
+def build_result_record(project_id: int, is_valid: bool, reason: str, validation_details: Dict) -> Dict:
+    """Validation result document that is stored in IPFS and signed"""
+    return {
+        "projectId": project_id,
+        "status": "VERIFIED" if is_valid else "REJECTED",
+        "reason": reason,
+        "timestamp": datetime.utcnow().isoformat(),
+        "validation_details": validation_details
+    }
+
+def make_validation_response(record: Dict, ipfs_hash: str, signature: str, **extra) -> Dict:
+    """Response document of a signed result, with the fields of ValidationResponse"""
+    ml_details = record["validation_details"].get("ml_validation", record["validation_details"])
+    response = dict(
+        projectId=record["projectId"],
+        status=record["status"],
+        reason=record["reason"],
+        signature=signature,
+        ipfsHash=ipfs_hash,
+        timestamp=record["timestamp"],
+        modelVersion=ml_details.get("model_version"),
+        anomalyScore=ml_details.get("anomaly_score"),
+        jobId=None,
+        merkleRoot=None,
+        merkleProof=None
+    )
+    response.update(extra)
+    return response
+
+def validate_and_sign(data_dict: Dict) -> Tuple[Dict, bytes, str]:
+    """
+    Validate one project and sign its result record; both CPU-bound, so one trip to the worker pool
+
+    Returns:
+        Tuple of (record, its canonical encoding, signature over that encoding)
+    """
+    is_valid, reason, validation_details = components.validation_engine.validate_project(data_dict)
+    record = build_result_record(data_dict["tokenId"], is_valid, reason, validation_details)
+    
+    # Encode once; the same bytes are signed and stored in IPFS
+    signer = components.validation_signer
+    with stage_timer("serialization"):
+        encoded = signer.encoder(record)
+    with stage_timer("signing"):
+        signature = signer.sign_encoded(encoded)
+    return record, encoded, signature
+
+async def finalize_validation(response_data: Dict, encoded: bytes, signature: str) -> Dict:
+    """Store a signed validation result and, if valid, queue its on-chain verification"""
+    # Store validation result in IPFS
+    with stage_timer("ipfs_store"):
+        ipfs_hash = await store_in_ipfs(encoded)
+    
+    # If valid, queue the blockchain update; its progress is reported by /jobs/{job_id}
+    job_id = None
+    if response_data["status"] == "VERIFIED":
+        try:
+            job_id = components.verification_queue.enqueue(response_data["projectId"]).job_id
+        except Exception as e:
+            logger.error(f"Blockchain update failed: {str(e)}")
+            raise HTTPException(status_code=503, detail="Blockchain update unavailable")
+    
+    return make_validation_response(response_data, ipfs_hash, signature, jobId=job_id)
+
+async def store_in_ipfs(encoded: bytes) -> str:
+    """Store an encoded validation result in IPFS"""
+    try:
+        # CID is computed locally; the upload happens in the background
+        return await components.ipfs_store.put_bytes(encoded)
         
     except Exception as e:
         logger.error(f"IPFS storage error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to store data in IPFS")
 
+@app.post("/rules/reload")
+async def reload_rules():
+    """Reload the validation ruleset without restarting the API"""
+    try:
+        components.validation_engine.reload_rules()
+        return {"status": "reloaded", "timestamp": datetime.utcnow().isoformat()}
+    except Exception as e:
+        logger.error(f"Rule reload error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/model")
+async def model_info():
+    """Served anomaly model, archived versions, reservoir occupancy and retrain schedule"""
+    return dict(components.validation_engine.model_info(), updater=components.model_updater.stats())
+
+@app.post("/model/retrain")
+async def retrain_model():
+    """Retrain the anomaly model on the reservoir of accepted projects now"""
+    version = await run_cpu(components.validation_engine.retrain)
+    if version is None:
+        raise HTTPException(status_code=409, detail="Not enough accepted projects to retrain")
+    return {"status": "retrained", "version": version}
+
+@app.post("/model/rollback")
+async def rollback_model(version: Optional[str] = None):
+    """Serve an archived model version again; defaults to the one before the current model"""
+    try:
+        version = await run_cpu(components.validation_engine.rollback, version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "rolled_back", "version": version}
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """Stage slots, queue lengths and rejections of admission control"""
+    return components.admission.stats()
+
+@app.get("/ipfs/stats")
+async def ipfs_stats():
+    """Write-behind upload counters"""
+    return components.ipfs_store.stats()
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Validation result cache counters"""
+    return components.validation_engine.cache_stats()
+
+@app.get("/validation/{token_id}", response_model=ValidationResponse)
+async def get_validation(token_id: int, request: Request):
+    """Latest stored validation response of a project, in the media type the Accept header asks for"""
+    stored = components.result_store.latest(token_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="Validation not found")
+    return encoded_response(request, stored)
+
+@app.post("/telemetry")
+async def ingest_telemetry(request: Request):
+    """
+    Stream sensor and satellite readings into the per-project window aggregates
+
+    The body is NDJSON, one {"tokenId", "timestamp", "value"} reading per
+    line, and may be sent chunked. It is parsed and merged block by block as
+    it arrives, so uploads of any length use bounded memory. On a malformed
+    block the blocks before it stay merged.
+    """
+    received = accepted = 0
+    pending = bytearray()
+
+    async def flush(block: bytes):
+        nonlocal received, accepted
+        try:
+            counts = await run_cpu(ingest_telemetry_block, block)
+        except ValueError as e:
+            raise HTTPException(status_code=422,
+                                detail=f"Invalid telemetry after {received} readings: {str(e)}")
+        received += counts[0]
+        accepted += counts[1]
+
+    async for chunk in request.stream():
+        pending += chunk
+        if len(pending) >= TELEMETRY_BLOCK_BYTES:
+            cut = pending.rfind(b"\n") + 1
+            if cut:
+                block = bytes(pending[:cut])
+                del pending[:cut]
+                await flush(block)
+    if pending.strip():
+        await flush(bytes(pending))
+    return {"received": received, "accepted": accepted}
+
+def ingest_telemetry_block(block: bytes) -> Tuple[int, int]:
+    """Parse complete NDJSON lines and merge them; returns (received, accepted) readings"""
+    from engine.telemetry import parse_ndjson
+    token_ids, timestamps, values = parse_ndjson(block)
+    accepted = components.telemetry_store.ingest(token_ids, timestamps, values)
+    TELEMETRY_READINGS.labels("accepted").inc(accepted)
+    TELEMETRY_READINGS.labels("dropped").inc(len(values) - accepted)
+    return len(values), accepted
+
+@app.get("/telemetry/stats")
+async def telemetry_stats():
+    """Tracked projects, window layout and ingestion counters"""
+    return components.telemetry_store.stats()
+
+@app.get("/telemetry/{token_id}")
+async def get_telemetry(token_id: int):
+    """Live telemetry windows of a project and the aggregates the anomaly model sees"""
+    store = components.telemetry_store
+    windows = store.windows(token_id)
+    if windows is None:
+        raise HTTPException(status_code=404, detail="Telemetry not found")
+    # JSON has no infinity: the spread of readings averaging zero is reported as null
+    summary = {name: column[0].item() if math.isfinite(column[0]) else None
+               for name, column in store.summary([token_id]).items()}
+    return {"tokenId": token_id, "summary": summary, "windows": windows}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Receipt status of a queued on-chain verification"""
+    job = components.verification_queue.get_job(job_id)
+    if job is not None:
+        return job.to_dict()
+    # Queued by another worker, or before a restart
+    recorded = components.result_store.get_jobs([job_id]).get(job_id)
+    if recorded is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return recorded[0]
+
+@app.get("/projects/status")
+async def get_project_statuses(ids: List[int] = Query(...)):
+    """On-chain statuses of many projects; unknown projects map to null"""
+    if len(ids) > MAX_STATUS_QUERY_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_STATUS_QUERY_IDS} ids per request")
+    try:
+        statuses = await components.web3_bridge.get_project_statuses(ids)
+        return {str(project_id): status for project_id, status in statuses.items()}
+    except Exception as e:
+        logger.error(f"Status lookup failed: {str(e)}")
+        raise HTTPException(status_code=502, detail="Status lookup failed")
+
+@app.get("/projects")
+async def list_projects(status: Optional[str] = None, owner: Optional[str] = None,
+                        limit: int = Query(100, ge=1, le=1000), after: int = 0):
+    """Indexed projects filtered by status and/or owner, paginated by project ID"""
+    try:
+        projects = components.web3_bridge.list_projects(status, owner, limit, after)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"projects": projects, "indexedBlock": components.project_index.last_block}
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage and Web3 latency histograms, verdict counters, queue gauges"""
+    # Gauges are read at scrape time, and only from components that are already running
+    if components.is_built("verification_queue"):
+        QUEUE_DEPTH.set(components.verification_queue.depth())
+    if components.is_built("ipfs_store"):
+        IPFS_PENDING.set(components.ipfs_store.pending())
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Liveness: the process is up and its event loop responsive"""
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: the model is loaded, background workers run and the Ethereum node answers; 503 otherwise"""
+    checks = {"model": components.is_built("validation_engine")}
+    checks.update({name: name not in components.start_errors for name in BACKGROUND_WORKERS})
+    block_number = None
+    try:
+        block_number = await asyncio.wait_for(components.web3_bridge.get_block_number(), READINESS_TIMEOUT)
+        checks["ethereum"] = True
+    except Exception as e:
+        logger.warning(f"Readiness check could not reach the Ethereum node: {str(e)}")
+        checks["ethereum"] = False
+    body = {
+        "status": "ready" if all(checks.values()) else "not_ready",
+        "checks": checks,
+        "blockNumber": block_number,
+        "ipfsPending": components.ipfs_store.pending() if components.is_built("ipfs_store") else None,
+        "errors": components.start_errors,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    return JSONResponse(body, status_code=200 if all(checks.values()) else 503)
+
 if __name__ == "__main__":
     uvicorn.run("api:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Latency of /validate-project under concurrent load against stub web3/IPFS backends
+
+Starts an in-process JSON-RPC chain and IPFS API with configurable latency,
+then fires concurrent requests with synthetic projects at the FastAPI app
+through an ASGI transport. run_load is also used by the pytest-benchmark
+load test in test_load.py.
+
+Run from the validation_engine directory:
+
+    python -m benchmarks.bench_api_concurrency [concurrency] [total_requests]
+"""
+from typing import Dict, List
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from tests.stubs import (
+    CONTRACT_ADDRESS,
+    VALIDATOR_PRIVATE_KEY,
+    StubChain,
+    StubIPFS,
+    start_stub_servers,
+    write_abi_file,
+)
+from tests.synthetic import generate_projects
+
+RPC_LATENCY = 0.005
+IPFS_LATENCY = 0.020
+
+
+async def start_api(projects: List[Dict], rpc_latency: float = RPC_LATENCY, ipfs_latency: float = IPFS_LATENCY,
+                    **env: str):
+    """
+    Start stub backends and the API configured against them
+
+    Args:
+        projects: Projects to register on the stub chain
+        env: Extra environment settings, e.g. admission limits
+
+    Returns:
+        Tuple of (api module, stub server runner)
+    """
+    chain = StubChain(latency=rpc_latency)
+    for project in projects:
+        chain.register_project(project['tokenId'], "0x70997970C51812dc3A010C7d01b50e0d17dc79C8")
+    runner, rpc_url, ipfs_url = await start_stub_servers(chain, StubIPFS(latency=ipfs_latency))
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "ETHEREUM_RPC_URL": rpc_url,
+        "IPFS_API_URL": ipfs_url,
+        "PROJECT_NFT_CONTRACT_ADDRESS": CONTRACT_ADDRESS,
+        "VALIDATOR_PRIVATE_KEY": VALIDATOR_PRIVATE_KEY,
+        "PROJECT_NFT_ABI_PATH": write_abi_file(os.path.join(tmp, "ProjectNFT.json")),
+        "ANOMALY_MODEL_PATH": os.path.join(tmp, "model.joblib"),
+        "PROJECT_INDEX_PATH": os.path.join(tmp, "project_index.db"),
+        "IPFS_SPOOL_DIR": os.path.join(tmp, "ipfs_spool"),
+        "OVERLAP_INDEX_PATH": os.path.join(tmp, "overlap_index.db"),
+        "RESULT_STORE_PATH": os.path.join(tmp, "results.db"),
+        "VALIDATION_CACHE_SIZE": "0",
+        **env,
+    })
+    import api
+    await api.startup()
+    return api, runner
+
+
+async def run_load(concurrency: int = 100, total: int = 1000, rpc_latency: float = RPC_LATENCY,
+                   ipfs_latency: float = IPFS_LATENCY) -> Dict:
+    """
+    Drive /validate-project with synthetic projects at a fixed concurrency
+
+    Returns:
+        Dict of request counts, throughput (req/s) and latency percentiles (ms)
+    """
+    projects = generate_projects(total)
+    api, runner = await start_api(projects, rpc_latency, ipfs_latency)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    health_latencies = []
+    errors = 0
+    done = asyncio.Event()
+
+    async def one(client, project):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/validate-project", json=project)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+
+    async def probe_health(client):
+        # A blocked event loop shows up directly as /health latency
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/health")
+            health_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.05)
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await one(client, projects[0])  # warm-up
+        latencies.clear()
+        start = time.perf_counter()
+        probe = asyncio.create_task(probe_health(client))
+        await asyncio.gather(*(one(client, project) for project in projects[1:]))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe
+
+    queue = api.components.verification_queue
+    await queue.join()
+    confirmed = sum(job.status == "confirmed" for job in queue.jobs.values())
+    await api.shutdown()
+    await runner.cleanup()
+
+    ms = np.array(latencies) * 1000
+    health_ms = np.array(health_latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+        "jobs": len(queue.jobs),
+        "confirmed": confirmed,
+        "health_probes": len(health_ms),
+        "health_p50_ms": float(np.percentile(health_ms, 50)),
+        "health_p99_ms": float(np.percentile(health_ms, 99)),
+    }
+
+
+async def main(concurrency: int = 100, total: int = 1000):
+    stats = await run_load(concurrency, total)
+    print(f"requests:     {stats['requests']} at concurrency {concurrency} (errors: {stats['errors']})")
+    print(f"backends:     rpc {RPC_LATENCY * 1000:.0f}ms/call, ipfs {IPFS_LATENCY * 1000:.0f}ms/add")
+    print(f"throughput:   {stats['throughput']:,.1f} req/s")
+    print(f"latency:      p50={stats['p50_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms max={stats['max_ms']:.1f}ms")
+    print(f"on-chain:     {stats['confirmed']}/{stats['jobs']} verification jobs confirmed")
+    print(f"/health:      p50={stats['health_p50_ms']:.1f}ms p99={stats['health_p99_ms']:.1f}ms "
+          f"during load ({stats['health_probes']} probes)")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    asyncio.run(main(*args))
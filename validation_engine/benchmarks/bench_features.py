@@ -0,0 +1,48 @@
+"""
+Scaling of column-wise feature extraction with batch size
+
+Builds the full feature matrix, including spatial density lookups against a
+grid of prebuilt project locations, for growing batches of raw columns. A
+flat time per row across sizes shows the pipeline scales linearly.
+
+Run from the validation_engine directory:
+
+    python -m benchmarks.bench_features [max_rows] [indexed_locations]
+"""
+import sys
+import time
+
+from engine.features import N_FEATURES, SpatialGrid, bootstrap_columns, build_features
+
+
+def time_features(grid: SpatialGrid, columns, rounds: int = 3) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        density = grid.density(columns['latitude'], columns['longitude'])
+        build_features(density=density, **columns)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(max_rows: int = 1000000, indexed_locations: int = 100000):
+    grid = SpatialGrid()
+    indexed = bootstrap_columns(indexed_locations, seed=1)
+    grid.add_many(indexed['latitude'], indexed['longitude'])
+
+    print(f"features: {N_FEATURES}, grid: {len(grid):,} indexed locations")
+    print(f"{'rows':>10} {'seconds':>10} {'ns/row':>10}")
+    per_row = []
+    n = 1000
+    while n <= max_rows:
+        columns = bootstrap_columns(n)
+        del columns['density']
+        elapsed = time_features(grid, columns)
+        per_row.append(elapsed / n)
+        print(f"{n:>10,} {elapsed:>10.4f} {elapsed / n * 1e9:>10.0f}")
+        n *= 10
+    print(f"ns/row at largest vs 10k rows: {per_row[-1] / per_row[min(1, len(per_row) - 1)]:.2f}x")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,106 @@
+"""
+Overhead of the Prometheus instrumentation and of the (disabled) profiling hook
+
+validate_project is timed as shipped and with the metric helpers replaced by
+no-ops. The ProfilingMiddleware is timed on a trivial ASGI app without a
+token, with a token but no header (the production default when enabled),
+and for a profiled request.
+
+Run from the validation_engine directory:
+
+    python -m benchmarks.bench_metrics_overhead [n_projects]
+"""
+from contextlib import nullcontext
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import engine.validation_engine as validation_engine_module
+from engine.validation_engine import ValidationEngine
+from tests.synthetic import generate_projects
+from utils.profiler import ProfilingMiddleware
+
+ASGI_REQUESTS = 20000
+
+
+def time_validate(engine: ValidationEngine, projects) -> float:
+    start = time.perf_counter()
+    for project in projects:
+        engine.validate_project(project)
+    return (time.perf_counter() - start) / len(projects)
+
+
+def time_uninstrumented(engine: ValidationEngine, projects) -> float:
+    saved = validation_engine_module.stage_timer, validation_engine_module.record_verdict
+    validation_engine_module.stage_timer = lambda stage: nullcontext()
+    validation_engine_module.record_verdict = lambda is_valid, reason: None
+    try:
+        return time_validate(engine, projects)
+    finally:
+        validation_engine_module.stage_timer, validation_engine_module.record_verdict = saved
+
+
+def compare_instrumentation(engine: ValidationEngine, projects, rounds: int = 5):
+    """Alternate instrumented and uninstrumented rounds so machine noise hits both; best of each"""
+    uninstrumented = instrumented = float("inf")
+    for _ in range(rounds):
+        uninstrumented = min(uninstrumented, time_uninstrumented(engine, projects))
+        instrumented = min(instrumented, time_validate(engine, projects))
+    return uninstrumented, instrumented
+
+
+async def plain_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def time_asgi(app, headers, n: int) -> float:
+    scope = {"type": "http", "path": "/health", "method": "GET", "headers": headers}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / n
+
+
+async def time_middleware(profile_dir: str):
+    headers = [(b"host", b"test"), (b"user-agent", b"bench"), (b"accept", b"*/*")]
+    bare = await time_asgi(plain_app, headers, ASGI_REQUESTS)
+    no_token = await time_asgi(ProfilingMiddleware(plain_app), headers, ASGI_REQUESTS)
+    with_token = await time_asgi(ProfilingMiddleware(plain_app, token="t", output_dir=profile_dir),
+                                 headers, ASGI_REQUESTS)
+    profiled = await time_asgi(ProfilingMiddleware(plain_app, token="t", output_dir=profile_dir),
+                               headers + [(b"x-profile", b"t")], 20)
+    return bare, no_token, with_token, profiled
+
+
+def main(n: int = 500):
+    projects = generate_projects(n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = ValidationEngine(model_path=os.path.join(tmp, 'model.joblib'))
+        engine.validate_project(projects[0])
+
+        uninstrumented, instrumented = compare_instrumentation(engine, projects)
+        bare, no_token, with_token, profiled = asyncio.run(time_middleware(os.path.join(tmp, 'profiles')))
+
+    print(f"projects:                         {n}")
+    print(f"validate_project, no metrics:     {uninstrumented * 1e6:8.1f} us/project")
+    print(f"validate_project, with metrics:   {instrumented * 1e6:8.1f} us/project "
+          f"({(instrumented / uninstrumented - 1) * 100:+.1f}%)")
+    print(f"ASGI request, no middleware:      {bare * 1e6:8.2f} us")
+    print(f"profiling hook, no token:         {no_token * 1e6:8.2f} us (+{(no_token - bare) * 1e6:.2f} us)")
+    print(f"profiling hook, token, no header: {with_token * 1e6:8.2f} us (+{(with_token - bare) * 1e6:.2f} us)")
+    print(f"profiled request:                 {profiled * 1e6:8.0f} us")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,52 @@
+"""
+Per-request anomaly scoring latency: refit-per-request vs pre-trained model
+
+Run from the validation_engine directory:
+
+    python -m benchmarks.bench_ml_scoring
+"""
+import json
+import tempfile
+import time
+import os
+
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+from engine.validation_engine import ValidationEngine
+
+
+def _percentiles(samples):
+    arr = np.array(samples) * 1000
+    return f"p50={np.percentile(arr, 50):.3f}ms p99={np.percentile(arr, 99):.3f}ms mean={arr.mean():.3f}ms"
+
+
+def main(iterations: int = 200):
+    with open('tests/test_data.json', 'r') as f:
+        project = json.load(f)['valid_project']
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = ValidationEngine(model_path=os.path.join(tmp, 'model.joblib'))
+        features = np.array(engine._extract_features(project)).reshape(1, -1)
+
+        # Before: a fresh forest is fit on the single request row
+        before = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            IsolationForest(contamination=0.1, random_state=42).fit_predict(features)
+            before.append(time.perf_counter() - start)
+
+        # After: predict-only scoring against the loaded artifact
+        after = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            engine._ml_based_validation(project)
+            after.append(time.perf_counter() - start)
+
+    print(f"refit per request:  {_percentiles(before)}")
+    print(f"pre-trained model:  {_percentiles(after)}")
+    print(f"speedup (mean):     {np.mean(before) / np.mean(after):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
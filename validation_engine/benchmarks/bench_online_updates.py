@@ -0,0 +1,66 @@
+"""
+Scoring latency while the anomaly model is retrained in the background
+
+Fills the reservoir from synthetic projects, then times validate_project in
+the foreground with and without retrains running on another thread.
+
+Run from the validation_engine directory:
+
+    python -m benchmarks.bench_online_updates [n_projects] [reservoir_size]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from engine.validation_engine import ValidationEngine
+from tests.synthetic import generate_projects
+
+
+def score_latencies(engine: ValidationEngine, projects):
+    latencies = []
+    for project in projects:
+        start = time.perf_counter()
+        engine.validate_project(project)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+def main(n: int = 2000, reservoir_size: int = 10000):
+    projects = generate_projects(n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = ValidationEngine(model_path=os.path.join(tmp, 'model.joblib'), reservoir_size=reservoir_size)
+        engine.validate_batch(generate_projects(reservoir_size * 2, seed=1))
+
+        idle = score_latencies(engine, projects)
+
+        stop = threading.Event()
+        retrain_times = []
+
+        def retrain_loop():
+            while not stop.is_set():
+                start = time.perf_counter()
+                engine.retrain()
+                retrain_times.append(time.perf_counter() - start)
+
+        thread = threading.Thread(target=retrain_loop)
+        thread.start()
+        busy = score_latencies(engine, projects)
+        stop.set()
+        thread.join()
+        versions = len(engine.model_history.versions())
+
+    print(f"reservoir:          {reservoir_size} vectors, {engine.reservoir.nbytes / 1024:.0f} KiB")
+    print(f"retrain:            {np.mean(retrain_times) * 1000:.0f}ms mean over {len(retrain_times)} retrains "
+          f"({versions} versions archived)")
+    print(f"scoring, idle:      p50={np.percentile(idle, 50):.2f}ms p99={np.percentile(idle, 99):.2f}ms")
+    print(f"scoring, retrain:   p50={np.percentile(busy, 50):.2f}ms p99={np.percentile(busy, 99):.2f}ms "
+          f"max={busy.max():.2f}ms")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
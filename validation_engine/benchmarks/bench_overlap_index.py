@@ -0,0 +1,90 @@
+"""
+Lookup latency of the duplicate/overlap index at scale
+
+Indexes synthetic footprints (half spread over the globe, half packed into
+dense regions where real projects cluster), reloads the index from SQLite
+as a restart would, then times single queries and the per-project path the
+engine runs for an accepted project: query, hold the footprint, and index
+it once its verification is confirmed.
+
+Run from the validation_engine directory:
+
+    python -m benchmarks.bench_overlap_index [indexed] [queries]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from engine.overlap_index import OverlapIndex, footprint_radius
+
+
+def make_footprints(n: int, seed: int = 0, start_token_id: int = 0):
+    rng = np.random.default_rng(seed)
+    spread = n // 2
+    latitude = np.concatenate([rng.uniform(-60, 70, spread), rng.normal(-3, 2, n - spread)])
+    longitude = np.concatenate([rng.uniform(-180, 180, spread), rng.normal(-60, 3, n - spread)])
+    area = np.where(rng.random(n) < 0.6, rng.lognormal(np.log(500), 1.5, n), np.nan)
+    start = rng.uniform(18000, 20000, n)
+    end = start + rng.uniform(180, 3000, n)
+    return [
+        (start_token_id + i, float(latitude[i]), float(longitude[i]), footprint_radius(area[i]),
+         float(start[i]), float(end[i]))
+        for i in range(n)
+    ]
+
+
+def main(indexed: int = 1000000, queries: int = 10000):
+    footprints = make_footprints(indexed)
+    probes = make_footprints(queries, seed=1, start_token_id=indexed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'overlap_index.db')
+        start = time.perf_counter()
+        index = OverlapIndex(path)
+        index.insert_many(footprints)
+        build = time.perf_counter() - start
+        index.close()
+
+        start = time.perf_counter()
+        index = OverlapIndex(path)
+        reload = time.perf_counter() - start
+
+        query_us = []
+        hits = 0
+        for token_id, *footprint in probes:
+            start = time.perf_counter()
+            hits += bool(index.query(*footprint))
+            query_us.append((time.perf_counter() - start) * 1e6)
+
+        hold_us = []
+        confirm_us = []
+        for token_id, *footprint in probes[:1000]:
+            start = time.perf_counter()
+            index.refresh()
+            index.query(*footprint, exclude_token_id=token_id)
+            index.hold_many([(token_id, *footprint)])
+            hold_us.append((time.perf_counter() - start) * 1e6)
+        for token_id, *_ in probes[:1000]:
+            start = time.perf_counter()
+            index.refresh()
+            index.confirm_many([token_id])
+            confirm_us.append((time.perf_counter() - start) * 1e6)
+        index.close()
+
+    query_us = np.array(query_us)
+    hold_us = np.array(hold_us)
+    confirm_us = np.array(confirm_us)
+    print(f"indexed:  {indexed:,} footprints, built in {build:.1f}s, reloaded from SQLite in {reload:.1f}s")
+    print(f"query:    p50={np.percentile(query_us, 50):.0f}us p99={np.percentile(query_us, 99):.0f}us "
+          f"max={query_us.max():.0f}us over {queries:,} queries ({hits:,} overlapping)")
+    print(f"accept:   p50={np.percentile(hold_us, 50):.0f}us p99={np.percentile(hold_us, 99):.0f}us "
+          f"(refresh + query + held footprint written to SQLite)")
+    print(f"confirm:  p50={np.percentile(confirm_us, 50):.0f}us p99={np.percentile(confirm_us, 99):.0f}us "
+          f"(refresh + hold moved into the index)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
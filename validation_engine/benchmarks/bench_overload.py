@@ -0,0 +1,183 @@
+"""
+Latency of /validate-project when offered more load than it can serve
+
+Measures the API's capacity with a closed-loop run at high concurrency, then offers new
+projects at a multiple of that rate (open loop: arrivals do not wait for
+responses, as independent clients would not) and compares the service with
+admission control against one that queues everything. Without a bound the
+backlog, and so the latency of every request, grows for as long as the
+overload lasts; with it, excess requests get a fast 503 and the latency of
+admitted ones stays bounded by the queue length. Requests go straight to
+the ASGI app with pre-encoded bodies, so the client adds as little as
+possible to the time the service itself spends.
+
+Run from the validation_engine directory:
+
+    python -m benchmarks.bench_overload [load_factor] [seconds] [max_queue]
+"""
+from typing import Dict
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_api_concurrency import start_api
+from tests.synthetic import generate_projects
+
+# Settings of a service that admits everything, for comparison
+UNBOUNDED = {"ADMISSION_CPU_CONCURRENCY": "1000000", "ADMISSION_IO_CONCURRENCY": "1000000",
+             "ADMISSION_MAX_QUEUE": "1000000000"}
+
+
+async def post(app, path: str, body: bytes) -> Dict:
+    """POST body to an ASGI app; returns the status code and response headers"""
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+             "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+             "client": ("127.0.0.1", 50000), "server": ("bench", 80)}
+    sent = False
+    result = {}
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # No disconnect: the client waits for the response however long it takes
+        await asyncio.get_running_loop().create_future()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+            result["headers"] = dict(message["headers"])
+
+    await app(scope, receive, send)
+    return result
+
+
+async def start_warm(projects, **env):
+    """
+    Start the API and wait until the model is fitted and the project index has
+    caught up with the stub chain, so start-up is not measured
+
+    Every project is registered on the chain before the API starts; left to
+    run during the measurement, the indexer's first sync of those logs
+    competes with the requests for the event loop.
+    """
+    api, runner = await start_api(projects, **env)
+    await api._warmup_task
+    head = await api.components.web3_bridge.w3.eth.block_number
+    while (api.components.project_index.last_block or -1) < head:
+        await asyncio.sleep(0.05)
+    await post(api.app, "/validate-project", json.dumps(projects[0]).encode())
+    return api, runner
+
+
+async def measure_capacity(total: int = 2000, concurrency: int = 256) -> float:
+    """Req/s the service sustains with enough requests in flight to keep every stage busy"""
+    projects = generate_projects(total + 1, seed=11, invalid_fraction=0)
+    bodies = [json.dumps(project).encode() for project in projects[1:]]
+    api, runner = await start_warm(projects, **UNBOUNDED)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(body):
+        async with semaphore:
+            status = (await post(api.app, "/validate-project", body))["status"]
+            if status != 200:
+                raise RuntimeError(f"Capacity run got status {status}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(body) for body in bodies))
+    elapsed = time.perf_counter() - start
+    await api.shutdown()
+    await runner.cleanup()
+    return total / elapsed
+
+
+async def offer(app, bodies, rate: float, seed: int = 0) -> Dict:
+    """Send bodies at Poisson arrivals of the given rate; returns status codes, latencies and queue waits"""
+    arrivals = np.cumsum(np.random.default_rng(seed).exponential(1 / rate, len(bodies)))
+    statuses, latencies, waits = [], [], []
+
+    async def one(body):
+        start = time.perf_counter()
+        response = await post(app, "/validate-project", body)
+        latencies.append(time.perf_counter() - start)
+        statuses.append(response["status"])
+        waits.append(float(response["headers"].get(b"x-queue-wait-ms", b"nan")))
+
+    tasks = []
+    start = time.perf_counter()
+    for body, arrival in zip(bodies, arrivals):
+        delay = start + arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(body)))
+    offered = len(bodies) / (time.perf_counter() - start)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    return {'statuses': np.array(statuses), 'latencies': np.array(latencies), 'waits': np.array(waits),
+            'offered': offered, 'elapsed': elapsed}
+
+
+async def run_overload(load_factor: float = 2.0, seconds: float = 10.0, max_queue: int = 32,
+                       bounded: bool = True, capacity: float = None) -> Dict:
+    """
+    Offer load_factor times the measured capacity for the given duration
+
+    Args:
+        load_factor: Offered rate as a multiple of capacity
+        seconds: Duration of the overload
+        max_queue: Admission queue bound per stage
+        bounded: Use admission control; otherwise every request is queued
+        capacity: Known capacity in req/s; measured first when None
+
+    Returns:
+        Dict of capacity, offered and served rates, shed share and latency
+        percentiles (ms) of the requests that were served
+    """
+    if capacity is None:
+        capacity = await measure_capacity()
+    projects = generate_projects(int(capacity * load_factor * seconds), seed=12, invalid_fraction=0)
+    if bounded:
+        # Default stage limits, whatever an earlier unbounded run left in the environment
+        for name in UNBOUNDED:
+            os.environ.pop(name, None)
+    bodies = [json.dumps(project).encode() for project in projects[1:]]
+    api, runner = await start_warm(projects, **({"ADMISSION_MAX_QUEUE": str(max_queue)} if bounded else UNBOUNDED))
+    result = await offer(api.app, bodies, capacity * load_factor)
+    await api.shutdown()
+    await runner.cleanup()
+
+    served = result['statuses'] == 200
+    ms = result['latencies'][served] * 1000
+    return {
+        "capacity": capacity,
+        "offered": result['offered'],
+        "served_per_s": served.sum() / result['elapsed'],
+        "requests": len(served),
+        "shed": int((result['statuses'] == 503).sum()),
+        "errors": int((~served & (result['statuses'] != 503)).sum()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+        "queue_wait_p99_ms": float(np.percentile(result['waits'][served], 99)),
+    }
+
+
+async def main(load_factor: float = 2.0, seconds: float = 10.0, max_queue: int = 32):
+    bounded = await run_overload(load_factor, seconds, max_queue)
+    unbounded = await run_overload(load_factor, seconds, bounded=False, capacity=bounded['capacity'])
+    print(f"capacity:  {bounded['capacity']:,.0f} req/s (closed loop); offering {load_factor:g}x for {seconds:g}s")
+    print(f"{'mode':<20} {'offered':>8} {'served':>8} {'shed':>6} {'p50':>9} {'p99':>9} {'max':>9} {'wait p99':>9}")
+    for name, stats in ((f"admission (q={max_queue})", bounded), ("unbounded", unbounded)):
+        print(f"{name:<20} {stats['offered']:>6.0f}/s {stats['served_per_s']:>6.0f}/s "
+              f"{stats['shed'] / stats['requests']:>5.0%} {stats['p50_ms']:>7.0f}ms {stats['p99_ms']:>7.0f}ms "
+              f"{stats['max_ms']:>7.0f}ms {stats['queue_wait_p99_ms']:>7.0f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*[float(arg) for arg in sys.argv[1:3]], *[int(arg) for arg in sys.argv[3:4]]))
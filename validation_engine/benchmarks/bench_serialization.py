@@ -0,0 +1,108 @@
+"""
+Serialization share of /validate-project request time
+
+Times the encoding and decoding one validation goes through, on results of
+real validations: parsing the request into ProjectData, the payload and
+cache-key hashes, the encoding that is signed, the IPFS content, the stored
+response and the response body. "before" repeats each step as the API did
+with json.dumps: the record was encoded once for signing and again for
+IPFS, and responses went through ValidationResponse models and FastAPI's
+encoder. "after" is the shipped path: orjson, the record encoded once.
+The share of request time uses the service time of a closed-loop run
+against stub backends, so both figures assume one request per core.
+
+Run from the validation_engine directory:
+
+    python -m benchmarks.bench_serialization [n_projects]
+"""
+from typing import Callable, Dict, List
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.bench_api_concurrency import run_load
+from engine.validation_engine import ValidationEngine
+from tests.synthetic import generate_projects
+from utils.serialization import JSON, canonical_json, encode
+
+
+def make_documents(n: int) -> List[Dict]:
+    """Request body, result record and response of n validated projects"""
+    import api
+    projects = generate_projects(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = ValidationEngine(model_path=os.path.join(tmp, 'model.joblib'))
+        results = engine.validate_batch(projects)
+    documents = []
+    for project, (is_valid, reason, details) in zip(projects, results):
+        record = api.build_result_record(project['tokenId'], is_valid, reason, details)
+        response = api.make_validation_response(record, "bafkrei" + "a" * 52, "0x" + "ab" * 65)
+        documents.append({'body': json.dumps(project).encode(), 'record': record, 'response': response})
+    return documents
+
+
+def before(document: Dict):
+    import api
+    # FastAPI parsed the body into the model; the handler converted it back
+    data = api.ProjectData(**json.loads(document['body'])).dict()
+    for _ in range(2):  # payload_hash and the engine's cache key
+        hashlib.sha256(json.dumps(data, sort_keys=True, separators=(',', ':'), default=str).encode()).hexdigest()
+    for _ in range(2):  # signing, then IPFS
+        json.dumps(document['record'], sort_keys=True).encode()
+    response = api.ValidationResponse(**document['response'])
+    stored = json.loads(json.dumps(response.dict()))
+    # The handler rebuilt the model; FastAPI validated it against response_model and encoded it
+    body = api.ValidationResponse(**stored)
+    json.dumps(jsonable_encoder(api.ValidationResponse.model_validate(body)),
+               ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def after(document: Dict):
+    import api
+    data = api.parse_project(document['body'], JSON)
+    for _ in range(2):
+        hashlib.sha256(canonical_json(data)).hexdigest()
+    canonical_json(document['record'])
+    stored = orjson.loads(orjson.dumps(document['response']).decode())
+    encode(stored, JSON)
+
+
+def time_per_document(step: Callable, documents: List[Dict], rounds: int = 5) -> float:
+    """Best of several rounds, in seconds per document"""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for document in documents:
+            step(document)
+        best = min(best, (time.perf_counter() - start) / len(documents))
+    return best
+
+
+def main(n: int = 2000):
+    os.environ.setdefault("CPU_WORKERS", "1")
+    # before() calls .dict() as the API did
+    warnings.simplefilter("ignore", DeprecationWarning)
+    documents = make_documents(n)
+    old, new = time_per_document(before, documents), time_per_document(after, documents)
+    load = asyncio.run(run_load(concurrency=64, total=n))
+    # Requests overlap only on I/O; on one core, service time is the inverse of throughput
+    service = 1 / load['throughput']
+
+    print(f"projects:              {n}   (record {len(orjson.dumps(documents[0]['record']))} bytes)")
+    print(f"serialization before:  {old * 1e6:8.1f} us/request")
+    print(f"serialization after:   {new * 1e6:8.1f} us/request ({old / new:.1f}x faster)")
+    print(f"request service time:  {service * 1e6:8.1f} us ({load['throughput']:,.0f} req/s closed loop)")
+    print(f"share before:          {old / (service - new + old):8.1%}")
+    print(f"share after:           {new / service:8.1%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,93 @@
+"""
+Import time of the API module and time until /ready reports ready
+
+Each import is measured in a fresh interpreter; "eager" additionally builds
+every component at import, which is what importing api.py used to do.
+Readiness is measured in-process against stub web3/IPFS backends.
+
+Run from the validation_engine directory:
+
+    python -m benchmarks.bench_startup [runs]
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from tests.stubs import (
+    CONTRACT_ADDRESS,
+    VALIDATOR_PRIVATE_KEY,
+    StubChain,
+    StubIPFS,
+    start_stub_servers,
+    write_abi_file,
+)
+
+HEAVY_MODULES = ('sklearn', 'pandas', 'web3', 'eth_keys')
+
+IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import api
+if {eager}:
+    for name in ('validation_engine', 'web3_bridge', 'verification_queue', 'validation_signer', 'ipfs_store'):
+        getattr(api.components, name)
+elapsed = time.perf_counter() - start
+print(elapsed, ','.join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+def time_import(eager: bool, env: dict):
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET.format(eager=eager, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, env=env, check=True
+    ).stdout.split()
+    return float(output[0]), output[1] if len(output) > 1 else ""
+
+
+async def time_to_ready(env: dict) -> float:
+    os.environ.update(env)
+    start = time.perf_counter()
+    import api
+    async with api.lifespan(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            while (await client.get("/ready")).status_code != 200:
+                await asyncio.sleep(0.01)
+            return time.perf_counter() - start
+
+
+async def main(runs: int = 5):
+    runner, rpc_url, ipfs_url = await start_stub_servers(StubChain(), StubIPFS())
+    tmp = tempfile.mkdtemp()
+    env = dict(os.environ, **{
+        "ETHEREUM_RPC_URL": rpc_url,
+        "IPFS_API_URL": ipfs_url,
+        "PROJECT_NFT_CONTRACT_ADDRESS": CONTRACT_ADDRESS,
+        "VALIDATOR_PRIVATE_KEY": VALIDATOR_PRIVATE_KEY,
+        "PROJECT_NFT_ABI_PATH": write_abi_file(os.path.join(tmp, "ProjectNFT.json")),
+        "ANOMALY_MODEL_PATH": os.path.join(tmp, "model.joblib"),
+        "PROJECT_INDEX_PATH": os.path.join(tmp, "project_index.db"),
+        "IPFS_SPOOL_DIR": os.path.join(tmp, "ipfs_spool"),
+        "OVERLAP_INDEX_PATH": os.path.join(tmp, "overlap_index.db"),
+        "RESULT_STORE_PATH": os.path.join(tmp, "results.db"),
+    })
+
+    for eager in (False, True):
+        results = [time_import(eager, env) for _ in range(runs)]
+        seconds = np.array([elapsed for elapsed, _ in results]) * 1000
+        print(f"import ({'eager' if eager else 'lazy '}): median {np.median(seconds):.0f}ms "
+              f"min {seconds.min():.0f}ms over {runs} runs; heavy modules: {results[0][1] or 'none'}")
+
+    print(f"import to /ready: {await time_to_ready(env) * 1000:.0f}ms")
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    asyncio.run(main(*args))
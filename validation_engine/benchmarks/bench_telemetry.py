@@ -0,0 +1,97 @@
+"""
+Telemetry ingestion throughput on one core
+
+Streams synthetic readings (hourly-ish from every project, over a month)
+into the window aggregates three ways: as NumPy arrays straight into the
+store, as NDJSON blocks parsed and merged the way the API does, and as one
+chunked NDJSON upload through POST /telemetry.
+
+Run from the validation_engine directory:
+
+    python -m benchmarks.bench_telemetry [readings] [projects] [block_readings]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from engine.telemetry import TelemetryStore, parse_ndjson
+
+DAY = 86400
+
+
+def make_readings(n: int, projects: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    token_ids = rng.integers(0, projects, n)
+    timestamps = 1700000000 + np.sort(rng.uniform(0, 30 * DAY, n))
+    values = rng.lognormal(0, 0.5, n)
+    return token_ids, timestamps, values
+
+
+def to_ndjson_blocks(token_ids, timestamps, values, block_readings: int):
+    lines = [json.dumps({"tokenId": int(t), "timestamp": float(s), "value": float(v)}).encode() + b"\n"
+             for t, s, v in zip(token_ids, timestamps, values)]
+    return [b"".join(lines[start:start + block_readings]) for start in range(0, len(lines), block_readings)]
+
+
+def bench_arrays(token_ids, timestamps, values, block_readings: int) -> float:
+    store = TelemetryStore()
+    start = time.perf_counter()
+    for offset in range(0, len(values), block_readings):
+        block = slice(offset, offset + block_readings)
+        store.ingest(token_ids[block], timestamps[block], values[block])
+    return time.perf_counter() - start
+
+
+def bench_ndjson(blocks) -> float:
+    store = TelemetryStore()
+    start = time.perf_counter()
+    for block in blocks:
+        store.ingest(*parse_ndjson(block))
+    return time.perf_counter() - start
+
+
+def bench_api(blocks) -> float:
+    import httpx
+    os.environ.setdefault("CPU_WORKERS", "1")
+    import api
+
+    async def body():
+        for block in blocks:
+            yield block
+
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                start = time.perf_counter()
+                response = await client.post("/telemetry", content=body(),
+                                             headers={"Content-Type": "application/x-ndjson"})
+                elapsed = time.perf_counter() - start
+                response.raise_for_status()
+                return elapsed
+        finally:
+            await api.components.close()
+
+    return asyncio.run(run())
+
+
+def main(readings: int = 1000000, projects: int = 10000, block_readings: int = 10000):
+    token_ids, timestamps, values = make_readings(readings, projects)
+    blocks = to_ndjson_blocks(token_ids, timestamps, values, block_readings)
+    megabytes = sum(len(block) for block in blocks) / 1e6
+
+    print(f"{readings:,} readings from {projects:,} projects, {block_readings:,} per block ({megabytes:.0f} MB NDJSON)")
+    for name, elapsed in (
+        ("arrays", bench_arrays(token_ids, timestamps, values, block_readings)),
+        ("ndjson", bench_ndjson(blocks)),
+        ("POST /telemetry", bench_api(blocks)),
+    ):
+        print(f"{name:<16} {readings / elapsed:>12,.0f} readings/s  {elapsed:6.2f}s")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
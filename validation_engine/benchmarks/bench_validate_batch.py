@@ -0,0 +1,42 @@
+"""
+Throughput of ValidationEngine.validate_batch vs looping validate_project
+
+Run from the validation_engine directory:
+
+    python -m benchmarks.bench_validate_batch [n_projects]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from engine.validation_engine import ValidationEngine
+from tests.synthetic import generate_projects
+
+
+def main(n: int = 10000):
+    projects = generate_projects(n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = ValidationEngine(model_path=os.path.join(tmp, 'model.joblib'))
+
+        start = time.perf_counter()
+        looped = [engine.validate_project(p) for p in projects]
+        loop_elapsed = time.perf_counter() - start
+
+        # A fresh engine, so the batch starts from the same reservoir and pending footprints
+        engine = ValidationEngine(model_path=os.path.join(tmp, 'model.joblib'))
+        start = time.perf_counter()
+        batched = engine.validate_batch(projects)
+        batch_elapsed = time.perf_counter() - start
+
+    agree = sum(a[0] == b[0] for a, b in zip(looped, batched))
+    print(f"projects:          {n}")
+    print(f"validate_project:  {loop_elapsed:.2f}s ({n / loop_elapsed:,.0f} projects/s)")
+    print(f"validate_batch:    {batch_elapsed:.2f}s ({n / batch_elapsed:,.0f} projects/s)")
+    print(f"speedup:           {loop_elapsed / batch_elapsed:.1f}x")
+    print(f"verdict agreement: {agree}/{n}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,105 @@
+"""
+Memory per worker process serving the anomaly model
+
+Starts N processes that each build a ValidationEngine on one shared model
+file and score a project, as N uvicorn workers would, then reads their
+memory from /proc (Linux only). The baseline workers serve the same model
+the way the engine used to: sklearn imported and the pickled
+IsolationForest loaded into each process's heap. RSS counts shared pages in
+every process; PSS splits them between the processes sharing them, so the
+PSS total is what N workers really cost.
+
+Run from the validation_engine directory:
+
+    python -m benchmarks.bench_worker_memory [max_workers]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+import joblib
+
+from tests.synthetic import generate_projects
+
+WORKER_COUNTS = (1, 4, 16)
+
+
+def worker(mode: str, model_path: str):
+    """Serve the model in this process, then wait on stdin until the parent has measured it"""
+    from engine.validation_engine import ValidationEngine
+    project = generate_projects(1, seed=3, invalid_fraction=0)[0]
+    engine = ValidationEngine(model_path=model_path)
+    if mode == 'baseline':
+        import sklearn.ensemble  # noqa: F401 - imported at module level by the engine before
+        model = joblib.load(model_path + '.sklearn')
+        engine._artifact.model = model
+    engine.validate_project(project)
+    print("ready", flush=True)
+    sys.stdin.readline()
+
+
+def read_memory(pid: int, model_path: str) -> dict:
+    """RSS, PSS and private (USS) kB of a process, and the RSS kB of its model file mapping"""
+    totals = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if name in ('Rss', 'Pss', 'Private_Clean', 'Private_Dirty'):
+                totals[name] = int(value.split()[0])
+    model_rss = 0
+    in_model = False
+    with open(f"/proc/{pid}/smaps") as f:
+        for line in f:
+            if '-' in line.split(' ', 1)[0]:
+                in_model = line.rstrip().endswith(os.path.basename(model_path))
+            elif in_model and line.startswith('Rss:'):
+                model_rss += int(line.split()[1])
+    return {'rss': totals['Rss'], 'pss': totals['Pss'],
+            'uss': totals['Private_Clean'] + totals['Private_Dirty'], 'model_rss': model_rss}
+
+
+def measure(mode: str, workers: int, model_path: str) -> list:
+    processes = [
+        subprocess.Popen([sys.executable, "-m", "benchmarks.bench_worker_memory", "--worker", mode, model_path],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for _ in range(workers)
+    ]
+    try:
+        for process in processes:
+            assert process.stdout.readline().strip() == "ready"
+        return [read_memory(process.pid, model_path) for process in processes]
+    finally:
+        for process in processes:
+            process.communicate("\n")
+
+
+def main(max_workers: int = WORKER_COUNTS[-1]):
+    from engine.model_store import load_model_artifact
+    from engine.validation_engine import ValidationEngine
+    from sklearn.ensemble import IsolationForest
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = os.path.join(tmp, 'model.joblib')
+        engine = ValidationEngine(model_path=model_path)
+        features = engine._bootstrap_features()
+        joblib.dump(IsolationForest(contamination=0.1, random_state=42).fit(features), model_path + '.sklearn')
+        flat = load_model_artifact(model_path).model
+        print(f"model: {flat.n_trees} trees, {len(flat.threshold):,} nodes; flat arrays {flat.nbytes / 1024:.0f} kB, "
+              f"artifact {os.path.getsize(model_path) / 1024:.0f} kB, "
+              f"sklearn pickle {os.path.getsize(model_path + '.sklearn') / 1024:.0f} kB")
+        print(f"{'mode':<9} {'workers':>7} {'RSS/worker':>11} {'PSS/worker':>11} {'USS/worker':>11} "
+              f"{'PSS total':>10} {'model RSS':>10}")
+        for workers in [n for n in WORKER_COUNTS if n <= max_workers]:
+            for mode in ('baseline', 'mmap'):
+                stats = measure(mode, workers, model_path)
+                mean = {key: sum(s[key] for s in stats) / len(stats) / 1024 for key in stats[0]}
+                print(f"{mode:<9} {workers:>7} {mean['rss']:>9.1f}MB {mean['pss']:>9.1f}MB {mean['uss']:>9.1f}MB "
+                      f"{mean['pss'] * workers:>8.0f}MB {mean['model_rss'] * 1024:>8.0f}kB")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--worker"]:
+        worker(sys.argv[2], sys.argv[3])
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,36 @@
+"""
+Shared fixtures of the pytest-benchmark suite
+
+Run from the validation_engine directory (requires pytest-benchmark):
+
+    python -m pytest benchmarks --benchmark-autosave
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Scale is configured from the environment: BENCH_PROJECTS (synthetic corpus
+size, default 1000), LOAD_TEST_REQUESTS (default 500) and
+LOAD_TEST_CONCURRENCY (default 50).
+"""
+import os
+import pytest
+from engine.parsed_project import ParsedProject
+from engine.validation_engine import ValidationEngine
+from tests.synthetic import generate_projects
+
+BENCH_PROJECTS = int(os.getenv("BENCH_PROJECTS", "1000"))
+
+@pytest.fixture(scope="session")
+def engine(tmp_path_factory):
+    return ValidationEngine(model_path=str(tmp_path_factory.mktemp("model") / "anomaly_model.joblib"))
+
+@pytest.fixture(scope="session")
+def projects():
+    return generate_projects(BENCH_PROJECTS)
+
+@pytest.fixture(scope="session")
+def valid_projects(engine, projects):
+    """Synthetic projects that pass the rules, so every benchmarked call runs the full path"""
+    return [project for project in projects if engine._rule_based_validation(project)[0]]
+
+@pytest.fixture(scope="session")
+def parsed_projects(valid_projects):
+    return [ParsedProject.from_dict(project) for project in valid_projects]
@@ -0,0 +1,29 @@
+import asyncio
+import os
+import pytest
+from benchmarks.bench_api_concurrency import run_load
+
+LOAD_TEST_REQUESTS = int(os.getenv("LOAD_TEST_REQUESTS", "500"))
+LOAD_TEST_CONCURRENCY = int(os.getenv("LOAD_TEST_CONCURRENCY", "50"))
+
+@pytest.mark.benchmark(group="load")
+def test_validate_project_load(benchmark, monkeypatch):
+    """
+    End-to-end /validate-project load against stub web3/IPFS backends
+
+    The benchmark time is the whole run; throughput and latency percentiles
+    are saved in extra_info so they are tracked alongside it.
+    """
+    # run_load configures the API through the environment; keep it out of other tests
+    for name in ("ETHEREUM_RPC_URL", "IPFS_API_URL", "PROJECT_NFT_CONTRACT_ADDRESS", "VALIDATOR_PRIVATE_KEY",
+                 "PROJECT_NFT_ABI_PATH", "ANOMALY_MODEL_PATH", "PROJECT_INDEX_PATH", "IPFS_SPOOL_DIR",
+                 "OVERLAP_INDEX_PATH", "RESULT_STORE_PATH", "VALIDATION_CACHE_SIZE"):
+        monkeypatch.setenv(name, os.environ.get(name, ""))
+
+    stats = benchmark.pedantic(
+        lambda: asyncio.run(run_load(LOAD_TEST_CONCURRENCY, LOAD_TEST_REQUESTS)),
+        rounds=1, iterations=1
+    )
+    benchmark.extra_info.update(stats)
+    assert stats["errors"] == 0
+    assert stats["confirmed"] == stats["jobs"]
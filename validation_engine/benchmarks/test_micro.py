@@ -0,0 +1,55 @@
+import itertools
+import pytest
+from tests.stubs import VALIDATOR_PRIVATE_KEY
+from utils.signature_utils import sign_validation_result
+
+def cycle(items):
+    """Callable returning the next item on each call, so runs don't hit one cached input"""
+    return itertools.cycle(items).__next__
+
+@pytest.mark.benchmark(group="rules")
+def test_rule_based_validation_parsed(benchmark, engine, parsed_projects):
+    """Rule checks on an already parsed project"""
+    next_project = cycle(parsed_projects)
+    is_valid, _, _ = benchmark(lambda: engine._rule_based_validation(next_project()))
+    assert is_valid == True
+
+@pytest.mark.benchmark(group="rules")
+def test_rule_based_validation_dict(benchmark, engine, valid_projects):
+    """Rule checks including parsing the request payload"""
+    next_project = cycle(valid_projects)
+    is_valid, _, _ = benchmark(lambda: engine._rule_based_validation(next_project()))
+    assert is_valid == True
+
+@pytest.mark.benchmark(group="ml")
+def test_extract_features(benchmark, engine, parsed_projects):
+    next_project = cycle(parsed_projects)
+    features = benchmark(lambda: engine._extract_features(next_project()))
+    assert len(features) == engine.model_n_features
+
+@pytest.mark.benchmark(group="ml")
+def test_ml_based_validation(benchmark, engine, parsed_projects):
+    next_project = cycle(parsed_projects)
+    _, _, details = benchmark(lambda: engine._ml_based_validation(next_project()))
+    assert 'anomaly_score' in details
+
+@pytest.mark.benchmark(group="signing")
+def test_sign_validation_result(benchmark, monkeypatch, engine, valid_projects):
+    monkeypatch.setenv("VALIDATOR_PRIVATE_KEY", VALIDATOR_PRIVATE_KEY)
+    is_valid, reason, details = engine.validate_project(valid_projects[0])
+    record = {"projectId": 1, "status": "VERIFIED" if is_valid else "REJECTED", "reason": reason,
+              "timestamp": "2024-01-01T00:00:00", "validation_details": details}
+    signature = benchmark(sign_validation_result, record)
+    assert len(signature) == 132
+
+@pytest.mark.benchmark(group="engine")
+def test_validate_project(benchmark, engine, projects):
+    next_project = cycle(projects)
+    benchmark(lambda: engine.validate_project(next_project()))
+
+@pytest.mark.benchmark(group="engine")
+def test_validate_batch(benchmark, engine, projects):
+    """Whole synthetic corpus in one call; compare per-project cost with test_validate_project"""
+    results = benchmark.pedantic(engine.validate_batch, args=(projects,), rounds=5, warmup_rounds=1)
+    benchmark.extra_info["projects"] = len(projects)
+    assert len(results) == len(projects)
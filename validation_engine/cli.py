@@ -0,0 +1,380 @@
+"""
+Offline bulk validation of project registry exports
+
+Run from the validation_engine directory:
+
+    python -m cli validate projects.ndjson -o results.ndjson --workers 8
+    python -m cli validate projects.parquet -o results.ndjson --resume
+
+Records are streamed from NDJSON, CSV or Parquet in chunks and validated on a
+process pool whose workers each load the anomaly model once. Results are
+written as NDJSON in input order, one line per input record, so an
+interrupted run can be resumed from the number of lines already written.
+No web3 or IPFS connection is made. Duplicate land claims are only checked
+against a persisted index of verified footprints given with --overlap-index,
+which is read, never written, so verdicts do not depend on how records are
+split across workers and chunks.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+if __package__ == "validation_engine":
+    # Invoked as `python -m validation_engine.cli` from the repository root
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+from engine.overlap_index import OverlapIndex
+from engine.validation_engine import ValidationEngine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# Fields holding lists/objects, which CSV cells carry as JSON text
+NESTED_FIELDS = ('location', 'data_sources', 'additional_data')
+
+
+class MalformedRecord(NamedTuple):
+    """Placeholder for an input record that could not be decoded; it gets an error result line"""
+    error: str
+
+
+def detect_format(path: str) -> str:
+    """Infer the input format from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.parquet', '.pq'):
+        return 'parquet'
+    raise ValueError(f"Cannot infer the format of {path}; pass --format")
+
+
+def _read_ndjson(path: str, chunk_size: int, offset: int) -> Iterator[List[Dict]]:
+    with open(path, 'r') as f:
+        lines = ((number, line) for number, line in enumerate(f, 1) if line.strip())
+        for _ in islice(lines, offset):
+            pass
+        while True:
+            chunk = [_decode_line(number, line) for number, line in islice(lines, chunk_size)]
+            if not chunk:
+                return
+            yield chunk
+
+
+def _decode_line(number: int, line: str):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return MalformedRecord(f"Malformed JSON on line {number}: {str(e)}")
+
+
+def _decode_csv_cell(field: str, value):
+    if not isinstance(value, str):
+        return None if pd.isna(value) else value
+    value = value.strip()
+    if value[:1] in ('[', '{'):
+        return json.loads(value)
+    if field == 'data_sources':
+        return [item.strip() for item in value.split(';') if item.strip()]
+    return value
+
+
+def _read_csv(path: str, chunk_size: int, offset: int) -> Iterator[List[Dict]]:
+    # skiprows counts lines, which differ from records at blank lines and quoted
+    # newlines; skip parsed records instead
+    reader = pd.read_csv(
+        path,
+        chunksize=chunk_size,
+        dtype={field: str for field in NESTED_FIELDS}
+    )
+    for frame in reader:
+        if offset:
+            skipped = min(offset, len(frame))
+            frame = frame.iloc[skipped:]
+            offset -= skipped
+            if frame.empty:
+                continue
+        records = frame.to_dict('records')
+        for k, record in enumerate(records):
+            try:
+                for field in NESTED_FIELDS:
+                    if field in record:
+                        record[field] = _decode_csv_cell(field, record[field])
+            except ValueError as e:
+                records[k] = MalformedRecord(f"Malformed JSON in {field}: {str(e)}")
+        yield records
+
+
+def _read_parquet(path: str, chunk_size: int, offset: int) -> Iterator[List[Dict]]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Reading Parquet requires pyarrow (pip install pyarrow)")
+
+    parquet_file = pq.ParquetFile(path)
+    # Skip whole row groups before the offset without decoding them
+    row_groups = []
+    for index in range(parquet_file.num_row_groups):
+        rows = parquet_file.metadata.row_group(index).num_rows
+        if not row_groups and offset >= rows:
+            offset -= rows
+        else:
+            row_groups.append(index)
+    if not row_groups:
+        return
+
+    pending: List[Dict] = []
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, row_groups=row_groups):
+        records = batch.to_pylist()
+        if offset:
+            skipped = min(offset, len(records))
+            records = records[skipped:]
+            offset -= skipped
+        pending.extend(records)
+        while len(pending) >= chunk_size:
+            yield pending[:chunk_size]
+            pending = pending[chunk_size:]
+    if pending:
+        yield pending
+
+
+READERS = {
+    'ndjson': _read_ndjson,
+    'csv': _read_csv,
+    'parquet': _read_parquet,
+}
+
+
+def read_chunks(path: str, input_format: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                offset: int = 0) -> Iterator[List[Dict]]:
+    """
+    Stream project records from a registry export
+
+    Args:
+        path: NDJSON, CSV or Parquet file
+        input_format: One of READERS; inferred from the extension when omitted
+        chunk_size: Records per yielded chunk
+        offset: Number of leading records to skip
+
+    Yields:
+        Lists of up to chunk_size project dicts; records that cannot be
+        decoded are MalformedRecord placeholders, so one bad line does not
+        abort the run
+    """
+    return READERS[input_format or detect_format(path)](path, chunk_size, offset)
+
+
+# Engine owned by each worker process, created once by the pool initializer
+_worker_engine: Optional[ValidationEngine] = None
+_worker_evaluate_all = False
+
+
+def _init_worker(model_path: Optional[str], rules_path: Optional[str], evaluate_all: bool,
+                 overlap_index_path: Optional[str] = None):
+    global _worker_engine, _worker_evaluate_all
+    logging.getLogger().setLevel(logging.WARNING)
+    # Offline validation confirms nothing on chain, so the index is only ever queried
+    _worker_engine = ValidationEngine(
+        model_path=model_path,
+        rules_path=rules_path,
+        overlap_index=OverlapIndex(overlap_index_path) if overlap_index_path else None,
+        overlap_policy='reject' if overlap_index_path else 'off'
+    )
+    _worker_evaluate_all = evaluate_all
+
+
+def _result_line(project: Dict, result: Tuple[bool, str, Dict]) -> str:
+    is_valid, reason, details = result
+    token_id = project.get('tokenId') if isinstance(project, dict) else None
+    return json.dumps({
+        'tokenId': token_id,
+        'status': "VERIFIED" if is_valid else "REJECTED",
+        'reason': reason,
+        'validation_details': details,
+    }, default=str)
+
+
+def _validate_chunk(records: List[Dict]) -> Tuple[str, int]:
+    """Validate one chunk in a worker; returns (NDJSON text, number of valid records)"""
+    decoded = [record for record in records if not isinstance(record, MalformedRecord)]
+    validated = iter(_worker_engine.validate_batch(decoded, evaluate_all=_worker_evaluate_all) if decoded else [])
+    results = [(False, f"Validation error: {record.error}", {}) if isinstance(record, MalformedRecord)
+               else next(validated) for record in records]
+    lines = [_result_line(project, result) for project, result in zip(records, results)]
+    return "".join(line + "\n" for line in lines), sum(1 for result in results if result[0])
+
+
+def prepare_resume(output_path: str) -> int:
+    """
+    Count the complete result lines of an interrupted run
+
+    A partially written last line is truncated so appending continues cleanly.
+
+    Returns:
+        Number of records already validated after the run's offset
+    """
+    if not os.path.exists(output_path):
+        return 0
+    complete = 0
+    last_newline = 0
+    with open(output_path, 'rb') as f:
+        position = 0
+        while True:
+            block = f.read(1 << 20)
+            if not block:
+                break
+            complete += block.count(b"\n")
+            index = block.rfind(b"\n")
+            if index >= 0:
+                last_newline = position + index + 1
+            position += len(block)
+    if last_newline != os.path.getsize(output_path):
+        with open(output_path, 'r+b') as f:
+            f.truncate(last_newline)
+    return complete
+
+
+class ProgressReporter:
+    def __init__(self, stream: TextIO, interval: float = 5.0, start_offset: int = 0):
+        """Periodic records/sec reporting of a validation run"""
+        self.stream = stream
+        self.interval = interval
+        self.start_offset = start_offset
+        self.started = time.perf_counter()
+        self.next_report = self.started + interval
+        self.processed = 0
+        self.valid = 0
+
+    def update(self, processed: int, valid: int):
+        self.processed += processed
+        self.valid += valid
+        now = time.perf_counter()
+        if now >= self.next_report:
+            self.next_report = now + self.interval
+            self._report(now, "progress")
+
+    def finish(self):
+        self._report(time.perf_counter(), "done")
+
+    def _report(self, now: float, label: str):
+        elapsed = max(now - self.started, 1e-9)
+        print(f"{label}: {self.processed:,} records "
+              f"(offset {self.start_offset + self.processed:,}, {self.valid:,} valid) "
+              f"in {elapsed:.1f}s, {self.processed / elapsed:,.0f} records/sec",
+              file=self.stream, flush=True)
+
+
+def validate_file(input_path: str, output: TextIO, input_format: Optional[str] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1, offset: int = 0,
+                  model_path: Optional[str] = None, rules_path: Optional[str] = None,
+                  evaluate_all: bool = False, progress: Optional[ProgressReporter] = None,
+                  overlap_index_path: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Validate every record of an export and write NDJSON results in input order
+
+    At most two chunks per worker are in flight, so memory stays bounded by
+    chunk_size regardless of the input size. Overlap checks are off unless
+    overlap_index_path names a persisted index of verified footprints.
+
+    Returns:
+        Tuple of (records validated, records valid)
+    """
+    progress = progress or ProgressReporter(sys.stderr, start_offset=offset)
+    chunks = read_chunks(input_path, input_format, chunk_size, offset)
+
+    if workers <= 1:
+        _init_worker(model_path, rules_path, evaluate_all, overlap_index_path)
+        for records in chunks:
+            text, valid = _validate_chunk(records)
+            output.write(text)
+            output.flush()
+            progress.update(len(records), valid)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_path, rules_path, evaluate_all, overlap_index_path)) as pool:
+            in_flight = deque()
+            for records in chunks:
+                in_flight.append((len(records), pool.submit(_validate_chunk, records)))
+                if len(in_flight) >= 2 * workers:
+                    _write_completed(in_flight.popleft(), output, progress)
+            while in_flight:
+                _write_completed(in_flight.popleft(), output, progress)
+
+    progress.finish()
+    return progress.processed, progress.valid
+
+
+def _write_completed(entry, output: TextIO, progress: ProgressReporter):
+    count, future = entry
+    text, valid = future.result()
+    output.write(text)
+    output.flush()
+    progress.update(count, valid)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli", description="Carbon project validation tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    validate = subparsers.add_parser("validate", help="Validate a registry export offline")
+    validate.add_argument("input", help="NDJSON, CSV or Parquet file of projects")
+    validate.add_argument("-o", "--output", default="-", help="NDJSON results file (default: stdout)")
+    validate.add_argument("--format", choices=sorted(READERS), help="Input format (default: from extension)")
+    validate.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records per chunk")
+    validate.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    validate.add_argument("--offset", type=int, default=0, help="Skip this many input records")
+    validate.add_argument("--resume", action="store_true",
+                          help="Continue after the results already in --output; pass the interrupted run's --offset")
+    validate.add_argument("--evaluate-all", action="store_true", help="Report every rule violation")
+    validate.add_argument("--model-path", help="Anomaly model artifact (default: ANOMALY_MODEL_PATH)")
+    validate.add_argument("--rules-path", help="Ruleset file (default: VALIDATION_RULES_PATH)")
+    validate.add_argument("--overlap-index",
+                          help="Reject claims overlapping footprints in this verified-project index (default: no check)")
+    validate.add_argument("--progress-interval", type=float, default=5.0, help="Seconds between progress lines")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    offset = args.offset
+    if args.resume:
+        if args.output == "-":
+            raise SystemExit("--resume requires --output")
+        # The output holds results from the interrupted run's own --offset on
+        offset += prepare_resume(args.output)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "a" if args.resume else "w")
+    try:
+        validate_file(
+            args.input, output,
+            input_format=args.format,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            offset=offset,
+            model_path=args.model_path,
+            rules_path=args.rules_path,
+            evaluate_all=args.evaluate_all,
+            overlap_index_path=args.overlap_index,
+            progress=ProgressReporter(sys.stderr, args.progress_interval, offset)
+        )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Lazily constructed service singletons used by the API
+
+Nothing here is built at import time: each component, and the heavy modules
+behind it (sklearn, web3, eth_keys), is created on first access and
+configured from the environment. The API's lifespan starts the background
+workers on startup and closes whatever was built on shutdown. Workers that
+cannot start, such as the chain components without chain configuration,
+are reported by /ready while validation keeps serving.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+import logging
+import os
+import threading
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Started by Components.start, in this order; the IPFS spool does not depend on the chain
+BACKGROUND_WORKERS = ("ipfs_store", "verification_queue", "project_indexer")
+# Settings without which the Web3 bridge, and so the chain workers, cannot be built
+CHAIN_SETTINGS = ("ETHEREUM_RPC_URL", "PROJECT_NFT_CONTRACT_ADDRESS", "VALIDATOR_PRIVATE_KEY")
+
+
+class Components:
+    def __init__(self):
+        """Registry of lazily built, process-wide service instances"""
+        self._lock = threading.RLock()
+        self._instances: Dict[str, object] = {}
+        # Background workers that failed to start, with the reason
+        self.start_errors: Dict[str, str] = {}
+
+    def _get(self, name: str, factory: Callable[[], object]):
+        instance = self._instances.get(name)
+        if instance is None:
+            with self._lock:
+                instance = self._instances.get(name)
+                if instance is None:
+                    instance = factory()
+                    self._instances[name] = instance
+                    logger.info(f"Initialized {name}")
+        return instance
+
+    def is_built(self, name: str) -> bool:
+        return name in self._instances
+
+    @property
+    def validation_engine(self):
+        def build():
+            from engine.validation_engine import ValidationEngine
+            from engine.overlap_index import OverlapIndex
+            return ValidationEngine(
+                cache_size=int(os.getenv("VALIDATION_CACHE_SIZE", "1024")),
+                reservoir_size=int(os.getenv("MODEL_RESERVOIR_SIZE", "10000")),
+                keep_versions=int(os.getenv("MODEL_KEEP_VERSIONS", "10")),
+                overlap_index=OverlapIndex(),
+                overlap_policy=os.getenv("OVERLAP_POLICY", "reject"),
+                telemetry=self.telemetry_store
+            )
+        return self._get("validation_engine", build)
+
+    @property
+    def telemetry_store(self):
+        # Rolling per-project aggregates of streamed sensor readings; in memory, per worker process
+        def build():
+            from engine.telemetry import TelemetryStore
+            return TelemetryStore(
+                window_seconds=float(os.getenv("TELEMETRY_WINDOW_SECONDS", "86400")),
+                n_windows=int(os.getenv("TELEMETRY_WINDOWS", "30")),
+                max_projects=int(os.getenv("TELEMETRY_MAX_PROJECTS", "50000"))
+            )
+        return self._get("telemetry_store", build)
+
+    @property
+    def model_updater(self):
+        # Retrains the anomaly model from accepted projects (both triggers are off unless configured)
+        # and picks up model files written by other worker processes
+        def build():
+            from engine.model_updater import ModelUpdater
+            return ModelUpdater(
+                self.validation_engine,
+                interval=float(os.getenv("MODEL_RETRAIN_INTERVAL_SECONDS", "0")),
+                retrain_after=int(os.getenv("MODEL_RETRAIN_AFTER_SAMPLES", "0")),
+                reload_interval=float(os.getenv("MODEL_RELOAD_INTERVAL_SECONDS", "5"))
+            )
+        return self._get("model_updater", build)
+
+    @property
+    def result_store(self):
+        # Signed responses by tokenId and payload hash, so retried requests are answered from disk
+        def build():
+            from utils.result_store import ResultStore
+            return ResultStore()
+        return self._get("result_store", build)
+
+    @property
+    def request_coalescer(self):
+        # Identical requests in flight at the same time share one validation
+        def build():
+            from utils.result_store import RequestCoalescer
+            return RequestCoalescer()
+        return self._get("request_coalescer", build)
+
+    @property
+    def project_index(self):
+        def build():
+            from utils.indexer import ProjectIndex
+            return ProjectIndex()
+        return self._get("project_index", build)
+
+    @property
+    def web3_bridge(self):
+        def build():
+            missing = [name for name in CHAIN_SETTINGS if not os.getenv(name)]
+            if missing:
+                raise RuntimeError(f"Chain is not configured: set {', '.join(missing)}")
+            from utils.web3_bridge import Web3Bridge
+            return Web3Bridge(
+                rpc_url=os.getenv("ETHEREUM_RPC_URL"),
+                contract_address=os.getenv("PROJECT_NFT_CONTRACT_ADDRESS"),
+                private_key=os.getenv("VALIDATOR_PRIVATE_KEY"),
+                status_cache_ttl=float(os.getenv("STATUS_CACHE_TTL_SECONDS", "30")),
+                project_index=self.project_index
+            )
+        return self._get("web3_bridge", build)
+
+    @property
+    def project_indexer(self):
+        # Mirrors ProjectNFT events into the local index that answers status and listing queries
+        def build():
+            from utils.indexer import ProjectIndexer
+            return ProjectIndexer(
+                self.web3_bridge,
+                self.project_index,
+                start_block=int(os.getenv("PROJECT_NFT_DEPLOY_BLOCK", "0")),
+                chunk_size=int(os.getenv("INDEXER_CHUNK_SIZE", "2000")),
+                confirmations=int(os.getenv("INDEXER_CONFIRMATIONS", "0")),
+                poll_interval=float(os.getenv("INDEXER_POLL_SECONDS", "5"))
+            )
+        return self._get("project_indexer", build)
+
+    @property
+    def verification_queue(self):
+        # On-chain verifications are submitted in the background with locally managed nonces
+        def build():
+            from utils.tx_queue import VerificationQueue
+            return VerificationQueue(
+                self.web3_bridge,
+                max_in_flight=int(os.getenv("MAX_IN_FLIGHT_TRANSACTIONS", "64")),
+                gas_price_ttl=float(os.getenv("GAS_PRICE_TTL_SECONDS", "15")),
+                max_batch_size=int(os.getenv("MAX_VERIFY_BATCH_SIZE", "500")),
+                max_gas_per_tx=int(os.getenv("MAX_GAS_PER_TX", "5000000")),
+                on_confirmed=self._confirm_verified,
+                on_update=self._record_jobs
+            )
+        return self._get("verification_queue", build)
+
+    def _record_jobs(self, jobs):
+        # Workers sharing the result store see each other's jobs, so a retry elsewhere finds them
+        self.result_store.put_jobs([job.to_dict() for job in jobs])
+
+    def _confirm_verified(self, project_ids):
+        # Footprints of accepted projects start blocking overlapping claims once verified on chain
+        if self.is_built("validation_engine"):
+            self.validation_engine.confirm_verified(project_ids)
+
+    @property
+    def validation_signer(self):
+        # Key is loaded once; batches are signed with one signature over a Merkle root by default
+        def build():
+            from utils.signature_utils import ValidationSigner
+            return ValidationSigner(workers=int(os.getenv("SIGNING_WORKERS", "0")))
+        return self._get("validation_signer", build)
+
+    @property
+    def ipfs_client(self):
+        # Connections are pooled and opened on first use
+        def build():
+            from utils.ipfs_client import AsyncIPFSClient
+            return AsyncIPFSClient(os.getenv("IPFS_API_URL", "/ip4/127.0.0.1/tcp/5001"))
+        return self._get("ipfs_client", build)
+
+    @property
+    def ipfs_store(self):
+        # Results are addressed locally and uploaded to IPFS in batches from an on-disk spool
+        def build():
+            from utils.ipfs_store import IPFSWriteBehindStore
+            return IPFSWriteBehindStore(
+                self.ipfs_client,
+                batch_size=int(os.getenv("IPFS_FLUSH_BATCH_SIZE", "256")),
+                flush_interval=float(os.getenv("IPFS_FLUSH_INTERVAL_SECONDS", "1"))
+            )
+        return self._get("ipfs_store", build)
+
+    @property
+    def admission(self):
+        # Stage concurrency limits, priority queues and per-client rate limits of the validation endpoints
+        def build():
+            from utils.admission import AdmissionController
+            return AdmissionController(
+                cpu_concurrency=int(os.getenv("ADMISSION_CPU_CONCURRENCY",
+                                              os.getenv("CPU_WORKERS", str(os.cpu_count() or 4)))),
+                io_concurrency=int(os.getenv("ADMISSION_IO_CONCURRENCY", "64")),
+                max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "256")),
+                client_rate=float(os.getenv("CLIENT_RATE_LIMIT", "0")),
+                client_burst=float(os.getenv("CLIENT_RATE_BURST", "100"))
+            )
+        return self._get("admission", build)
+
+    @property
+    def cpu_executor(self) -> ThreadPoolExecutor:
+        # Bounded pool for CPU-bound work (rule/ML validation, signing) so it never blocks the event loop
+        def build():
+            return ThreadPoolExecutor(
+                max_workers=int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 4))),
+                thread_name_prefix="validation-cpu"
+            )
+        return self._get("cpu_executor", build)
+
+    async def start(self):
+        """Start the background workers, building what they depend on; failures are recorded in start_errors"""
+        self.start_errors = {}
+        for name in BACKGROUND_WORKERS:
+            try:
+                await getattr(self, name).start()
+            except Exception as e:
+                logger.error(f"Could not start {name}: {str(e)}")
+                self.start_errors[name] = str(e)
+
+    async def close(self):
+        """Stop workers and release resources of every component that was built; resets the registry"""
+        with self._lock:
+            instances, self._instances = self._instances, {}
+        self.start_errors = {}
+        if "model_updater" in instances:
+            instances["model_updater"].stop()
+        if "verification_queue" in instances:
+            await instances["verification_queue"].stop()
+        if "project_indexer" in instances:
+            await instances["project_indexer"].stop()
+        if "project_index" in instances:
+            instances["project_index"].close()
+        if "ipfs_store" in instances:
+            await instances["ipfs_store"].stop()
+        if "ipfs_client" in instances:
+            await instances["ipfs_client"].close()
+        if "validation_engine" in instances:
+            instances["validation_engine"].overlap_index.close()
+        if "result_store" in instances:
+            instances["result_store"].close()
+        if "validation_signer" in instances:
+            instances["validation_signer"].close()
+        if "cpu_executor" in instances:
+            instances["cpu_executor"].shutdown(wait=False)
@@ -0,0 +1,276 @@
+"""
+Fixed-schema feature extraction for the anomaly model
+
+Every project maps to exactly N_FEATURES values in FEATURE_NAMES order.
+Optional inputs (location, area, telemetry, project type) that are missing or malformed
+become 0 together with an indicator column, so heterogeneous payloads never
+change the vector length. Features are computed column-wise over NumPy
+arrays; a single project is a batch of one, so both paths agree exactly.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import threading
+
+import numpy as np
+
+# Normalization constants. These are part of the model's feature schema,
+# so they stay fixed when the (hot-reloadable) rule thresholds change.
+MAX_EMISSION_REDUCTION = 1000000  # 1 million tons
+MAX_PROJECT_DURATION_DAYS = 3650  # 10 years
+MAX_DATA_SOURCES = 5
+MAX_DENSITY_NEIGHBOURS = 1000
+MAX_TELEMETRY_RATE_LOG = 2  # measured vs claimed daily reduction, clipped to 1/100x..100x
+MAX_TELEMETRY_CV = 5
+
+# One-hot columns; any other or missing project type falls into 'other'
+PROJECT_TYPES = ('reforestation', 'renewable_energy', 'methane_capture', 'cookstoves', 'blue_carbon', 'other')
+
+FEATURE_NAMES = [
+    'emission_reduction',
+    'duration_days',
+    'data_source_count',
+    'latitude',
+    'longitude',
+    'has_location',
+    'spatial_density',
+    'reduction_per_day',
+    'reduction_per_hectare',
+    'has_area',
+    'has_telemetry',
+    'telemetry_rate_ratio',
+    'telemetry_cv',
+] + [f'project_type_{project_type}' for project_type in PROJECT_TYPES]
+N_FEATURES = len(FEATURE_NAMES)
+
+# Bumped whenever FEATURE_NAMES or a normalization changes; artifacts of another schema are not served
+FEATURE_SCHEMA_VERSION = 3
+
+DEFAULT_CELL_SIZE_DEGREES = 0.05  # about 5.5 km at the equator
+_LOG_MAX_REDUCTION = math.log1p(MAX_EMISSION_REDUCTION)
+_LOG_MAX_NEIGHBOURS = math.log1p(MAX_DENSITY_NEIGHBOURS)
+_TYPE_INDEX = {project_type: i for i, project_type in enumerate(PROJECT_TYPES)}
+_TYPE_OFFSET = FEATURE_NAMES.index(f'project_type_{PROJECT_TYPES[0]}')
+
+
+def _as_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def parse_location(location) -> Tuple[float, float]:
+    """(latitude, longitude) of a location payload; NaN when missing or out of range"""
+    if not isinstance(location, dict):
+        return math.nan, math.nan
+    latitude = _as_float(location.get('latitude'))
+    longitude = _as_float(location.get('longitude'))
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return math.nan, math.nan
+    return latitude, longitude
+
+
+def parse_area(additional_data) -> float:
+    """Project area in hectares from additional_data.area_hectares; NaN when missing or not positive"""
+    if not isinstance(additional_data, dict):
+        return math.nan
+    area = _as_float(additional_data.get('area_hectares'))
+    return area if area > 0 else math.nan
+
+
+class SpatialGrid:
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE_DEGREES):
+        """
+        Counts of project locations per lat/lon grid cell
+
+        Density is the number of indexed projects in a location's cell and its
+        eight neighbours. Many claims landing on the same few cells is the
+        signature of duplicated projects. version changes with every update,
+        so results computed from the density can be keyed on it.
+
+        Args:
+            cell_size: Cell edge in degrees
+        """
+        self.cell_size = cell_size
+        self._columns = int(math.ceil(360 / cell_size)) + 2
+        self._counts: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        # Sorted snapshot of _counts for vectorized lookups; rebuilt lazily after adds
+        self._keys = np.empty(0, dtype=np.int64)
+        self._values = np.empty(0, dtype=np.int64)
+        self._dirty = False
+        self.version = 0
+
+    def __len__(self) -> int:
+        return sum(self._counts.values())
+
+    def _cells(self, latitude: np.ndarray, longitude: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        rows = np.floor((latitude + 90) / self.cell_size).astype(np.int64)
+        columns = np.floor((longitude + 180) / self.cell_size).astype(np.int64) + 1
+        return rows, columns
+
+    def add_many(self, latitude: np.ndarray, longitude: np.ndarray, count: int = 1):
+        """Index locations, or remove them with count=-1; rows with NaN coordinates are ignored"""
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        known = ~(np.isnan(latitude) | np.isnan(longitude))
+        if not known.any():
+            return
+        rows, columns = self._cells(latitude[known], longitude[known])
+        keys, counts = np.unique(rows * self._columns + columns, return_counts=True)
+        with self._lock:
+            for key, n in zip(keys.tolist(), counts.tolist()):
+                total = self._counts.get(key, 0) + n * count
+                if total > 0:
+                    self._counts[key] = total
+                else:
+                    self._counts.pop(key, None)
+            self._dirty = True
+            self.version += 1
+
+    def add(self, latitude: float, longitude: float):
+        self.add_many(np.array([latitude]), np.array([longitude]))
+
+    def density(self, latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+        """Indexed projects in each location's 3x3 cell neighbourhood; 0 for NaN coordinates"""
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        result = np.zeros(len(latitude), dtype=np.int64)
+        known = ~(np.isnan(latitude) | np.isnan(longitude))
+        if not known.any() or not self._counts:
+            return result
+        rows, columns = self._cells(latitude[known], longitude[known])
+        centre = rows * self._columns + columns
+        offsets = [dr * self._columns + dc for dr in (-1, 0, 1) for dc in (-1, 0, 1)]
+
+        if len(centre) < 64:
+            # Few rows: nine dict lookups each beat rebuilding the sorted snapshot
+            counts = self._counts
+            result[known] = [sum(counts.get(key + offset, 0) for offset in offsets) for key in centre.tolist()]
+            return result
+
+        keys, values = self._snapshot()
+        total = np.zeros(len(centre), dtype=np.int64)
+        for offset in offsets:
+            wanted = centre + offset
+            position = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+            total += np.where(keys[position] == wanted, values[position], 0)
+        result[known] = total
+        return result
+
+    def _snapshot(self) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            if self._dirty:
+                items = sorted(self._counts.items())
+                self._keys = np.fromiter((key for key, _ in items), dtype=np.int64, count=len(items))
+                self._values = np.fromiter((value for _, value in items), dtype=np.int64, count=len(items))
+                self._dirty = False
+            return self._keys, self._values
+
+
+def build_features(reduction: np.ndarray, duration_days: np.ndarray, source_count: np.ndarray,
+                   latitude: np.ndarray, longitude: np.ndarray, area_hectares: np.ndarray,
+                   project_types: Sequence[Optional[str]], density: np.ndarray,
+                   measured_per_day: Optional[np.ndarray] = None,
+                   reading_cv: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Assemble the (n, N_FEATURES) feature matrix from raw columns
+
+    Args:
+        reduction: Estimated emission reduction in tons
+        duration_days: Project duration in days
+        source_count: Number of data sources
+        latitude: Degrees, NaN when unknown
+        longitude: Degrees, NaN when unknown
+        area_hectares: Project area, NaN when unknown
+        project_types: Project type per row, None when unknown
+        density: Indexed projects near each location
+        measured_per_day: Daily reduction measured by telemetry, NaN (or
+            omitted) when the project has no telemetry
+        reading_cv: Coefficient of variation of the telemetry readings
+
+    Returns:
+        float64 feature matrix in FEATURE_NAMES order
+    """
+    n = len(reduction)
+    reduction = np.asarray(reduction, dtype=np.float64)
+    duration_days = np.asarray(duration_days, dtype=np.float64)
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    area_hectares = np.asarray(area_hectares, dtype=np.float64)
+
+    has_location = ~(np.isnan(latitude) | np.isnan(longitude))
+    has_area = ~np.isnan(area_hectares)
+    positive_reduction = np.maximum(reduction, 0)
+
+    features = np.zeros((n, N_FEATURES), dtype=np.float64)
+    features[:, 0] = reduction / MAX_EMISSION_REDUCTION
+    features[:, 1] = duration_days / MAX_PROJECT_DURATION_DAYS
+    features[:, 2] = np.asarray(source_count, dtype=np.float64) / MAX_DATA_SOURCES
+    features[:, 3] = np.where(has_location, latitude / 90, 0)
+    features[:, 4] = np.where(has_location, longitude / 180, 0)
+    features[:, 5] = has_location
+    features[:, 6] = np.minimum(np.log1p(np.asarray(density, dtype=np.float64)) / _LOG_MAX_NEIGHBOURS, 1)
+    features[:, 7] = np.log1p(positive_reduction / np.maximum(duration_days, 1)) / _LOG_MAX_REDUCTION
+    per_hectare = positive_reduction / np.where(has_area, area_hectares, 1)
+    features[:, 8] = np.where(has_area, np.log1p(per_hectare) / _LOG_MAX_REDUCTION, 0)
+    features[:, 9] = has_area
+    if measured_per_day is not None:
+        measured_per_day = np.asarray(measured_per_day, dtype=np.float64)
+        has_telemetry = ~np.isnan(measured_per_day)
+        claimed_per_day = positive_reduction / np.maximum(duration_days, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rate_log = np.log10(np.maximum(measured_per_day, 0) / claimed_per_day)
+        features[:, 10] = has_telemetry
+        features[:, 11] = np.where(has_telemetry, np.clip(np.nan_to_num(rate_log, nan=0.0), -MAX_TELEMETRY_RATE_LOG,
+                                                          MAX_TELEMETRY_RATE_LOG) / MAX_TELEMETRY_RATE_LOG, 0)
+        reading_cv = np.asarray(reading_cv, dtype=np.float64)
+        features[:, 12] = np.where(has_telemetry, np.minimum(np.nan_to_num(reading_cv, nan=0.0), MAX_TELEMETRY_CV)
+                                   / MAX_TELEMETRY_CV, 0)
+    type_columns = np.fromiter((_TYPE_INDEX.get(t, _TYPE_INDEX['other']) for t in project_types),
+                               dtype=np.int64, count=n)
+    features[np.arange(n), _TYPE_OFFSET + type_columns] = 1
+    return features
+
+
+def bootstrap_columns(n_samples: int, seed: int = 42) -> Dict[str, np.ndarray]:
+    """
+    Raw columns of a synthetic reference corpus within the feature schema's ranges
+
+    Used only until a model has been trained on real projects.
+    """
+    rng = np.random.default_rng(seed)
+    reduction = np.clip(rng.lognormal(mean=np.log(5000), sigma=1.0, size=n_samples), 0, MAX_EMISSION_REDUCTION)
+    has_location = rng.random(n_samples) < 0.95
+    has_area = rng.random(n_samples) < 0.5
+    duration_days = rng.integers(30, MAX_PROJECT_DURATION_DAYS + 1, size=n_samples)
+    # Monitored projects whose sensors roughly confirm the claimed rate
+    has_telemetry = rng.random(n_samples) < 0.4
+    measured_per_day = reduction / duration_days * rng.lognormal(0, 0.3, n_samples)
+    return {
+        'reduction': reduction,
+        'duration_days': duration_days,
+        'source_count': rng.integers(2, MAX_DATA_SOURCES + 1, size=n_samples),
+        'latitude': np.where(has_location, rng.uniform(-60, 70, n_samples), np.nan),
+        'longitude': np.where(has_location, rng.uniform(-180, 180, n_samples), np.nan),
+        # Typical sequestration of 1-100 t/ha over the project's life
+        'area_hectares': np.where(has_area, reduction / rng.lognormal(np.log(10), 1.0, n_samples), np.nan),
+        'project_types': rng.choice(PROJECT_TYPES, n_samples).tolist(),
+        'density': rng.poisson(0.5, n_samples),
+        'measured_per_day': np.where(has_telemetry, measured_per_day, np.nan),
+        'reading_cv': np.where(has_telemetry, rng.uniform(0.05, 0.8, n_samples), np.nan),
+    }
+
+
+def project_columns(projects: List) -> Dict[str, np.ndarray]:
+    """Raw feature columns of parsed projects"""
+    n = len(projects)
+    return {
+        'reduction': np.fromiter((p.emission_reduction for p in projects), dtype=np.float64, count=n),
+        'duration_days': np.fromiter((p.duration_days for p in projects), dtype=np.float64, count=n),
+        'source_count': np.fromiter((p.data_source_count for p in projects), dtype=np.float64, count=n),
+        'latitude': np.fromiter((p.latitude for p in projects), dtype=np.float64, count=n),
+        'longitude': np.fromiter((p.longitude for p in projects), dtype=np.float64, count=n),
+        'area_hectares': np.fromiter((p.area_hectares for p in projects), dtype=np.float64, count=n),
+        'project_types': [p.project_type for p in projects],
+    }
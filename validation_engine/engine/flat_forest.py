@@ -0,0 +1,150 @@
+"""
+Isolation forest scoring over flat, memory-mappable tree arrays
+
+A fitted sklearn IsolationForest keeps each tree in a Cython object whose
+node storage is copied into private memory when it is unpickled, so every
+worker process holds its own copy. FlatIsolationForest stores all trees as
+a handful of plain NumPy arrays instead; loaded with joblib's mmap_mode they
+stay backed by the artifact file and every worker shares one copy through
+the page cache. Scoring needs only NumPy, so serving never imports sklearn.
+"""
+from typing import Dict
+
+import numpy as np
+
+# Rows scored per chunk; keeps the (rows, trees) index arrays cache-sized for large batches
+CHUNK_ROWS = 512
+
+
+def average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """Average path length of an unsuccessful BST search among n samples, as in the isolation forest paper"""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n_samples)
+    result[n_samples == 2] = 1.0
+    large = n_samples > 2
+    result[large] = 2.0 * (np.log(n_samples[large] - 1.0) + np.euler_gamma) - 2.0 * (n_samples[large] - 1.0) / n_samples[large]
+    return result
+
+
+class FlatIsolationForest:
+    def __init__(self, children: np.ndarray, feature: np.ndarray, threshold: np.ndarray,
+                 leaf_depth: np.ndarray, roots: np.ndarray, max_depth: int, max_samples: int,
+                 offset: float, n_features: int):
+        """
+        Isolation forest as concatenated node arrays
+
+        Nodes of all trees share one index space. A leaf points to itself
+        on both sides, so every row can take exactly max_depth steps without
+        branching on whether it already reached a leaf.
+
+        Args:
+            children: Next node of node i at 2 * i + 1 when the feature value
+                is <= threshold, at 2 * i otherwise
+            feature: Input column tested at each node
+            threshold: Split value at each node
+            leaf_depth: Path length credited at each leaf, including the
+                average path length of the samples left unsplit in it
+            roots: Root node of each tree
+            max_depth: Deepest leaf, in edges
+            max_samples: Samples each tree was fitted on
+            offset: Subtracted from score_samples, so 0 separates inliers from outliers
+            n_features: Number of input columns
+        """
+        self.children = children
+        self.feature = feature
+        self.threshold = threshold
+        self.leaf_depth = leaf_depth
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.max_samples = int(max_samples)
+        self.offset_ = float(offset)
+        self.n_features_in_ = int(n_features)
+
+    @classmethod
+    def from_sklearn(cls, model) -> 'FlatIsolationForest':
+        """Flatten a fitted sklearn IsolationForest; scores agree with model.decision_function"""
+        children, features, thresholds, leaf_depths, roots = [], [], [], [], []
+        start = 0
+        max_depth = 0
+        for estimator, columns in zip(model.estimators_, model.estimators_features_):
+            tree = estimator.tree_
+            n = tree.node_count
+            left = tree.children_left.astype(np.int64)
+            right = tree.children_right.astype(np.int64)
+            is_leaf = left == -1
+
+            # Children always follow their parent, so one pass in node order sets every depth
+            depth = np.zeros(n, dtype=np.int64)
+            for node in np.flatnonzero(~is_leaf):
+                depth[left[node]] = depth[right[node]] = depth[node] + 1
+            max_depth = max(max_depth, int(depth.max()))
+
+            own = np.arange(n, dtype=np.int64)
+            children.append(np.stack([np.where(is_leaf, own, right), np.where(is_leaf, own, left)], axis=1) + start)
+            features.append(np.where(is_leaf, 0, np.asarray(columns)[np.maximum(tree.feature, 0)]))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            leaf_depths.append(np.where(is_leaf, depth + average_path_length(tree.n_node_samples), 0.0))
+            roots.append(start)
+            start += n
+
+        return cls(
+            children=np.concatenate(children).ravel().astype(np.int32),
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            leaf_depth=np.concatenate(leaf_depths).astype(np.float64),
+            roots=np.array(roots, dtype=np.int32),
+            max_depth=max_depth,
+            max_samples=model.max_samples_,
+            offset=model.offset_,
+            n_features=model.n_features_in_,
+        )
+
+    def __getstate__(self) -> Dict:
+        return dict(self.__dict__)
+
+    def __setstate__(self, state: Dict):
+        # Plain ndarray views over joblib's memmaps: still file-backed, without np.memmap's per-operation overhead
+        self.__dict__.update({key: np.asarray(value) if isinstance(value, np.ndarray) else value
+                              for key, value in state.items()})
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes
+                   for name in ('children', 'feature', 'threshold', 'leaf_depth', 'roots'))
+
+    def _path_lengths(self, X: np.ndarray) -> np.ndarray:
+        """Summed path length over all trees for each row"""
+        n_rows, n_features = X.shape
+        values = X.ravel()
+        row_start = (np.arange(n_rows, dtype=np.int32) * n_features)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            goes_left = values[row_start + self.feature[node]] <= self.threshold[node]
+            node = self.children[2 * node + goes_left]
+        return self.leaf_depth[node].sum(axis=1)
+
+    def score_samples(self, X) -> np.ndarray:
+        """Opposite of the anomaly score of the isolation forest paper; lower is more abnormal"""
+        # Trees split on float32 values, as sklearn's do
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, but the model expects {self.n_features_in_}")
+        depths = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), CHUNK_ROWS):
+            depths[start:start + CHUNK_ROWS] = self._path_lengths(X[start:start + CHUNK_ROWS])
+        denominator = self.n_trees * float(average_path_length(np.array([self.max_samples]))[0])
+        if denominator == 0:
+            return -np.ones(len(X))
+        return -(2 ** (-depths / denominator))
+
+    def decision_function(self, X) -> np.ndarray:
+        """Shifted scores: negative for outliers, non-negative for inliers"""
+        return self.score_samples(X) - self.offset_
+
+    def predict(self, X) -> np.ndarray:
+        """1 for inliers, -1 for outliers"""
+        return np.where(self.decision_function(X) < 0, -1, 1)
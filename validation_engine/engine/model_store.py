@@ -0,0 +1,170 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+import hashlib
+import logging
+import os
+import tempfile
+
+import joblib
+import numpy as np
+
+from engine.flat_forest import FlatIsolationForest
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 2: the model is a FlatIsolationForest, whose arrays can be memory-mapped. 1: a pickled sklearn IsolationForest
+ARTIFACT_FORMAT_VERSION = 2
+SUPPORTED_FORMAT_VERSIONS = (1, 2)
+DEFAULT_MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'anomaly_model.joblib')
+
+
+@dataclass
+class ModelArtifact:
+    """A fitted anomaly model together with the metadata needed to serve it"""
+    model: object
+    version: str
+    trained_at: str
+    n_samples: int
+    n_features: int
+    metadata: Dict = field(default_factory=dict)
+
+
+def make_model_version(features: np.ndarray) -> str:
+    """Build a sortable version string tied to the training corpus content"""
+    digest = hashlib.sha256(np.ascontiguousarray(features, dtype=np.float64).tobytes()).hexdigest()
+    return f"{datetime.utcnow().strftime('%Y%m%d%H%M%S')}-{digest[:8]}"
+
+
+def save_model_artifact(artifact: ModelArtifact, path: str, overwrite: bool = True) -> bool:
+    """
+    Persist a model artifact to disk
+
+    The artifact is written to a temporary file in the target directory and
+    moved into place with os.replace, so readers never observe a partial file,
+    and processes that mapped the previous file keep reading it until they
+    reload. The file is uncompressed so its arrays can be memory-mapped.
+
+    Args:
+        artifact: Model artifact to persist
+        path: Destination file path
+        overwrite: Replace an existing file; otherwise keep it, so among
+            processes racing to create the file exactly one wins
+
+    Returns:
+        Whether the artifact was written
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    payload = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'model': artifact.model,
+        'version': artifact.version,
+        'trained_at': artifact.trained_at,
+        'n_samples': artifact.n_samples,
+        'n_features': artifact.n_features,
+        'metadata': artifact.metadata,
+    }
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            joblib.dump(payload, f)
+        if overwrite:
+            os.replace(tmp_path, path)
+        else:
+            # link() fails if path exists, which makes create-if-absent atomic
+            try:
+                os.link(tmp_path, path)
+            except FileExistsError:
+                return False
+            finally:
+                os.remove(tmp_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    logger.info(f"Saved anomaly model {artifact.version} to {path}")
+    return True
+
+
+def load_model_artifact(path: str, mmap_mode: Optional[str] = None) -> Optional[ModelArtifact]:
+    """
+    Load a model artifact from disk
+
+    Args:
+        path: Artifact file path
+        mmap_mode: 'r' maps the model's arrays read-only from the file instead
+            of copying them, so processes serving the same file share its pages
+
+    Returns:
+        The loaded artifact, or None if no artifact exists at path
+    """
+    if not os.path.exists(path):
+        return None
+
+    payload = joblib.load(path, mmap_mode=mmap_mode)
+    if payload.get('format_version') not in SUPPORTED_FORMAT_VERSIONS:
+        raise ValueError(f"Unsupported model artifact format: {payload.get('format_version')}")
+
+    model = payload['model']
+    if not isinstance(model, FlatIsolationForest):
+        model = FlatIsolationForest.from_sklearn(model)
+
+    return ModelArtifact(
+        model=model,
+        version=payload['version'],
+        trained_at=payload['trained_at'],
+        n_samples=payload['n_samples'],
+        n_features=payload['n_features'],
+        metadata=payload.get('metadata', {}),
+    )
+
+
+class ModelHistory:
+    def __init__(self, directory: str, keep: int = 10):
+        """
+        Versioned archive of served model artifacts, used for rollback
+
+        Each artifact is stored as <version>.joblib in directory; the oldest
+        versions beyond keep are pruned.
+
+        Args:
+            directory: Directory holding archived artifacts
+            keep: Number of versions to retain
+        """
+        self.directory = directory
+        self.keep = keep
+
+    def _path(self, version: str) -> str:
+        return os.path.join(self.directory, f"{version}.joblib")
+
+    def versions(self) -> List[str]:
+        """Archived versions, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.joblib'):
+                entries.append((os.stat(os.path.join(self.directory, name)).st_mtime_ns, name[:-len('.joblib')]))
+        return [version for _, version in sorted(entries)]
+
+    def __contains__(self, version: str) -> bool:
+        return os.path.exists(self._path(version))
+
+    def save(self, artifact: ModelArtifact, protect: Optional[str] = None):
+        """Archive an artifact and prune old versions, never removing artifact or protect"""
+        save_model_artifact(artifact, self._path(artifact.version))
+        versions = self.versions()
+        for version in versions[:max(len(versions) - self.keep, 0)]:
+            if version not in (artifact.version, protect):
+                os.remove(self._path(version))
+
+    def load(self, version: str) -> ModelArtifact:
+        artifact = load_model_artifact(self._path(version))
+        if artifact is None:
+            raise KeyError(f"Unknown model version: {version}")
+        return artifact
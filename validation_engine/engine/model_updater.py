@@ -0,0 +1,107 @@
+from typing import Dict, Optional
+import logging
+import threading
+import time
+
+from engine.validation_engine import MIN_RETRAIN_SAMPLES, ValidationEngine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ModelUpdater:
+    def __init__(self, engine: ValidationEngine, interval: float = 0, retrain_after: int = 0,
+                 min_samples: int = MIN_RETRAIN_SAMPLES, poll_interval: float = 1.0, reload_interval: float = 0):
+        """
+        Background thread retraining the engine's anomaly model from its reservoir
+
+        A retrain runs when interval seconds have passed since the last one and
+        new projects were accepted meanwhile, or as soon as retrain_after new
+        projects were accepted. Either trigger is disabled by 0. With
+        reload_interval, the thread also follows the shared model file, so a
+        model fitted or rolled back by another worker process is served here.
+
+        Args:
+            engine: Validation engine whose model is maintained
+            interval: Seconds between scheduled retrains
+            retrain_after: Number of newly accepted projects that triggers a retrain
+            min_samples: Minimum reservoir size before the first retrain
+            poll_interval: Seconds between trigger checks
+            reload_interval: Seconds between checks of the model file; 0 disables them
+        """
+        self.engine = engine
+        self.interval = interval
+        self.retrain_after = retrain_after
+        self.min_samples = min_samples
+        self.poll_interval = poll_interval
+        self.reload_interval = reload_interval
+        self.retrains = 0
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0 or self.retrain_after > 0
+
+    def start(self):
+        if not self.enabled and self.reload_interval <= 0:
+            logger.info("Online model updates disabled")
+            return
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="model-updater", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _due(self, new_samples: int, elapsed: float) -> bool:
+        if self.retrain_after > 0 and new_samples >= self.retrain_after:
+            return True
+        return self.interval > 0 and elapsed >= self.interval and new_samples > 0
+
+    def _run(self):
+        last_seen = self.engine.reservoir.seen
+        last_retrain = last_reload = time.monotonic()
+        while not self._stop.wait(self.poll_interval):
+            if self.reload_interval > 0 and time.monotonic() - last_reload >= self.reload_interval:
+                self._reload()
+                last_reload = time.monotonic()
+            seen = self.engine.reservoir.seen
+            if not self._due(seen - last_seen, time.monotonic() - last_retrain):
+                continue
+            try:
+                version = self.engine.retrain(self.min_samples)
+                if version is not None:
+                    self.retrains += 1
+                    logger.info(f"Retrained anomaly model {version} on {seen} accepted projects")
+                self.last_error = None
+            except Exception as e:
+                logger.error(f"Model retrain error: {str(e)}")
+                self.last_error = str(e)
+            last_seen = seen
+            last_retrain = time.monotonic()
+
+    def _reload(self):
+        try:
+            if self.engine.reload_model():
+                self.reloads += 1
+        except Exception as e:
+            logger.error(f"Model reload error: {str(e)}")
+            self.last_error = str(e)
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "interval": self.interval,
+            "retrainAfter": self.retrain_after,
+            "retrains": self.retrains,
+            "reloadInterval": self.reload_interval,
+            "reloads": self.reloads,
+            "lastError": self.last_error,
+        }
@@ -0,0 +1,373 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_OVERLAP_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'overlap_index.db')
+DEFAULT_CELL_SIZE_DEGREES = 0.01  # about 1.1 km at the equator
+DEFAULT_RADIUS_METERS = 100.0  # footprint of a project that does not state its area
+EARTH_RADIUS_METERS = 6371008.8
+METERS_PER_DEGREE = 111320.0
+# Footprints spanning more cells than this are kept in a short list checked by every query
+MAX_CELLS_PER_FOOTPRINT = 1024
+# Footprints of accepted projects wait this long for their on-chain confirmation
+DEFAULT_PENDING_TTL_SECONDS = 7 * 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS footprints (
+    token_id INTEGER PRIMARY KEY,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    radius_m REAL NOT NULL,
+    start_day REAL NOT NULL,
+    end_day REAL NOT NULL
+);
+-- Every write to footprints, so other processes sharing the file can catch up
+CREATE TABLE IF NOT EXISTS footprint_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    token_id INTEGER NOT NULL
+);
+-- Footprints of accepted projects awaiting on-chain confirmation
+CREATE TABLE IF NOT EXISTS pending_footprints (
+    token_id INTEGER PRIMARY KEY,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    radius_m REAL NOT NULL,
+    start_day REAL NOT NULL,
+    end_day REAL NOT NULL,
+    held_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pending_held_at ON pending_footprints (held_at);
+"""
+UPSERT_SQL = "INSERT OR REPLACE INTO footprints VALUES (?, ?, ?, ?, ?, ?)"
+HOLD_SQL = "INSERT OR REPLACE INTO pending_footprints VALUES (?, ?, ?, ?, ?, ?, ?)"
+CHANGE_SQL = "INSERT INTO footprint_changes (token_id) VALUES (?)"
+
+Footprint = Tuple[int, float, float, float, float, float]
+# (footprint now indexed or None if removed, footprint it replaced or None)
+FootprintChange = Tuple[Optional[Footprint], Optional[Footprint]]
+
+
+def footprint_radius(area_hectares: float, default_radius: float = DEFAULT_RADIUS_METERS) -> float:
+    """Radius in meters of a circle with the given area; default_radius when the area is unknown"""
+    if area_hectares is None or math.isnan(area_hectares) or area_hectares <= 0:
+        return default_radius
+    return math.sqrt(area_hectares * 10000 / math.pi)
+
+
+def epoch_days(moment: datetime) -> float:
+    """Days since the Unix epoch; naive datetimes are taken as UTC"""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp() / 86400
+
+
+class OverlapIndex:
+    def __init__(self, path: Optional[str] = None, cell_size: float = DEFAULT_CELL_SIZE_DEGREES,
+                 pending_ttl: float = DEFAULT_PENDING_TTL_SECONDS):
+        """
+        Spatial-temporal index of verified project footprints
+
+        A footprint is a circle around the project location, sized from
+        additional_data.area_hectares, active between its start and end dates.
+        Footprints are bucketed in a lat/lon grid of every cell their bounding
+        box touches; a query gathers the rows of the cells its own bounding box
+        touches and tests distance and date overlap on them with NumPy. Rows
+        live in growable column arrays and are written through to SQLite, from
+        which the index is rebuilt at startup; refresh() applies what other
+        processes sharing the file wrote since. Footprints awaiting
+        confirmation are held in SQLite too, so any process can confirm them.
+
+        Args:
+            path: Database file. Defaults to the OVERLAP_INDEX_PATH environment
+                variable or data/overlap_index.db; ":memory:" keeps it in memory
+            cell_size: Grid cell edge in degrees
+            pending_ttl: Seconds a held footprint waits for confirmation
+        """
+        self.path = path or os.getenv("OVERLAP_INDEX_PATH", DEFAULT_OVERLAP_INDEX_PATH)
+        self.cell_size = cell_size
+        self.pending_ttl = pending_ttl
+        self._columns = int(math.ceil(360 / cell_size)) + 1
+        self._lock = threading.RLock()
+        self._cells: Dict[int, List[int]] = {}
+        self._large: List[int] = []
+        self._row_of: Dict[int, int] = {}
+        self._size = 0
+        self._capacity = 0
+        self._token_ids = self._latitude = self._longitude = None
+        self._radius = self._start = self._end = self._alive = None
+        self._grow(1024)
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def _load(self):
+        # Changes committed while loading are replayed by the next refresh; re-applying one is a no-op
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._seen_seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM footprint_changes").fetchone()[0]
+        cursor = self._conn.execute("SELECT * FROM footprints")
+        while True:
+            rows = cursor.fetchmany(100000)
+            if not rows:
+                break
+            for row in rows:
+                self._insert(row)
+        if self._row_of:
+            logger.info(f"Loaded {len(self._row_of)} project footprints from {self.path}")
+
+    def _grow(self, capacity: int):
+        def grown(array, dtype):
+            new = np.zeros(capacity, dtype=dtype)
+            if array is not None:
+                new[:self._size] = array[:self._size]
+            return new
+        self._token_ids = grown(self._token_ids, np.int64)
+        self._latitude = grown(self._latitude, np.float64)
+        self._longitude = grown(self._longitude, np.float64)
+        self._radius = grown(self._radius, np.float64)
+        self._start = grown(self._start, np.float64)
+        self._end = grown(self._end, np.float64)
+        self._alive = grown(self._alive, bool)
+        self._capacity = capacity
+
+    def _cell_keys(self, latitude: float, longitude: float, radius: float) -> Optional[List[int]]:
+        """Grid cells touched by a footprint's bounding box, or None when there are too many"""
+        d_lat = radius / METERS_PER_DEGREE
+        d_lon = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+        row_lo = int((max(latitude - d_lat, -90) + 90) // self.cell_size)
+        row_hi = int((min(latitude + d_lat, 90) + 90) // self.cell_size)
+        col_lo = int((max(longitude - d_lon, -180) + 180) // self.cell_size)
+        col_hi = int((min(longitude + d_lon, 180) + 180) // self.cell_size)
+        if (row_hi - row_lo + 1) * (col_hi - col_lo + 1) > MAX_CELLS_PER_FOOTPRINT:
+            return None
+        return [row * self._columns + col for row in range(row_lo, row_hi + 1) for col in range(col_lo, col_hi + 1)]
+
+    def _insert(self, footprint: Footprint):
+        token_id, latitude, longitude, radius, start, end = footprint
+        if token_id in self._row_of:
+            self._alive[self._row_of[token_id]] = False
+        if self._size == self._capacity:
+            self._grow(self._capacity * 2)
+        row = self._size
+        self._size += 1
+        self._token_ids[row] = token_id
+        self._latitude[row] = latitude
+        self._longitude[row] = longitude
+        self._radius[row] = radius
+        self._start[row] = start
+        self._end[row] = end
+        self._alive[row] = True
+        self._row_of[token_id] = row
+        keys = self._cell_keys(latitude, longitude, radius)
+        if keys is None:
+            self._large.append(row)
+            return
+        for key in keys:
+            bucket = self._cells.get(key)
+            if bucket is None:
+                self._cells[key] = [row]
+            else:
+                bucket.append(row)
+
+    def query(self, latitude: float, longitude: float, radius: float, start: float, end: float,
+              exclude_token_id: Optional[int] = None) -> List[int]:
+        """
+        Token IDs of indexed footprints that intersect a footprint and its date range
+
+        Args:
+            latitude: Degrees
+            longitude: Degrees
+            radius: Footprint radius in meters
+            start: Start of the active period in epoch days
+            end: End of the active period in epoch days
+            exclude_token_id: Token ID to ignore, so a project never overlaps itself
+
+        Returns:
+            Overlapping token IDs in ascending order
+        """
+        with self._lock:
+            keys = self._cell_keys(latitude, longitude, radius)
+            if keys is None:
+                candidates = np.flatnonzero(self._alive[:self._size])
+            else:
+                rows = list(self._large)
+                for key in keys:
+                    bucket = self._cells.get(key)
+                    if bucket:
+                        rows.extend(bucket)
+                if not rows:
+                    return []
+                candidates = np.unique(np.array(rows, dtype=np.int64))
+                candidates = candidates[self._alive[candidates]]
+
+            candidates = candidates[(self._start[candidates] < end) & (start < self._end[candidates])]
+            if exclude_token_id is not None:
+                candidates = candidates[self._token_ids[candidates] != exclude_token_id]
+            if not len(candidates):
+                return []
+
+            # Haversine distance between centres against the sum of radii
+            lat1, lat2 = math.radians(latitude), np.radians(self._latitude[candidates])
+            d_lat = lat2 - lat1
+            d_lon = np.radians(self._longitude[candidates] - longitude)
+            a = np.sin(d_lat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(d_lon / 2) ** 2
+            distance = 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1)))
+            hits = candidates[distance < self._radius[candidates] + radius]
+            return sorted(self._token_ids[hits].tolist())
+
+    def _is_indexed(self, footprint: Footprint) -> bool:
+        row = self._row_of.get(footprint[0])
+        if row is None:
+            return False
+        return (self._latitude[row], self._longitude[row], self._radius[row],
+                self._start[row], self._end[row]) == tuple(footprint[1:])
+
+    def _footprint(self, row: int) -> Footprint:
+        return (int(self._token_ids[row]), float(self._latitude[row]), float(self._longitude[row]),
+                float(self._radius[row]), float(self._start[row]), float(self._end[row]))
+
+    def insert_many(self, footprints: Iterable[Footprint]) -> List[FootprintChange]:
+        """
+        Index footprints, replacing earlier entries of the same token IDs
+
+        Returns:
+            (footprint, replaced footprint or None) for each footprint that
+            changed the index; identical re-inserts are skipped
+        """
+        with self._lock:
+            changes = self._index(footprints)
+            self._transaction(self._write_statements([footprint for footprint, _ in changes]))
+        return changes
+
+    def _index(self, footprints: Iterable[Footprint]) -> List[FootprintChange]:
+        # Revalidating a project re-claims an identical footprint; keep its row
+        changes = []
+        for footprint in footprints:
+            if self._is_indexed(footprint):
+                continue
+            row = self._row_of.get(footprint[0])
+            changes.append((footprint, None if row is None else self._footprint(row)))
+            self._insert(footprint)
+        return changes
+
+    @staticmethod
+    def _write_statements(footprints: List[Footprint]) -> List[Tuple[str, List[tuple]]]:
+        return [(UPSERT_SQL, footprints), (CHANGE_SQL, [(footprint[0],) for footprint in footprints])]
+
+    def hold_many(self, footprints: Iterable[Footprint]):
+        """Hold footprints of accepted projects until confirm_many indexes them; expired holds are dropped"""
+        now = time.time()
+        with self._lock:
+            self._transaction([
+                (HOLD_SQL, [tuple(footprint) + (now,) for footprint in footprints]),
+                ("DELETE FROM pending_footprints WHERE held_at < ?", [(now - self.pending_ttl,)]),
+            ])
+
+    def confirm_many(self, token_ids: Iterable[int]) -> Tuple[int, List[FootprintChange]]:
+        """
+        Index the held footprints of the given projects and release their holds
+
+        Returns:
+            Tuple of (number of held footprints found, changes to the index as insert_many reports them)
+        """
+        token_ids = [(int(token_id),) for token_id in token_ids]
+        with self._lock:
+            held = []
+            for start in range(0, len(token_ids), 500):
+                chunk = token_ids[start:start + 500]
+                held.extend(self._conn.execute(
+                    f"SELECT token_id, latitude, longitude, radius_m, start_day, end_day FROM pending_footprints "
+                    f"WHERE token_id IN ({','.join('?' * len(chunk))})", [token_id for token_id, in chunk]
+                ).fetchall())
+            changes = self._index(held)
+            self._transaction(self._write_statements([footprint for footprint, _ in changes])
+                              + [("DELETE FROM pending_footprints WHERE token_id = ?", token_ids)])
+        return len(held), changes
+
+    def refresh(self) -> List[FootprintChange]:
+        """
+        Apply footprints other processes indexed or removed since the last refresh
+
+        Cheap when nothing changed: SQLite's data_version tells whether another
+        connection committed at all.
+
+        Returns:
+            (footprint or None if removed, footprint it replaced or None) per change
+        """
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return []
+            self._data_version = data_version
+            logged = self._conn.execute(
+                "SELECT seq, token_id FROM footprint_changes WHERE seq > ? ORDER BY seq", (self._seen_seq,)
+            ).fetchall()
+            if not logged:
+                return []
+            self._seen_seq = logged[-1][0]
+            token_ids = list(dict.fromkeys(token_id for _, token_id in logged))
+            current = {}
+            for start in range(0, len(token_ids), 500):
+                chunk = token_ids[start:start + 500]
+                current.update((row[0], row) for row in self._conn.execute(
+                    f"SELECT * FROM footprints WHERE token_id IN ({','.join('?' * len(chunk))})", chunk))
+
+            changes = []
+            for token_id in token_ids:
+                footprint = current.get(token_id)
+                if footprint is not None:
+                    changes.extend(self._index([footprint]))
+                elif token_id in self._row_of:
+                    changes.append((None, self._drop(token_id)))
+        return changes
+
+    def locations(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Latitudes and longitudes of the indexed footprints"""
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self._size])
+            return self._latitude[rows].copy(), self._longitude[rows].copy()
+
+    def _transaction(self, statements: List[Tuple[str, List[tuple]]]):
+        self._conn.execute("BEGIN")
+        try:
+            for sql, rows in statements:
+                self._conn.executemany(sql, rows)
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _drop(self, token_id: int) -> Optional[Footprint]:
+        row = self._row_of.pop(token_id, None)
+        if row is None:
+            return None
+        self._alive[row] = False
+        return self._footprint(row)
+
+    def remove(self, token_id: int):
+        """Drop a project's footprint, e.g. after its verification is revoked"""
+        with self._lock:
+            self._drop(token_id)
+            self._transaction([("DELETE FROM footprints WHERE token_id = ?", [(token_id,)]),
+                               (CHANGE_SQL, [(token_id,)])])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from engine.features import parse_area, parse_location
+from utils.serialization import content_hash
+
+
+class ParsedProject:
+    """
+    A project payload parsed once per request
+
+    Holds the typed values that both rule evaluation and feature extraction
+    consume, so dates are parsed and numbers converted a single time.
+    """
+    __slots__ = (
+        'token_id',
+        'emission_reduction',
+        'start_date',
+        'end_date',
+        'duration_days',
+        'data_sources',
+        'data_source_count',
+        'location',
+        'latitude',
+        'longitude',
+        'area_hectares',
+        'project_type',
+        'additional_data',
+    )
+
+    def __init__(self, token_id: Optional[int], emission_reduction: float, start_date: datetime,
+                 end_date: datetime, data_sources: List[str], location: Optional[Dict] = None,
+                 additional_data: Optional[Dict] = None):
+        self.token_id = token_id
+        self.emission_reduction = emission_reduction
+        self.start_date = start_date
+        self.end_date = end_date
+        self.duration_days = (end_date - start_date).days
+        self.data_sources = data_sources
+        self.data_source_count = len(data_sources)
+        self.location = location
+        self.latitude, self.longitude = parse_location(location)
+        self.additional_data = additional_data
+        self.area_hectares = parse_area(additional_data)
+        self.project_type = (additional_data or {}).get('project_type')
+
+    @classmethod
+    def from_dict(cls, project_data: Dict) -> 'ParsedProject':
+        """
+        Parse a project payload
+
+        Raises:
+            KeyError: If a required field is missing
+            ValueError: If a date or number cannot be parsed
+        """
+        return cls(
+            token_id=project_data.get('tokenId'),
+            emission_reduction=float(project_data['estimated_emission_reduction']),
+            start_date=datetime.fromisoformat(project_data['project_start_date']),
+            end_date=datetime.fromisoformat(project_data['project_end_date']),
+            data_sources=project_data['data_sources'],
+            location=project_data.get('location'),
+            additional_data=project_data.get('additional_data'),
+        )
+
+
+def project_content_hash(project_data: Dict) -> str:
+    """Hash a project payload independently of key order"""
+    return content_hash(project_data)
@@ -0,0 +1,70 @@
+from typing import Dict, Optional
+import threading
+
+import numpy as np
+
+
+class FeatureReservoir:
+    def __init__(self, capacity: int, n_features: int, seed: Optional[int] = None):
+        """
+        Bounded uniform sample of feature vectors for online model retraining
+
+        Vectors are stored in one preallocated float32 array. Until it is full
+        it fills like a ring buffer; after that each new vector replaces a random
+        slot with probability capacity / seen (Algorithm R), so the sample stays
+        uniform over everything added while memory stays at capacity rows.
+
+        Args:
+            capacity: Maximum number of vectors kept
+            n_features: Length of each feature vector
+            seed: Random seed for replacement decisions
+        """
+        self.capacity = capacity
+        self.n_features = n_features
+        self._data = np.zeros((capacity, n_features), dtype=np.float32)
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self.seen = 0
+
+    def __len__(self) -> int:
+        return min(self.seen, self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+    def add(self, features):
+        """Offer one feature vector to the sample"""
+        with self._lock:
+            if self.seen < self.capacity:
+                self._data[self.seen] = features
+            else:
+                slot = int(self._rng.integers(0, self.seen + 1))
+                if slot < self.capacity:
+                    self._data[slot] = features
+            self.seen += 1
+
+    def add_many(self, features: np.ndarray):
+        """Offer a (k, n_features) array of vectors, equivalent to k calls to add"""
+        features = np.asarray(features, dtype=np.float32).reshape(-1, self.n_features)
+        with self._lock:
+            fill = min(max(self.capacity - self.seen, 0), len(features))
+            if fill:
+                self._data[self.seen:self.seen + fill] = features[:fill]
+            rest = features[fill:]
+            if len(rest):
+                # Item t (0-based count of items seen before it) lands in slot floor(u * (t + 1)) if below capacity
+                seen_before = self.seen + fill + np.arange(len(rest))
+                slots = (self._rng.random(len(rest)) * (seen_before + 1)).astype(np.int64)
+                keep = slots < self.capacity
+                # Fancy assignment applies in order, so a later vector wins a shared slot as it would sequentially
+                self._data[slots[keep]] = rest[keep]
+            self.seen += len(features)
+
+    def snapshot(self) -> np.ndarray:
+        """Copy of the current sample as float64 rows, safe to fit on while adds continue"""
+        with self._lock:
+            return self._data[:len(self)].astype(np.float64)
+
+    def stats(self) -> Dict:
+        return {"size": len(self), "capacity": self.capacity, "seen": self.seen, "bytes": self.nbytes}
@@ -0,0 +1,259 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import yaml
+
+from utils.metrics import RULE_FAILURES
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULESET_PATH = os.path.join(os.path.dirname(__file__), 'rulesets', 'default.yaml')
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """A rule compiled into a scalar predicate and a column-wise predicate"""
+    name: str
+    field: str
+    params: Dict
+    check: Callable[[Any], Optional[str]]
+    check_column: Callable[[np.ndarray], np.ndarray]
+
+
+def _format_message(template: str, **values) -> str:
+    return template.format(**values) if '{' in template else template
+
+
+def _compile_range(spec: Dict) -> Tuple[Callable, Callable]:
+    low = spec.get('min', float('-inf'))
+    high = spec.get('max', float('inf'))
+    message = spec['message']
+
+    def check(value):
+        if not (low <= value <= high):
+            return _format_message(message, value=value)
+        return None
+
+    def check_column(values):
+        return (values >= low) & (values <= high)
+
+    return check, check_column
+
+
+def _compile_min(spec: Dict) -> Tuple[Callable, Callable]:
+    return _compile_range({'min': spec['min'], 'message': spec['message']})
+
+
+def _compile_max(spec: Dict) -> Tuple[Callable, Callable]:
+    return _compile_range({'max': spec['max'], 'message': spec['message']})
+
+
+def _compile_contains_all(spec: Dict) -> Tuple[Callable, Callable]:
+    required = list(spec['values'])
+    message = spec['message']
+
+    def check(value):
+        missing = [item for item in required if item not in value]
+        if missing:
+            return _format_message(message, value=value, missing=missing)
+        return None
+
+    def check_column(values):
+        ok = np.ones(len(values), dtype=bool)
+        for item in required:
+            ok &= np.fromiter((item in row for row in values), dtype=bool, count=len(values))
+        return ok
+
+    return check, check_column
+
+
+def _compile_one_of(spec: Dict) -> Tuple[Callable, Callable]:
+    allowed = frozenset(spec['values'])
+    message = spec['message']
+
+    def check(value):
+        if value not in allowed:
+            return _format_message(message, value=value)
+        return None
+
+    def check_column(values):
+        return np.fromiter((row in allowed for row in values), dtype=bool, count=len(values))
+
+    return check, check_column
+
+
+CHECK_COMPILERS = {
+    'range': _compile_range,
+    'min': _compile_min,
+    'max': _compile_max,
+    'contains_all': _compile_contains_all,
+    'one_of': _compile_one_of,
+}
+
+
+def compile_rule(spec: Dict) -> CompiledRule:
+    """Compile a single declarative rule specification"""
+    try:
+        compiler = CHECK_COMPILERS[spec['check']]
+    except KeyError:
+        raise ValueError(f"Unknown check {spec.get('check')!r} in rule {spec.get('name')!r}")
+    check, check_column = compiler(spec)
+    return CompiledRule(
+        name=spec['name'],
+        field=spec['field'],
+        params=dict(spec),
+        check=check,
+        check_column=check_column
+    )
+
+
+def compile_ruleset(config: Dict) -> Dict[Optional[str], List[CompiledRule]]:
+    """
+    Compile a ruleset document into flat rule lists per project type
+
+    Returns:
+        Mapping of project type to its compiled rules; the None key holds the default rules
+    """
+    base_specs = config.get('rules', [])
+    compiled = {None: [compile_rule(spec) for spec in base_specs]}
+
+    for project_type, type_config in (config.get('project_types') or {}).items():
+        type_config = type_config or {}
+        specs = {spec['name']: dict(spec) for spec in base_specs}
+        for override in type_config.get('rules', []):
+            specs[override['name']] = {**specs.get(override['name'], {}), **override}
+        for name in type_config.get('disable', []):
+            specs.pop(name, None)
+        compiled[project_type] = [compile_rule(spec) for spec in specs.values()]
+
+    return compiled
+
+
+def load_ruleset_file(path: str) -> Dict:
+    """Load a YAML or JSON ruleset document"""
+    with open(path, 'r') as f:
+        if path.endswith('.json'):
+            return json.load(f)
+        return yaml.safe_load(f)
+
+
+class RuleEngine:
+    def __init__(self, path: Optional[str] = None, reload_interval: float = 5.0):
+        """
+        Initialize the rule engine from a ruleset file
+
+        Args:
+            path: YAML or JSON ruleset path. Defaults to the VALIDATION_RULES_PATH
+                environment variable or the bundled rulesets/default.yaml
+            reload_interval: Minimum seconds between checks of the ruleset file for
+                changes; 0 disables automatic reloading
+        """
+        self.path = path or os.getenv("VALIDATION_RULES_PATH", DEFAULT_RULESET_PATH)
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._next_check = 0.0
+        self.generation = 0
+        self.load()
+
+    def load(self):
+        """(Re)load and compile the ruleset file"""
+        with self._lock:
+            mtime = os.path.getmtime(self.path)
+            config = load_ruleset_file(self.path)
+            # Swap in the fully compiled rulesets in one assignment
+            self._rulesets = compile_ruleset(config)
+            self.generation += 1
+            self._mtime = mtime
+            self._next_check = time.monotonic() + self.reload_interval
+        logger.info(f"Loaded validation rules from {self.path}")
+
+    def reload_if_changed(self) -> bool:
+        """Reload the ruleset if the file changed; returns True if it was reloaded"""
+        if not self.reload_interval:
+            return False
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.reload_interval
+        try:
+            if os.path.getmtime(self.path) == self._mtime:
+                return False
+            self.load()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to reload validation rules, keeping previous ruleset: {str(e)}")
+            return False
+
+    def rules_for(self, project_type: Optional[str] = None) -> List[CompiledRule]:
+        """Return the compiled rules for a project type, falling back to the defaults"""
+        rulesets = self._rulesets
+        return rulesets.get(project_type, rulesets[None])
+
+    def evaluate(self, project: Any, project_type: Optional[str] = None,
+                 evaluate_all: bool = False) -> Tuple[bool, str, Dict]:
+        """
+        Evaluate the rules for one project
+
+        Rules whose field is absent or None on the project are skipped.
+
+        Args:
+            project: Parsed project exposing rule fields as attributes
+            project_type: Selects the per-type ruleset
+            evaluate_all: Report every violation instead of stopping at the first
+
+        Returns:
+            Tuple of (is_valid, reason, validation_details)
+        """
+        validation_details = {}
+        violations = []
+
+        for rule in self.rules_for(project_type):
+            value = getattr(project, rule.field, None)
+            if value is None:
+                continue
+            message = rule.check(value)
+            if message is not None:
+                RULE_FAILURES.labels(rule.name).inc()
+                if not evaluate_all:
+                    return False, message, validation_details
+                violations.append({'rule': rule.name, 'message': message})
+                validation_details[rule.name] = {'value': value, 'valid': False}
+                continue
+            validation_details[rule.name] = {'value': value, 'valid': True}
+
+        if violations:
+            validation_details['violations'] = violations
+            return False, "; ".join(v['message'] for v in violations), validation_details
+
+        return True, "Rule-based validation passed", validation_details
+
+    def evaluate_columns(self, columns: Dict[str, np.ndarray],
+                         project_types: np.ndarray) -> List[Tuple[List[CompiledRule], np.ndarray, np.ndarray]]:
+        """
+        Evaluate rules column-wise over a batch
+
+        Args:
+            columns: Fact columns keyed by rule field, all of the batch length
+            project_types: Object array of project types, one per row
+
+        Returns:
+            List of (rules, row_indices, ok) per project-type group, where ok is a
+            boolean matrix of shape (len(rules), len(row_indices))
+        """
+        groups = []
+        for project_type in dict.fromkeys(project_types.tolist()):
+            rows = np.flatnonzero(project_types == project_type)
+            rules = self.rules_for(project_type)
+            ok = np.ones((len(rules), len(rows)), dtype=bool)
+            for r, rule in enumerate(rules):
+                ok[r] = rule.check_column(columns[rule.field][rows])
+            groups.append((rules, rows, ok))
+        return groups
@@ -0,0 +1,334 @@
+"""
+Per-project telemetry aggregates over tumbling windows
+
+Sensors and satellites report readings of the emission reduction measured
+since their previous reading. Each project keeps the last n_windows
+tumbling windows of count, mean, variance (as M2), min and max in NumPy
+ring buffers, so memory is bounded by max_projects * n_windows cells no
+matter how many readings arrive. Readings are merged a batch at a time with
+Chan's parallel update; the raw history is never kept.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import io
+import logging
+import threading
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_SECONDS = 86400
+DEFAULT_WINDOWS = 30
+DEFAULT_MAX_PROJECTS = 50000
+_NO_WINDOW = np.iinfo(np.int64).min // 2
+# Readings stamped outside [0, MAX_TIMESTAMP) epoch seconds come from broken clocks and are dropped
+MAX_TIMESTAMP = 1e11
+
+
+def parse_ndjson(block: bytes) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parse NDJSON telemetry readings into columns
+
+    Each line is {"tokenId": int, "timestamp": epoch seconds or ISO 8601, "value": float}.
+
+    Returns:
+        Tuple of (token_ids, timestamps in epoch seconds, values)
+
+    Raises:
+        ValueError: If the block is not valid NDJSON or lacks a field
+    """
+    import pyarrow as pa
+    import pyarrow.json as pa_json
+
+    try:
+        table = pa_json.read_json(io.BytesIO(block))
+        timestamps = table.column('timestamp')
+        if pa.types.is_timestamp(timestamps.type):
+            timestamps = timestamps.cast(pa.timestamp('ns', tz=timestamps.type.tz)).cast(pa.int64())
+            timestamps = timestamps.to_numpy() / 1e9
+        else:
+            timestamps = timestamps.to_numpy().astype(np.float64)
+        return (table.column('tokenId').to_numpy().astype(np.int64),
+                timestamps,
+                table.column('value').to_numpy().astype(np.float64))
+    except (pa.ArrowInvalid, pa.ArrowTypeError, KeyError) as e:
+        raise ValueError(str(e)) from e
+
+
+class TelemetryStore:
+    def __init__(self, window_seconds: float = DEFAULT_WINDOW_SECONDS, n_windows: int = DEFAULT_WINDOWS,
+                 max_projects: int = DEFAULT_MAX_PROJECTS):
+        """
+        Bounded rolling aggregates of telemetry readings per project
+
+        A project's windows are relative to its newest reading; readings
+        older than its ring are dropped. When max_projects projects are
+        tracked, the least recently updated ones are evicted.
+
+        Args:
+            window_seconds: Length of each tumbling window
+            n_windows: Windows kept per project
+            max_projects: Projects tracked at most
+        """
+        self.window_seconds = window_seconds
+        self.n_windows = n_windows
+        self.max_projects = max_projects
+        self._lock = threading.Lock()
+        self._row_of: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._size = 0
+        self._capacity = 0
+        self._sequence = 0
+        self.received = 0
+        self.accepted = 0
+        self.evicted = 0
+        self._token_ids = self._newest = self._updated = None
+        self._window = self._count = self._mean = self._m2 = self._min = self._max = None
+        self._grow(min(1024, max_projects))
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self._token_ids, self._newest, self._updated, self._window,
+                                              self._count, self._mean, self._m2, self._min, self._max))
+
+    def _grow(self, capacity: int):
+        def grown(array, fill, dtype, shape):
+            new = np.full(shape, fill, dtype=dtype)
+            if array is not None:
+                new[:self._capacity] = array
+            return new
+        cells = (capacity, self.n_windows)
+        self._token_ids = grown(self._token_ids, 0, np.int64, capacity)
+        self._newest = grown(self._newest, _NO_WINDOW, np.int64, capacity)
+        self._updated = grown(self._updated, 0, np.int64, capacity)
+        self._window = grown(self._window, _NO_WINDOW, np.int64, cells)
+        self._count = grown(self._count, 0, np.int64, cells)
+        self._mean = grown(self._mean, 0.0, np.float64, cells)
+        self._m2 = grown(self._m2, 0.0, np.float64, cells)
+        self._min = grown(self._min, np.inf, np.float64, cells)
+        self._max = grown(self._max, -np.inf, np.float64, cells)
+        self._capacity = capacity
+
+    def _reset_rows(self, rows: np.ndarray):
+        self._newest[rows] = _NO_WINDOW
+        self._window[rows] = _NO_WINDOW
+        self._count[rows] = 0
+        self._mean[rows] = 0.0
+        self._m2[rows] = 0.0
+        self._min[rows] = np.inf
+        self._max[rows] = -np.inf
+
+    def _rows_for(self, token_ids: np.ndarray) -> np.ndarray:
+        """Rows of unique token IDs, allocating rows for new projects"""
+        rows = np.fromiter((self._row_of.get(token_id, -1) for token_id in token_ids.tolist()),
+                           dtype=np.int64, count=len(token_ids))
+        self._updated[rows[rows >= 0]] = self._sequence
+        new = np.flatnonzero(rows < 0)
+        if not len(new):
+            return rows
+
+        wanted = len(new) - len(self._free) - (self._capacity - self._size)
+        if wanted > 0 and self._capacity < self.max_projects:
+            self._grow(min(max(self._capacity * 2, self._size + len(new)), self.max_projects))
+            wanted = len(new) - len(self._free) - (self._capacity - self._size)
+        if wanted > 0:
+            # Evict the least recently updated projects, never one of this batch
+            candidates = np.flatnonzero(self._updated[:self._size] < self._sequence)
+            wanted = min(wanted, len(candidates))
+            victims = candidates[np.argpartition(self._updated[candidates], wanted - 1)[:wanted]] if wanted \
+                else candidates[:0]
+            for row in victims.tolist():
+                del self._row_of[int(self._token_ids[row])]
+                self._free.append(row)
+            self._reset_rows(victims)
+            self.evicted += len(victims)
+
+        for k in new.tolist():
+            if self._free:
+                row = self._free.pop()
+            elif self._size < self._capacity:
+                row = self._size
+                self._size += 1
+            else:
+                break  # more new projects in this batch than max_projects; the rest are dropped
+            token_id = int(token_ids[k])
+            self._row_of[token_id] = row
+            self._token_ids[row] = token_id
+            self._updated[row] = self._sequence
+            rows[k] = row
+        return rows
+
+    def ingest(self, token_ids, timestamps, values) -> int:
+        """
+        Merge a batch of readings into the window aggregates
+
+        Args:
+            token_ids: Project of each reading
+            timestamps: Epoch seconds of each reading
+            values: Emission reduction measured since the source's previous reading
+
+        Returns:
+            Number of readings merged; readings with invalid values or
+            timestamps and readings older than the project's ring are dropped
+        """
+        token_ids = np.asarray(token_ids, dtype=np.int64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        self.received += len(values)
+        valid = (timestamps >= 0) & (timestamps < MAX_TIMESTAMP) & np.isfinite(values)
+        if not valid.all():
+            token_ids, timestamps, values = token_ids[valid], timestamps[valid], values[valid]
+        if not len(values):
+            return 0
+        window = np.floor(timestamps / self.window_seconds).astype(np.int64)
+
+        with self._lock:
+            self._sequence += 1
+            unique_ids, inverse = np.unique(token_ids, return_inverse=True)
+            row = self._rows_for(unique_ids)[inverse]
+            known = row >= 0
+            if not known.all():
+                row, window, values = row[known], window[known], values[known]
+                if not len(values):
+                    return 0
+
+            # Group readings by (row, window): sort once, then reduce each run
+            window_base = window.min()
+            span = int(window.max() - window_base) + 1
+            key = row * span + (window - window_base)
+            order = np.argsort(key, kind='stable')
+            key = key[order]
+            values = values[order]
+            starts = np.flatnonzero(np.concatenate(([True], key[1:] != key[:-1])))
+            counts = np.diff(np.append(starts, len(key)))
+            means = np.add.reduceat(values, starts) / counts
+            deviations = values - np.repeat(means, counts)
+            m2 = np.add.reduceat(deviations * deviations, starts)
+            minimum = np.minimum.reduceat(values, starts)
+            maximum = np.maximum.reduceat(values, starts)
+            group_row, group_window = np.divmod(key[starts], span)
+            group_window += window_base
+
+            # Windows that fell out of a project's ring, counting this batch's newest reading too
+            np.maximum.at(self._newest, group_row, group_window)
+            live = group_window > self._newest[group_row] - self.n_windows
+            slot = group_window % self.n_windows
+            stored_window = self._window[group_row, slot]
+            live &= stored_window <= group_window
+            group_row, slot, group_window = group_row[live], slot[live], group_window[live]
+            counts, means, m2 = counts[live], means[live], m2[live]
+            minimum, maximum = minimum[live], maximum[live]
+
+            # A newer window reuses the slot of one that left the ring
+            stale = stored_window[live] < group_window
+            if stale.any():
+                cells = (group_row[stale], slot[stale])
+                self._window[cells] = group_window[stale]
+                self._count[cells] = 0
+                self._mean[cells] = 0.0
+                self._m2[cells] = 0.0
+                self._min[cells] = np.inf
+                self._max[cells] = -np.inf
+
+            # Chan et al.: merge (count, mean, M2) of the stored window and the batch's readings in it
+            cells = (group_row, slot)
+            count_a = self._count[cells]
+            total = count_a + counts
+            delta = means - self._mean[cells]
+            self._mean[cells] += delta * counts / total
+            self._m2[cells] += m2 + delta * delta * count_a * counts / total
+            self._count[cells] = total
+            self._min[cells] = np.minimum(self._min[cells], minimum)
+            self._max[cells] = np.maximum(self._max[cells], maximum)
+            accepted = int(counts.sum())
+            self.accepted += accepted
+        return accepted
+
+    def _row(self, token_id) -> Optional[int]:
+        """Row of a project; payload token IDs of other types never have telemetry"""
+        return self._row_of.get(token_id) if isinstance(token_id, (int, np.integer)) else None
+
+    def version(self, token_id) -> int:
+        """Changes whenever readings of the project are merged; 0 for projects without telemetry"""
+        row = self._row(token_id)
+        return 0 if row is None else int(self._updated[row])
+
+    def summary(self, token_ids: Sequence) -> Dict[str, np.ndarray]:
+        """
+        Aggregates over each project's live windows
+
+        Args:
+            token_ids: Projects to summarize; None or unknown IDs have no telemetry
+
+        Returns:
+            Columns count, mean, std, min, max, measured_per_day (mean
+            measured reduction per day of windows with readings) and
+            reading_cv (std / |mean| of readings); NaN without telemetry
+        """
+        n = len(token_ids)
+        columns = {name: np.full(n, np.nan) for name in ('mean', 'std', 'min', 'max', 'measured_per_day', 'reading_cv')}
+        columns['count'] = np.zeros(n, dtype=np.int64)
+        if not self._row_of:
+            return columns
+        with self._lock:
+            rows = np.fromiter((-1 if (row := self._row(t)) is None else row for t in token_ids),
+                               dtype=np.int64, count=n)
+            present = np.flatnonzero(rows >= 0)
+            if not len(present):
+                return columns
+            rows = rows[present]
+            live = self._window[rows] > (self._newest[rows] - self.n_windows)[:, None]
+            count = np.where(live, self._count[rows], 0)
+            mean = self._mean[rows]
+            m2 = self._m2[rows]
+            minimum = np.where(live, self._min[rows], np.inf).min(axis=1)
+            maximum = np.where(live, self._max[rows], -np.inf).max(axis=1)
+
+        total = count.sum(axis=1)
+        reduction = (count * mean).sum(axis=1)
+        overall_mean = reduction / total
+        m2_total = (np.where(live, m2, 0) + count * (mean - overall_mean[:, None]) ** 2).sum(axis=1)
+        std = np.sqrt(m2_total / total)
+        days = (count > 0).sum(axis=1) * self.window_seconds / 86400
+        columns['count'][present] = total
+        columns['mean'][present] = overall_mean
+        columns['std'][present] = std
+        columns['min'][present] = minimum
+        columns['max'][present] = maximum
+        columns['measured_per_day'][present] = reduction / days
+        with np.errstate(divide='ignore', invalid='ignore'):
+            columns['reading_cv'][present] = np.where(overall_mean != 0, std / np.abs(overall_mean), np.inf)
+        return columns
+
+    def windows(self, token_id: int) -> Optional[List[Dict]]:
+        """Live windows of a project, oldest first, or None if it has no telemetry"""
+        with self._lock:
+            row = self._row(token_id)
+            if row is None:
+                return None
+            live = np.flatnonzero((self._window[row] > self._newest[row] - self.n_windows) & (self._count[row] > 0))
+            live = live[np.argsort(self._window[row, live])]
+            return [{
+                'window_start': float(self._window[row, slot] * self.window_seconds),
+                'count': int(self._count[row, slot]),
+                'mean': float(self._mean[row, slot]),
+                'std': float(np.sqrt(self._m2[row, slot] / self._count[row, slot])),
+                'min': float(self._min[row, slot]),
+                'max': float(self._max[row, slot]),
+            } for slot in live.tolist()]
+
+    def stats(self) -> Dict:
+        return {
+            'projects': len(self._row_of),
+            'max_projects': self.max_projects,
+            'window_seconds': self.window_seconds,
+            'windows': self.n_windows,
+            'received': self.received,
+            'accepted': self.accepted,
+            'evicted': self.evicted,
+            'bytes': self.nbytes,
+        }
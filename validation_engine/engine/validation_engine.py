@@ -1,127 +1,588 @@
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional, Union
 import numpy as np
-from sklearn.ensemble import IsolationForest
 from datetime import datetime
-import json
 import logging
+import math
+import os
+import threading
+
+from engine.features import (
+    FEATURE_NAMES,
+    FEATURE_SCHEMA_VERSION,
+    N_FEATURES,
+    SpatialGrid,
+    bootstrap_columns,
+    build_features,
+    parse_area,
+    parse_location,
+    project_columns,
+)
+from engine.flat_forest import FlatIsolationForest
+from engine.model_store import (
+    DEFAULT_MODEL_PATH,
+    ModelArtifact,
+    ModelHistory,
+    load_model_artifact,
+    make_model_version,
+    save_model_artifact,
+)
+from engine.overlap_index import Footprint, OverlapIndex, epoch_days, footprint_radius
+from engine.parsed_project import ParsedProject, project_content_hash
+from engine.reservoir import FeatureReservoir
+from engine.result_cache import LRUCache
+from engine.rule_engine import RuleEngine
+from engine.telemetry import TelemetryStore
+from utils.metrics import MODEL_INFO, RULE_FAILURES, record_verdict, record_verdicts, stage_timer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+OVERLAP_POLICIES = ('reject', 'flag', 'off')
+OVERLAP_REASON = "Footprint and dates overlap verified projects"
+
+# IsolationForest fits each tree on 256 samples, so retraining on fewer is not meaningful
+MIN_RETRAIN_SAMPLES = 256
+# The reservoir holds only accepted projects, so a retrained model rejects just its outermost tail;
+# a fixed contamination would cut a further slice out of the accepted region on every retrain
+RETRAIN_REJECT_QUANTILE = 0.005
+
 class ValidationEngine:
-    def __init__(self):
-        self.model = IsolationForest(contamination=0.1, random_state=42)
-        self._initialize_rules()
-        
-    def _initialize_rules(self):
-        """Initialize validation rules and thresholds"""
-        self.rules = {
-            'emission_reduction': {
-                'min': 0,
-                'max': 1000000,  # 1 million tons
-                'required': True
-            },
-            'project_duration': {
-                'min_days': 30,
-                'max_days': 3650,  # 10 years
-                'required': True
-            },
-            'data_sources': {
-                'min_sources': 2,
-                'required_sources': ['sensor', 'satellite'],
-                'required': True
-            }
-        }
+    def __init__(self, model_path: Optional[str] = None, rules_path: Optional[str] = None,
+                 cache_size: int = 0, reservoir_size: int = 10000, keep_versions: int = 10,
+                 overlap_index: Optional[OverlapIndex] = None, overlap_policy: str = 'reject',
+                 telemetry: Optional[TelemetryStore] = None):
+        """
+        Initialize the validation engine
+
+        Args:
+            model_path: Path of the persisted anomaly model artifact. Defaults to
+                the ANOMALY_MODEL_PATH environment variable or models/anomaly_model.joblib
+            rules_path: YAML or JSON ruleset path. Defaults to the VALIDATION_RULES_PATH
+                environment variable or engine/rulesets/default.yaml
+            cache_size: Number of validation results to keep in an LRU cache keyed by
+                payload content hash; 0 disables the cache
+            reservoir_size: Feature vectors of accepted projects sampled for retrain
+            keep_versions: Number of retrained model versions archived for rollback
+            overlap_index: Index of verified project footprints. Defaults to an
+                in-memory index. Footprints of accepted projects are held in it
+                and indexed only once confirm_verified reports their
+                verification on chain; engines sharing its file see each
+                other's confirmations. The spatial density feature counts the
+                same verified projects
+            overlap_policy: 'reject' projects whose footprint and dates overlap a
+                verified project, only 'flag' them in the details, or 'off'
+            telemetry: Windowed aggregates of sensor and satellite readings per
+                project, compared with the claimed reduction rate. Defaults to
+                an empty store
+        """
+        if overlap_policy not in OVERLAP_POLICIES:
+            raise ValueError(f"overlap_policy must be one of {OVERLAP_POLICIES}")
+        self.model_path = model_path or os.getenv("ANOMALY_MODEL_PATH", DEFAULT_MODEL_PATH)
+        self.model_history = ModelHistory(os.path.splitext(self.model_path)[0] + '_versions', keep_versions)
+        self.reservoir = FeatureReservoir(reservoir_size, N_FEATURES)
+        self.overlap_index = overlap_index if overlap_index is not None else OverlapIndex(":memory:")
+        # Locations of verified projects, for the spatial density feature
+        self.spatial_grid = SpatialGrid()
+        self.spatial_grid.add_many(*self.overlap_index.locations())
+        self.overlap_policy = overlap_policy
+        self._footprint_lock = threading.Lock()
+        self.telemetry = telemetry if telemetry is not None else TelemetryStore()
+        self.result_cache = LRUCache(cache_size)
+        self._model_lock = threading.RLock()
+        # Identity of the model file last loaded, to detect replacements by other processes
+        self._model_signature = None
+        self._initialize_rules(rules_path)
+        self._load_model()
+
+    def _load_model(self):
+        """
+        Serve the persisted anomaly model, falling back to a bootstrap model
 
-    def validate_project(self, project_data: Dict) -> Tuple[bool, str, Dict]:
+        The model's arrays are memory-mapped from model_path, so worker
+        processes serving the same file share one copy. A bootstrap model is
+        written there first; when several workers start together, the first
+        one's file wins and all of them serve it.
+        """
+        artifact = load_model_artifact(self.model_path)
+        if artifact is not None and self._is_compatible(artifact):
+            if self.reload_model():
+                return
+        elif artifact is not None:
+            logger.warning(f"Anomaly model at {self.model_path} was trained on another feature schema, "
+                           f"fitting bootstrap model")
+        else:
+            logger.warning(f"No anomaly model found at {self.model_path}, fitting bootstrap model")
+        bootstrap = self._fit_artifact(self._bootstrap_features(), source='bootstrap')
+        try:
+            save_model_artifact(bootstrap, self.model_path, overwrite=artifact is not None)
+        except OSError as e:
+            logger.warning(f"Could not write bootstrap model to {self.model_path}: {str(e)}")
+        if not self.reload_model():
+            self._set_artifact(bootstrap)
+
+    @staticmethod
+    def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def reload_model(self) -> bool:
+        """
+        Serve the model file again if it changed since it was last loaded
+
+        Another process fitting or rolling back the model replaces the file
+        atomically; this picks the new file up without a restart. A file of
+        another feature schema is ignored.
+
+        Returns:
+            Whether a new model is now being served
+        """
+        with self._model_lock:
+            signature = self._file_signature(self.model_path)
+            if signature is None or signature == self._model_signature:
+                return False
+            self._model_signature = signature
+            artifact = load_model_artifact(self.model_path, mmap_mode='r')
+            if not self._is_compatible(artifact):
+                logger.warning(f"Ignoring anomaly model {artifact.version}: trained on another feature schema")
+                return False
+            self._set_artifact(artifact)
+            return True
+
+    def _set_artifact(self, artifact: ModelArtifact):
+        # A single reference swap: scoring reads self._artifact once, so it never mixes two models
+        self._artifact = artifact
+        MODEL_INFO.info({'version': artifact.version})
+        logger.info(f"Serving anomaly model {artifact.version}")
+
+    @property
+    def model(self):
+        return self._artifact.model
+
+    @property
+    def model_version(self) -> str:
+        return self._artifact.version
+
+    @property
+    def model_n_features(self) -> int:
+        return self._artifact.n_features
+
+    @staticmethod
+    def _is_compatible(artifact: ModelArtifact) -> bool:
+        return (artifact.n_features == N_FEATURES
+                and artifact.metadata.get('feature_schema') == FEATURE_SCHEMA_VERSION)
+
+    def _install_artifact(self, artifact: ModelArtifact, save: bool):
+        """Archive and persist a newly fitted artifact, then start serving it"""
+        with self._model_lock:
+            if save:
+                previous = self._artifact
+                if previous.version not in self.model_history:
+                    self.model_history.save(previous)
+                self.model_history.save(artifact, protect=previous.version)
+                save_model_artifact(artifact, self.model_path)
+                if self.reload_model():
+                    return
+            self._set_artifact(artifact)
+
+    def _fit_artifact(self, features_array: np.ndarray, source: str,
+                      reject_quantile: Optional[float] = None) -> ModelArtifact:
+        """
+        Fit a fresh IsolationForest and wrap it, flattened for serving, in a versioned artifact
+
+        Args:
+            features_array: Training feature vectors
+            source: Where the training data came from, recorded in the metadata
+            reject_quantile: Place the decision threshold at this quantile of the
+                training scores instead of treating 10% of them as anomalous
+        """
+        # Only fitting needs sklearn; workers that just serve a model never import it
+        from sklearn.ensemble import IsolationForest
+        model = IsolationForest(contamination=0.1, random_state=42)
+        model.fit(features_array)
+        if reject_quantile is not None:
+            model.offset_ = float(np.quantile(model.score_samples(features_array), reject_quantile))
+        return ModelArtifact(
+            model=FlatIsolationForest.from_sklearn(model),
+            version=make_model_version(features_array),
+            trained_at=datetime.utcnow().isoformat(),
+            n_samples=features_array.shape[0],
+            n_features=features_array.shape[1],
+            metadata={'source': source, 'feature_schema': FEATURE_SCHEMA_VERSION, 'feature_names': FEATURE_NAMES}
+        )
+
+    def _bootstrap_features(self, n_samples: int = 2000) -> np.ndarray:
+        """
+        Build a synthetic reference corpus within the feature schema's ranges
+
+        Used only until a model has been trained on real projects with update_model.
+        """
+        return build_features(**bootstrap_columns(n_samples))
+
+    def _initialize_rules(self, rules_path: Optional[str] = None):
+        """Load and compile the validation ruleset"""
+        self.rule_engine = RuleEngine(rules_path)
+
+    def reload_rules(self):
+        """Reload the validation ruleset from disk"""
+        self.rule_engine.load()
+
+    def validate_project(self, project_data: Dict, evaluate_all: bool = False) -> Tuple[bool, str, Dict]:
         """
         Validate a carbon project using both rule-based and ML-based approaches
         
         Args:
             project_data: Dictionary containing project validation data
+            evaluate_all: Report every rule violation instead of stopping at the first
             
         Returns:
             Tuple of (is_valid, reason, validation_details)
         """
+        with stage_timer('validate'):
+            result = self._validate_project(project_data, evaluate_all)
+        record_verdict(result[0], result[1])
+        return result
+
+    def _validate_project(self, project_data: Dict, evaluate_all: bool) -> Tuple[bool, str, Dict]:
         try:
-            # Rule-based validation
-            rule_validation, rule_reason, rule_details = self._rule_based_validation(project_data)
-            if not rule_validation:
-                return False, rule_reason, rule_details
+            self.rule_engine.reload_if_changed()
+            self.refresh_footprints()
 
-            # ML-based validation
-            ml_validation, ml_reason, ml_details = self._ml_based_validation(project_data)
-            if not ml_validation:
-                return False, ml_reason, ml_details
+            # Resubmissions of an identical payload skip parsing and scoring entirely
+            cache_key = None
+            if self.result_cache.maxsize > 0:
+                cache_key = (project_content_hash(project_data), evaluate_all, self.model_version,
+                             self.rule_engine.generation, self.telemetry.version(project_data.get('tokenId')),
+                             self.spatial_grid.version)
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    self._record_accepted(*cached)
+                    return cached[0]
 
-            # Combine validation results
-            validation_details = {
-                'rule_validation': rule_details,
-                'ml_validation': ml_details,
-                'timestamp': datetime.utcnow().isoformat()
-            }
-
-            return True, "Project validated successfully", validation_details
+            with stage_timer('parse'):
+                project = ParsedProject.from_dict(project_data)
+            result, footprint = self._validate_parsed(project, evaluate_all)
+            if cache_key is not None:
+                self.result_cache.put(cache_key, (result, footprint))
+            self._record_accepted(result, footprint)
+            return result
 
         except Exception as e:
             logger.error(f"Validation error: {str(e)}")
             return False, f"Validation error: {str(e)}", {}
 
-    def _rule_based_validation(self, project_data: Dict) -> Tuple[bool, str, Dict]:
-        """Perform rule-based validation"""
-        validation_details = {}
-        
-        # Validate emission reduction
-        if 'estimated_emission_reduction' in project_data:
-            reduction = float(project_data['estimated_emission_reduction'])
-            if not (self.rules['emission_reduction']['min'] <= reduction <= 
-                   self.rules['emission_reduction']['max']):
-                return False, "Emission reduction outside acceptable range", validation_details
-            validation_details['emission_reduction'] = {'value': reduction, 'valid': True}
-
-        # Validate project duration
-        if 'project_start_date' in project_data and 'project_end_date' in project_data:
-            start_date = datetime.fromisoformat(project_data['project_start_date'])
-            end_date = datetime.fromisoformat(project_data['project_end_date'])
-            duration_days = (end_date - start_date).days
-            
-            if not (self.rules['project_duration']['min_days'] <= duration_days <= 
-                   self.rules['project_duration']['max_days']):
-                return False, "Project duration outside acceptable range", validation_details
-            validation_details['project_duration'] = {'days': duration_days, 'valid': True}
-
-        # Validate data sources
-        if 'data_sources' in project_data:
-            sources = project_data['data_sources']
-            if len(sources) < self.rules['data_sources']['min_sources']:
-                return False, "Insufficient data sources", validation_details
-            
-            missing_required = [src for src in self.rules['data_sources']['required_sources'] 
-                              if src not in sources]
-            if missing_required:
-                return False, f"Missing required data sources: {missing_required}", validation_details
-            
-            validation_details['data_sources'] = {'sources': sources, 'valid': True}
+    def _validate_parsed(self, project: ParsedProject, evaluate_all: bool = False
+                         ) -> Tuple[Tuple[bool, str, Dict], Optional[Footprint]]:
+        """
+        Run rule-based then ML-based validation on a parsed project
+
+        Nothing is recorded here, so the result can be cached; pass both
+        values to _record_accepted for every answer, cached or not.
+
+        Returns:
+            Tuple of (validation result, overlap index footprint or None)
+        """
+        # Rule-based validation
+        with stage_timer('rules'):
+            rule_validation, rule_reason, rule_details = self._rule_based_validation(project, evaluate_all)
+        if not rule_validation:
+            return (False, rule_reason, rule_details), None
+
+        # ML-based validation
+        ml_validation, ml_reason, ml_details = self._ml_based_validation(project)
+        if not ml_validation:
+            return (False, ml_reason, ml_details), None
+
+        # Combine validation results
+        validation_details = {
+            'rule_validation': rule_details,
+            'ml_validation': ml_details,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+        # Duplicate claims of land already covered by a verified project
+        footprint = self._footprint(
+            project.token_id, project.latitude, project.longitude, project.area_hectares,
+            epoch_days(project.start_date), epoch_days(project.end_date)
+        )
+        [overlaps] = self._find_overlaps([footprint])
+        if overlaps:
+            validation_details['overlapping_projects'] = overlaps
+            if self.overlap_policy == 'reject':
+                return (False, self._overlap_reason(overlaps), validation_details), None
+
+        return (True, "Project validated successfully", validation_details), footprint
+
+    def _record_accepted(self, result: Tuple[bool, str, Dict], footprint: Optional[Footprint]):
+        """Hold the footprint and sample the features of an accepted project"""
+        if result[0]:
+            self._hold_footprints([footprint])
+            self.reservoir.add(result[2]['ml_validation']['features'])
+
+    def _footprint(self, token_id, latitude: float, longitude: float, area_hectares: float,
+                   start_day: float, end_day: float) -> Optional[Footprint]:
+        """Overlap index entry of a project; None when it has no token ID or location"""
+        if token_id is None or math.isnan(latitude) or math.isnan(start_day) or math.isnan(end_day):
+            return None
+        return (int(token_id), latitude, longitude, footprint_radius(area_hectares), start_day, end_day)
+
+    def _find_overlaps(self, footprints: List[Optional[Footprint]]) -> List[List[int]]:
+        """Verified projects overlapping each footprint; nothing is indexed"""
+        results: List[List[int]] = [[] for _ in footprints]
+        if self.overlap_policy == 'off':
+            return results
+        with stage_timer('overlap_check'):
+            for k, footprint in enumerate(footprints):
+                if footprint is not None:
+                    token_id, latitude, longitude, radius, start, end = footprint
+                    results[k] = self.overlap_index.query(latitude, longitude, radius, start, end,
+                                                          exclude_token_id=token_id)
+        return results
 
-        return True, "Rule-based validation passed", validation_details
+    def _hold_footprints(self, footprints: List[Optional[Footprint]]):
+        """Hold footprints of accepted projects in the overlap index until confirm_verified indexes them"""
+        if self.overlap_policy == 'off':
+            return
+        footprints = [footprint for footprint in footprints if footprint is not None]
+        if footprints:
+            self.overlap_index.hold_many(footprints)
 
-    def _ml_based_validation(self, project_data: Dict) -> Tuple[bool, str, Dict]:
+    def refresh_footprints(self):
+        """Pick up footprints other processes confirmed or removed in the shared overlap index"""
+        with self._footprint_lock:
+            self._apply_footprint_changes(self.overlap_index.refresh())
+
+    def _apply_footprint_changes(self, changes: List[Tuple[Optional[Footprint], Optional[Footprint]]]):
+        # Keep the spatial density grid in step with the index
+        replaced = [previous for _, previous in changes if previous is not None]
+        if replaced:
+            self.spatial_grid.add_many([f[1] for f in replaced], [f[2] for f in replaced], count=-1)
+        added = [footprint for footprint, _ in changes if footprint is not None]
+        if added:
+            self.spatial_grid.add_many([f[1] for f in added], [f[2] for f in added])
+
+    def confirm_verified(self, token_ids: Iterable[int]) -> int:
+        """
+        Index the footprints of projects whose on-chain verification is confirmed
+
+        Only verified projects make later overlapping claims fail and count
+        towards spatial density; accepted projects whose transaction fails or
+        never happens leave no trace.
+
+        Args:
+            token_ids: Projects verified on chain
+
+        Returns:
+            Number of footprints indexed
+        """
+        with self._footprint_lock:
+            self._apply_footprint_changes(self.overlap_index.refresh())
+            confirmed, changes = self.overlap_index.confirm_many(token_ids)
+            self._apply_footprint_changes(changes)
+        return confirmed
+
+    @staticmethod
+    def _overlap_reason(overlaps: List[int]) -> str:
+        listed = ", ".join(str(token_id) for token_id in overlaps[:10])
+        more = f" and {len(overlaps) - 10} more" if len(overlaps) > 10 else ""
+        return f"{OVERLAP_REASON}: {listed}{more}"
+
+    def cache_stats(self) -> Dict:
+        """Return hit/miss/eviction counters of the validation result cache"""
+        return self.result_cache.stats()
+
+    def validate_batch(self, projects: List[Dict], evaluate_all: bool = False) -> List[Tuple[bool, str, Dict]]:
+        """
+        Validate many carbon projects at once
+
+        Applies the same parsing, rules and anomaly model as validate_project,
+        but checks rules and builds features column-wise across the batch and
+        scores every surviving row with a single model call.
+
+        Args:
+            projects: List of project validation data dictionaries
+            evaluate_all: Report every rule violation instead of stopping at the first
+
+        Returns:
+            List of (is_valid, reason, validation_details) tuples in input order
+        """
+        with stage_timer('validate_batch'):
+            results = self._validate_batch(projects, evaluate_all)
+        record_verdicts(results)
+        return results
+
+    def _validate_batch(self, projects: List[Dict], evaluate_all: bool) -> List[Tuple[bool, str, Dict]]:
+        n = len(projects)
+        results: List[Optional[Tuple[bool, str, Dict]]] = [None] * n
+        if n == 0:
+            return []
+        self.refresh_footprints()
+
+        self.rule_engine.reload_if_changed()
+
+        # Column extraction; rows with missing or malformed fields fail individually
+        reduction = np.full(n, np.nan)
+        duration_days = np.zeros(n, dtype=np.int64)
+        start_day = np.full(n, np.nan)
+        end_day = np.full(n, np.nan)
+        source_count = np.zeros(n, dtype=np.int64)
+        sources = np.empty(n, dtype=object)
+        project_types = np.empty(n, dtype=object)
+        latitude = np.full(n, np.nan)
+        longitude = np.full(n, np.nan)
+        area_hectares = np.full(n, np.nan)
+        token_ids = [None] * n
+        for i, project in enumerate(projects):
+            sources[i] = []
+            try:
+                # Same parsing and field order as ParsedProject, so failures report the same error
+                token_ids[i] = project.get('tokenId')
+                reduction[i] = float(project['estimated_emission_reduction'])
+                start_date = datetime.fromisoformat(project['project_start_date'])
+                end_date = datetime.fromisoformat(project['project_end_date'])
+                sources[i] = project['data_sources']
+                duration_days[i] = (end_date - start_date).days
+                source_count[i] = len(sources[i])
+                start_day[i], end_day[i] = epoch_days(start_date), epoch_days(end_date)
+                additional_data = project.get('additional_data')
+                project_types[i] = (additional_data or {}).get('project_type')
+                latitude[i], longitude[i] = parse_location(project.get('location'))
+                area_hectares[i] = parse_area(additional_data)
+            except Exception as e:
+                sources[i] = []
+                results[i] = (False, f"Validation error: {str(e)}", {})
+
+        # Column-wise rule checks, reported per row in rule order
+        columns = {
+            'emission_reduction': reduction,
+            'duration_days': duration_days,
+            'data_source_count': source_count,
+            'data_sources': sources,
+        }
+        for rules, rows, ok in self.rule_engine.evaluate_columns(columns, project_types):
+            for col, i in enumerate(rows):
+                if results[i] is not None:
+                    continue
+                rule_details = {}
+                violations = []
+                for r, rule in enumerate(rules):
+                    value = columns[rule.field][i]
+                    value = value.item() if isinstance(value, np.generic) else value
+                    if not ok[r, col]:
+                        RULE_FAILURES.labels(rule.name).inc()
+                        violations.append({'rule': rule.name, 'message': rule.check(value)})
+                        if not evaluate_all:
+                            break
+                        rule_details[rule.name] = {'value': value, 'valid': False}
+                        continue
+                    rule_details[rule.name] = {'value': value, 'valid': True}
+                if violations:
+                    if evaluate_all:
+                        rule_details['violations'] = violations
+                    results[i] = (False, "; ".join(v['message'] for v in violations), rule_details)
+                    continue
+                results[i] = (True, "Rule-based validation passed", rule_details)
+
+        # Score every row that passed the rules with one model call
+        passed = np.fromiter((r[0] for r in results), dtype=bool, count=n)
+        if passed.any():
+            with stage_timer('batch_features'):
+                features = self._build_features(
+                    token_ids=[token_ids[i] for i in np.flatnonzero(passed)],
+                    reduction=reduction[passed],
+                    duration_days=duration_days[passed],
+                    source_count=source_count[passed],
+                    latitude=latitude[passed],
+                    longitude=longitude[passed],
+                    area_hectares=area_hectares[passed],
+                    project_types=project_types[passed].tolist()
+                )
+            artifact = self._artifact
+            try:
+                with stage_timer('batch_ml_scoring'):
+                    scores = artifact.model.decision_function(features)
+            except Exception as e:
+                logger.error(f"ML validation error: {str(e)}")
+                for i in np.flatnonzero(passed):
+                    results[i] = (False, f"ML validation error: {str(e)}", {})
+                return results
+            rows = np.flatnonzero(passed)
+            accepted = scores >= 0
+            footprints = [
+                self._footprint(token_ids[i], latitude[i], longitude[i], area_hectares[i], start_day[i], end_day[i])
+                if accepted[row] else None
+                for row, i in enumerate(rows)
+            ]
+            overlaps = self._find_overlaps(footprints)
+            if self.overlap_policy == 'reject':
+                accepted &= np.fromiter((not o for o in overlaps), dtype=bool, count=len(rows))
+            self._hold_footprints([footprint for footprint, ok in zip(footprints, accepted) if ok])
+            self.reservoir.add_many(features[accepted])
+            timestamp = datetime.utcnow().isoformat()
+            for row, i in enumerate(rows):
+                anomaly_score = float(scores[row])
+                prediction = 1 if anomaly_score >= 0 else -1
+                ml_details = {
+                    'features': features[row].tolist(),
+                    'prediction': prediction,
+                    'anomaly_score': anomaly_score,
+                    'model_version': artifact.version,
+                    'is_valid': prediction == 1
+                }
+                if prediction != 1:
+                    results[i] = (False, "ML model detected potential anomalies in project data", ml_details)
+                    continue
+                validation_details = {
+                    'rule_validation': results[i][2],
+                    'ml_validation': ml_details,
+                    'timestamp': timestamp
+                }
+                if overlaps[row]:
+                    validation_details['overlapping_projects'] = overlaps[row]
+                    if self.overlap_policy == 'reject':
+                        results[i] = (False, self._overlap_reason(overlaps[row]), validation_details)
+                        continue
+                results[i] = (True, "Project validated successfully", validation_details)
+
+        return results
+
+    def _rule_based_validation(self, project_data: Union[ParsedProject, Dict],
+                               evaluate_all: bool = False) -> Tuple[bool, str, Dict]:
+        """Perform rule-based validation using the compiled ruleset"""
+        project = self._ensure_parsed(project_data)
+        return self.rule_engine.evaluate(project, project.project_type, evaluate_all)
+
+    @staticmethod
+    def _ensure_parsed(project_data: Union[ParsedProject, Dict]) -> ParsedProject:
+        if isinstance(project_data, ParsedProject):
+            return project_data
+        return ParsedProject.from_dict(project_data)
+
+    def _ml_based_validation(self, project_data: Union[ParsedProject, Dict]) -> Tuple[bool, str, Dict]:
         """Perform ML-based validation using anomaly detection"""
         try:
             # Extract features for ML validation
-            features = self._extract_features(project_data)
-            
-            # Reshape for sklearn
-            features_array = np.array(features).reshape(1, -1)
+            with stage_timer('features'):
+                features = self._extract_features(project_data)
+                
+                # Reshape for sklearn
+                features_array = np.array(features).reshape(1, -1)
             
-            # Predict if the project is an anomaly
-            prediction = self.model.fit_predict(features_array)
+            # Score against the pre-trained model; predict() is decision_function < 0
+            artifact = self._artifact
+            with stage_timer('ml_scoring'):
+                anomaly_score = float(artifact.model.decision_function(features_array)[0])
+            prediction = 1 if anomaly_score >= 0 else -1
             
-            is_valid = prediction[0] == 1  # 1 means normal, -1 means anomaly
+            is_valid = prediction == 1  # 1 means normal, -1 means anomaly
             
             validation_details = {
                 'features': features,
-                'prediction': int(prediction[0]),
+                'prediction': prediction,
+                'anomaly_score': anomaly_score,
+                'model_version': artifact.version,
                 'is_valid': is_valid
             }
             
@@ -134,35 +595,113 @@ class ValidationEngine:
             logger.error(f"ML validation error: {str(e)}")
             return False, f"ML validation error: {str(e)}", {}
 
-    def _extract_features(self, project_data: Dict) -> List[float]:
-        """Extract numerical features for ML validation"""
-        features = []
-        
-        # Emission reduction normalized
-        if 'estimated_emission_reduction' in project_data:
-            reduction = float(project_data['estimated_emission_reduction'])
-            features.append(reduction / self.rules['emission_reduction']['max'])
-        
-        # Project duration normalized
-        if 'project_start_date' in project_data and 'project_end_date' in project_data:
-            start_date = datetime.fromisoformat(project_data['project_start_date'])
-            end_date = datetime.fromisoformat(project_data['project_end_date'])
-            duration_days = (end_date - start_date).days
-            features.append(duration_days / self.rules['project_duration']['max_days'])
-        
-        # Number of data sources normalized
-        if 'data_sources' in project_data:
-            features.append(len(project_data['data_sources']) / 5)  # Assuming max 5 sources
-        
-        return features
+    def _build_features(self, token_ids: List, **columns) -> np.ndarray:
+        """
+        Feature matrix of raw columns, with spatial density looked up in the
+        grid of verified projects and telemetry aggregates in the telemetry store
+        """
+        density = self.spatial_grid.density(columns['latitude'], columns['longitude'])
+        telemetry = self.telemetry.summary(token_ids)
+        return build_features(density=density, measured_per_day=telemetry['measured_per_day'],
+                              reading_cv=telemetry['reading_cv'], **columns)
 
-    def update_model(self, new_training_data: List[Dict]):
-        """Update the ML model with new training data"""
+    def _extract_features(self, project_data: Union[ParsedProject, Dict]) -> List[float]:
+        """Extract the fixed-schema feature vector for ML validation"""
+        project = self._ensure_parsed(project_data)
+        return self._build_features([project.token_id], **project_columns([project]))[0].tolist()
+
+    def update_model(self, new_training_data: List[Dict], save: bool = True) -> str:
+        """
+        Fit the anomaly model on a reference corpus and persist it
+
+        Args:
+            new_training_data: Reference projects to fit the model on
+            save: Whether to write the fitted model to model_path
+
+        Returns:
+            Version of the newly fitted model
+        """
         try:
-            features_list = [self._extract_features(data) for data in new_training_data]
-            features_array = np.array(features_list)
-            self.model.fit(features_array)
+            parsed = []
+            for data in new_training_data:
+                try:
+                    parsed.append(self._ensure_parsed(data))
+                except Exception as e:
+                    logger.warning(f"Skipping unparseable training project: {str(e)}")
+            if not parsed:
+                raise ValueError("No parseable training projects")
+            features_array = self._build_features([p.token_id for p in parsed], **project_columns(parsed))
+            artifact = self._fit_artifact(features_array, source='update_model')
+            # Cached results are keyed by model version, so stale entries simply age out
+            self._install_artifact(artifact, save)
             logger.info("Model updated successfully")
+            return artifact.version
         except Exception as e:
             logger.error(f"Model update error: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    def retrain(self, min_samples: int = MIN_RETRAIN_SAMPLES, save: bool = True) -> Optional[str]:
+        """
+        Refit the anomaly model on the reservoir of accepted projects
+
+        The reservoir only holds projects the served model accepted, so the new
+        model's threshold is set to reject just RETRAIN_REJECT_QUANTILE of them;
+        repeated retrains on stationary traffic keep the acceptance rate stable.
+        Fitting works on a snapshot of the reservoir, so validation keeps scoring
+        with the current model until the new one is swapped in.
+
+        Args:
+            min_samples: Skip the retrain while the reservoir holds fewer vectors
+            save: Whether to archive the new version and write it to model_path
+
+        Returns:
+            Version of the new model, or None if there were too few samples
+        """
+        with self._model_lock:
+            features_array = self.reservoir.snapshot()
+            if len(features_array) < min_samples:
+                logger.info(f"Skipping retrain: {len(features_array)} of {min_samples} samples collected")
+                return None
+            artifact = self._fit_artifact(features_array, source='reservoir',
+                                          reject_quantile=RETRAIN_REJECT_QUANTILE)
+            artifact.metadata['previous_version'] = self.model_version
+            artifact.metadata['reservoir_seen'] = self.reservoir.seen
+            self._install_artifact(artifact, save)
+            return artifact.version
+
+    def rollback(self, version: Optional[str] = None) -> str:
+        """
+        Serve an archived model version again
+
+        Args:
+            version: Version to restore; defaults to the one archived before the current model
+
+        Returns:
+            Version now being served
+        """
+        with self._model_lock:
+            if version is None:
+                versions = self.model_history.versions()
+                if self.model_version not in versions or versions.index(self.model_version) == 0:
+                    raise ValueError("No earlier model version to roll back to")
+                version = versions[versions.index(self.model_version) - 1]
+            artifact = self.model_history.load(version)
+            if not self._is_compatible(artifact):
+                raise ValueError(f"Model version {version} was trained on another feature schema")
+            save_model_artifact(artifact, self.model_path)
+            if not self.reload_model():
+                self._set_artifact(artifact)
+            logger.info(f"Rolled back anomaly model to {version}")
+            return version
+
+    def model_info(self) -> Dict:
+        """Served model version, archived versions and reservoir occupancy"""
+        artifact = self._artifact
+        return {
+            'version': artifact.version,
+            'trained_at': artifact.trained_at,
+            'n_samples': artifact.n_samples,
+            'source': artifact.metadata.get('source'),
+            'versions': self.model_history.versions(),
+            'reservoir': self.reservoir.stats(),
+        }
@@ -0,0 +1,10 @@
+import pytest
+from tests.stubs import make_bridge, make_chain
+
+@pytest.fixture
+def chain():
+    return make_chain()
+
+@pytest.fixture
+def bridge(chain, tmp_path):
+    return make_bridge(chain, tmp_path)
@@ -0,0 +1,383 @@
+"""
+In-process stand-ins for the Ethereum JSON-RPC node and the IPFS HTTP API
+
+StubChain implements the handful of JSON-RPC methods Web3Bridge uses against a
+ProjectNFT-like contract, with automining and per-sender nonce checks. It can be
+used directly as a web3 provider (StubProvider) or served over HTTP together
+with a stub IPFS API (start_stub_servers) for end-to-end tests and benchmarks.
+make_chain and make_bridge build the chain and bridge the unit tests share.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+from typing import Dict, List, Tuple
+
+import rlp
+from aiohttp import web
+from eth_abi import decode, encode
+from eth_account import Account
+from eth_utils import keccak, to_checksum_address
+from web3.providers.async_base import AsyncBaseProvider
+
+from utils.web3_bridge import Web3Bridge
+
+CHAIN_ID = 1337
+CONTRACT_ADDRESS = "0x5FbDB2315678afecb367f032d93F642f64180aa3"
+# Canonical Multicall3 deployment address
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+# Well-known first Hardhat/anvil development account
+VALIDATOR_PRIVATE_KEY = "0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80"
+# Next two Hardhat/anvil development accounts, owning the projects of make_chain
+OWNER_A = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+OWNER_B = "0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC"
+
+STATUS_UNVERIFIED, STATUS_UNDER_REVIEW, STATUS_VERIFIED = 0, 1, 2
+
+PROJECT_NFT_ABI = [
+    {"type": "function", "name": "verifyProjectStatus", "stateMutability": "nonpayable",
+     "inputs": [{"name": "projectId", "type": "uint256"}], "outputs": []},
+    {"type": "function", "name": "verifyProjectStatusBatch", "stateMutability": "nonpayable",
+     "inputs": [{"name": "projectIds", "type": "uint256[]"}], "outputs": []},
+    {"type": "function", "name": "getProjectStatus", "stateMutability": "view",
+     "inputs": [{"name": "projectId", "type": "uint256"}], "outputs": [{"name": "", "type": "uint8"}]},
+    {"type": "function", "name": "VALIDATOR_ROLE", "stateMutability": "view",
+     "inputs": [], "outputs": [{"name": "", "type": "bytes32"}]},
+    {"type": "function", "name": "hasRole", "stateMutability": "view",
+     "inputs": [{"name": "role", "type": "bytes32"}, {"name": "account", "type": "address"}],
+     "outputs": [{"name": "", "type": "bool"}]},
+    {"type": "event", "name": "ProjectRegistered", "anonymous": False,
+     "inputs": [{"name": "projectId", "type": "uint256", "indexed": True},
+                {"name": "owner", "type": "address", "indexed": True},
+                {"name": "metadataURI", "type": "string", "indexed": False}]},
+    {"type": "event", "name": "ProjectUpdated", "anonymous": False,
+     "inputs": [{"name": "projectId", "type": "uint256", "indexed": True},
+                {"name": "newMetadataURI", "type": "string", "indexed": False}]},
+    {"type": "event", "name": "ProjectVerified", "anonymous": False,
+     "inputs": [{"name": "projectId", "type": "uint256", "indexed": True}]},
+]
+
+
+def _selector(signature: str) -> bytes:
+    return keccak(text=signature)[:4]
+
+
+def _hex(value: int) -> str:
+    return hex(value)
+
+
+def write_abi_file(path: str) -> str:
+    """Write the stub ProjectNFT ABI in the artifact layout Web3Bridge reads"""
+    with open(path, 'w') as f:
+        json.dump({"abi": PROJECT_NFT_ABI}, f)
+    return path
+
+
+class StubChain:
+    def __init__(self, latency: float = 0.0, gas_price: int = 20_000_000_000, check_nonces: bool = True,
+                 multicall: bool = True):
+        """
+        Minimal automining chain hosting a single ProjectNFT contract
+
+        Args:
+            latency: Seconds to sleep before answering each request
+            gas_price: Value returned by eth_gasPrice
+            check_nonces: Reject transactions whose nonce is not the sender's next nonce
+            multicall: Serve Multicall3 aggregate3 calls at MULTICALL3_ADDRESS
+        """
+        self.latency = latency
+        self.gas_price = gas_price
+        self.check_nonces = check_nonces
+        self.multicall = multicall
+        self.block_number = 0
+        self.nonces: Dict[str, int] = {}
+        self.statuses: Dict[int, int] = {}
+        self.owners: Dict[int, str] = {}
+        self.receipts: Dict[str, Dict] = {}
+        self.logs: List[Dict] = []
+        self.calls: Dict[str, int] = {}
+        self.validator_role = keccak(text="VALIDATOR_ROLE")
+
+    def register_project(self, project_id: int, owner: str, metadata_uri: str = "ipfs://stub"):
+        """Mint a project directly, emitting the mint Transfer and ProjectRegistered in a new block"""
+        self.statuses[project_id] = STATUS_UNVERIFIED
+        self.owners[project_id] = to_checksum_address(owner)
+        self.block_number += 1
+        self._emit("Transfer(address,address,uint256)",
+                   [encode(["address"], ["0x" + "00" * 20]), encode(["address"], [owner]),
+                    encode(["uint256"], [project_id])], b"", "0x" + "00" * 32, 0)
+        self._emit("ProjectRegistered(uint256,address,string)",
+                   [encode(["uint256"], [project_id]), encode(["address"], [owner])],
+                   encode(["string"], [metadata_uri]), "0x" + "00" * 32, 0)
+
+    def transfer_project(self, project_id: int, new_owner: str):
+        """Transfer a project NFT directly, emitting Transfer in a new block"""
+        previous = self.owners[project_id]
+        self.owners[project_id] = to_checksum_address(new_owner)
+        self.block_number += 1
+        self._emit("Transfer(address,address,uint256)",
+                   [encode(["address"], [previous]), encode(["address"], [new_owner]),
+                    encode(["uint256"], [project_id])], b"", "0x" + "00" * 32, 0)
+
+    async def handle(self, method: str, params: List):
+        """Answer one JSON-RPC call; raises ValueError for RPC errors"""
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        handler = getattr(self, f"_rpc_{method}", None)
+        if handler is None:
+            raise ValueError(f"Method {method} not supported by stub")
+        return handler(*params)
+
+    def _rpc_eth_chainId(self):
+        return _hex(CHAIN_ID)
+
+    def _rpc_net_version(self):
+        return str(CHAIN_ID)
+
+    def _rpc_eth_blockNumber(self):
+        return _hex(self.block_number)
+
+    def _rpc_eth_gasPrice(self):
+        return _hex(self.gas_price)
+
+    def _rpc_eth_getTransactionCount(self, address, block="latest"):
+        return _hex(self.nonces.get(to_checksum_address(address), 0))
+
+    def _rpc_eth_estimateGas(self, transaction, block="latest"):
+        data = bytes.fromhex(transaction.get("data", "0x")[2:])
+        if any(project_id not in self.statuses for project_id in self._verified_ids(data)):
+            raise ValueError("execution reverted: Project does not exist")
+        return _hex(self._gas_for(data))
+
+    def _rpc_eth_call(self, transaction, block="latest"):
+        data = bytes.fromhex((transaction.get("data") or transaction.get("input", "0x"))[2:])
+        if self.multicall and to_checksum_address(transaction["to"]) == MULTICALL3_ADDRESS:
+            return "0x" + self._execute_multicall(data).hex()
+        return "0x" + self._execute_call(data).hex()
+
+    def _rpc_eth_sendRawTransaction(self, raw_hex):
+        raw = bytes.fromhex(raw_hex[2:])
+        nonce, _gas_price, gas, to, _value, data, _v, _r, _s = rlp.decode(raw)
+        sender = Account.recover_transaction(raw)
+        expected = self.nonces.get(sender, 0)
+        nonce = int.from_bytes(nonce, "big")
+        if self.check_nonces and nonce != expected:
+            raise ValueError(f"nonce too {'low' if nonce < expected else 'high'}: "
+                             f"expected {expected}, got {nonce}")
+        self.nonces[sender] = max(expected, nonce) + 1
+
+        tx_hash = "0x" + keccak(raw).hex()
+        self.block_number += 1
+        log_start = len(self.logs)
+        # Out-of-gas transactions revert
+        status = self._execute_transaction(data, tx_hash) if int.from_bytes(gas, "big") >= self._gas_for(data) else 0
+        self.receipts[tx_hash] = {
+            "transactionHash": tx_hash,
+            "transactionIndex": "0x0",
+            "blockHash": "0x" + keccak(self.block_number.to_bytes(32, "big")).hex(),
+            "blockNumber": _hex(self.block_number),
+            "from": sender,
+            "to": to_checksum_address(to),
+            "cumulativeGasUsed": _hex(self._gas_for(data)),
+            "gasUsed": _hex(self._gas_for(data)),
+            "effectiveGasPrice": _hex(self.gas_price),
+            "contractAddress": None,
+            "logs": self.logs[log_start:] if status else [],
+            "logsBloom": "0x" + "00" * 256,
+            "status": _hex(status),
+            "type": "0x0",
+        }
+        return tx_hash
+
+    def _rpc_eth_getTransactionReceipt(self, tx_hash):
+        return self.receipts.get(tx_hash)
+
+    def _rpc_eth_getLogs(self, filter_params):
+        from_block = int(filter_params.get("fromBlock", "0x0"), 16)
+        to_block = filter_params.get("toBlock", "latest")
+        to_block = self.block_number if to_block == "latest" else int(to_block, 16)
+        topics = (filter_params.get("topics") or [None])[0]
+        if isinstance(topics, str):
+            topics = [topics]
+        return [
+            log for log in self.logs
+            if from_block <= int(log["blockNumber"], 16) <= to_block
+            and (not topics or log["topics"][0] in topics)
+        ]
+
+    def _gas_for(self, data: bytes) -> int:
+        # Roughly a 21k base cost plus ~14k per verified project (storage write + event)
+        return 21_000 + 14_000 * max(1, len(self._verified_ids(data)))
+
+    def _verified_ids(self, data: bytes) -> List[int]:
+        selector, args = data[:4], data[4:]
+        if selector == _selector("verifyProjectStatus(uint256)"):
+            return list(decode(["uint256"], args))
+        if selector == _selector("verifyProjectStatusBatch(uint256[])"):
+            return list(decode(["uint256[]"], args)[0])
+        return []
+
+    def _execute_call(self, data: bytes) -> bytes:
+        selector, args = data[:4], data[4:]
+        if selector == _selector("getProjectStatus(uint256)"):
+            (project_id,) = decode(["uint256"], args)
+            if project_id not in self.statuses:
+                raise ValueError("execution reverted: Project does not exist")
+            return encode(["uint8"], [self.statuses[project_id]])
+        if selector == _selector("VALIDATOR_ROLE()"):
+            return encode(["bytes32"], [self.validator_role])
+        if selector == _selector("hasRole(bytes32,address)"):
+            return encode(["bool"], [True])
+        raise ValueError("execution reverted: unknown selector")
+
+    def _execute_multicall(self, data: bytes) -> bytes:
+        if data[:4] != _selector("aggregate3((address,bool,bytes)[])"):
+            raise ValueError("execution reverted: unknown selector")
+        (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+        results = []
+        for _target, allow_failure, call_data in calls:
+            try:
+                results.append((True, self._execute_call(call_data)))
+            except ValueError:
+                if not allow_failure:
+                    raise ValueError("execution reverted: Multicall3: call failed")
+                results.append((False, b""))
+        return encode(["(bool,bytes)[]"], [results])
+
+    def _execute_transaction(self, data: bytes, tx_hash: str) -> int:
+        project_ids = self._verified_ids(data)
+        if not project_ids:
+            return 0
+        if any(project_id not in self.statuses for project_id in project_ids):
+            return 0
+        for project_id in project_ids:
+            self.statuses[project_id] = STATUS_VERIFIED
+            self._emit("ProjectVerified(uint256)", [encode(["uint256"], [project_id])], b"", tx_hash, 0)
+        return 1
+
+    def _emit(self, signature: str, indexed: List[bytes], data: bytes, tx_hash: str, tx_index: int):
+        self.logs.append({
+            "address": CONTRACT_ADDRESS,
+            "topics": ["0x" + keccak(text=signature).hex()] + ["0x" + topic.hex() for topic in indexed],
+            "data": "0x" + data.hex(),
+            "blockNumber": _hex(self.block_number),
+            "blockHash": "0x" + keccak(self.block_number.to_bytes(32, "big")).hex(),
+            "transactionHash": tx_hash,
+            "transactionIndex": _hex(tx_index),
+            "logIndex": _hex(len(self.logs)),
+            "removed": False,
+        })
+
+    async def rpc_response(self, request: Dict) -> Dict:
+        """Build a JSON-RPC response object for one request object"""
+        try:
+            result = await self.handle(request["method"], request.get("params", []))
+            return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+        except ValueError as e:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32000, "message": str(e)}}
+
+
+class StubProvider(AsyncBaseProvider):
+    """web3 async provider answering directly from a StubChain"""
+
+    def __init__(self, chain: StubChain):
+        super().__init__()
+        self.chain = chain
+        self._request_id = 0
+
+    async def make_request(self, method, params):
+        self._request_id += 1
+        return await self.chain.rpc_response({"method": method, "params": params, "id": self._request_id})
+
+    async def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+def make_chain(n_projects: int = 20, latency: float = 0.0) -> StubChain:
+    """StubChain with projects 1..n_projects registered, odd IDs to OWNER_A and even ones to OWNER_B"""
+    chain = StubChain(latency=latency)
+    for project_id in range(1, n_projects + 1):
+        chain.register_project(project_id, OWNER_A if project_id % 2 else OWNER_B)
+    return chain
+
+
+def make_bridge(chain: StubChain, tmp_path, **kwargs) -> Web3Bridge:
+    """Web3Bridge talking to chain in-process, with the stub ABI written under tmp_path"""
+    return Web3Bridge(
+        rpc_url=None,
+        contract_address=CONTRACT_ADDRESS,
+        private_key=VALIDATOR_PRIVATE_KEY,
+        abi_path=write_abi_file(str(tmp_path / 'ProjectNFT.json')),
+        provider=StubProvider(chain),
+        **kwargs
+    )
+
+
+class StubIPFS:
+    def __init__(self, latency: float = 0.0, fail_requests: int = 0):
+        """
+        Content store behind a stub IPFS HTTP API
+
+        Args:
+            latency: Seconds to sleep before answering each add
+            fail_requests: Number of initial add requests answered with HTTP 500
+        """
+        self.latency = latency
+        self.fail_requests = fail_requests
+        self.objects: Dict[str, bytes] = {}
+        self.directories: Dict[str, List[str]] = {}
+        self.add_requests = 0
+
+    async def handle_add(self, request: web.Request) -> web.Response:
+        self.add_requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_requests:
+            self.fail_requests -= 1
+            return web.Response(status=500, text="stub failure")
+        raw_leaves = request.query.get("cid-version") == "1" and request.query.get("raw-leaves") == "true"
+        reader = await request.multipart()
+        entries = []
+        async for part in reader:
+            data = await part.read()
+            if raw_leaves:
+                cid = "b" + base64.b32encode(bytes([1, 0x55, 0x12, 0x20]) + hashlib.sha256(data).digest()
+                                             ).decode().lower().rstrip("=")
+            else:
+                cid = "stub" + hashlib.sha256(data).hexdigest()
+            self.objects[cid] = data
+            entries.append({"Name": part.filename or cid, "Hash": cid, "Size": str(len(data))})
+        if request.query.get("wrap-with-directory") == "true":
+            directory = "stubdir" + hashlib.sha256("".join(e["Hash"] for e in entries).encode()).hexdigest()
+            self.directories[directory] = [entry["Hash"] for entry in entries]
+            entries.append({"Name": "", "Hash": directory, "Size": "0"})
+        return web.Response(text="\n".join(json.dumps(entry) for entry in entries),
+                            content_type="application/json")
+
+
+async def start_stub_servers(chain: StubChain, ipfs: StubIPFS, host: str = "127.0.0.1"
+                             ) -> Tuple[web.AppRunner, str, str]:
+    """
+    Serve a StubChain as JSON-RPC and a StubIPFS as the IPFS HTTP API
+
+    Returns:
+        Tuple of (runner, rpc_url, ipfs_url); call runner.cleanup() to stop both
+    """
+    async def handle_rpc(request: web.Request) -> web.Response:
+        payload = await request.json()
+        if isinstance(payload, list):
+            return web.json_response([await chain.rpc_response(item) for item in payload])
+        return web.json_response(await chain.rpc_response(payload))
+
+    app = web.Application()
+    app.router.add_post("/", handle_rpc)
+    app.router.add_post("/api/v0/add", ipfs.handle_add)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://{host}:{port}"
+    return runner, base_url, base_url
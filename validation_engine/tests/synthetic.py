@@ -0,0 +1,108 @@
+"""
+Synthetic carbon projects matching the API's ProjectData schema
+
+Projects are drawn from seeded distributions so runs are reproducible at any
+scale. A configurable fraction breaks exactly one default rule (emission
+range, duration or data sources); the rest pass the rules and spread over
+the range the anomaly model sees.
+
+Write an export for the bulk CLI, from the validation_engine directory:
+
+    python -m tests.synthetic 1000000 -o projects.ndjson
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+import argparse
+import json
+import sys
+
+import numpy as np
+
+PROJECT_TYPES = ['reforestation', 'renewable_energy', 'methane_capture', 'cookstoves', 'blue_carbon']
+VERIFICATION_METHODS = ['AI + IoT + Satellite', 'Satellite', 'IoT', 'Manual']
+REQUIRED_SOURCES = ['sensor', 'satellite']
+OPTIONAL_SOURCES = ['oracle', 'drone', 'registry', 'lidar']
+EPOCH = datetime(2020, 1, 1)
+
+
+def _project(rng: np.random.Generator, token_id: int, invalid: bool) -> Dict:
+    start = EPOCH + timedelta(days=int(rng.integers(0, 5 * 365)))
+    duration_days = int(rng.integers(180, 3000))
+    emission_reduction = float(min(rng.lognormal(np.log(5000), 1.2), 900000))
+    data_sources = REQUIRED_SOURCES + list(rng.choice(OPTIONAL_SOURCES, int(rng.integers(0, 3)), replace=False))
+
+    if invalid:
+        broken = rng.integers(0, 3)
+        if broken == 0:
+            emission_reduction = float(rng.uniform(1.5e6, 5e6))
+        elif broken == 1:
+            duration_days = int(rng.integers(1, 29))
+        else:
+            data_sources = ['sensor']
+
+    additional_data = {
+        'project_type': str(rng.choice(PROJECT_TYPES)),
+        'verification_method': str(rng.choice(VERIFICATION_METHODS)),
+        'validator': 'Synthetic Generator',
+    }
+    if rng.random() < 0.6:
+        # 1-100 t/ha over the project's life
+        additional_data['area_hectares'] = round(emission_reduction / float(rng.lognormal(np.log(10), 1.0)), 1)
+
+    return {
+        'tokenId': token_id,
+        'estimated_emission_reduction': round(emission_reduction, 2),
+        'project_start_date': start.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'project_end_date': (start + timedelta(days=duration_days)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'location': {
+            'latitude': round(float(rng.uniform(-60, 70)), 4),
+            'longitude': round(float(rng.uniform(-180, 180)), 4),
+        },
+        'data_sources': [str(source) for source in data_sources],
+        'additional_data': additional_data,
+    }
+
+
+def iter_projects(n: int, seed: int = 0, invalid_fraction: float = 0.1, start_token_id: int = 0) -> Iterator[Dict]:
+    """
+    Lazily generate synthetic projects
+
+    Args:
+        n: Number of projects
+        seed: Random seed; the same seed yields the same projects
+        invalid_fraction: Share of projects that violate one rule
+        start_token_id: tokenId of the first project; IDs are consecutive
+
+    Yields:
+        ProjectData-shaped dicts
+    """
+    rng = np.random.default_rng(seed)
+    for i in range(n):
+        yield _project(rng, start_token_id + i, bool(rng.random() < invalid_fraction))
+
+
+def generate_projects(n: int, seed: int = 0, invalid_fraction: float = 0.1, start_token_id: int = 0) -> List[Dict]:
+    """Generate n synthetic projects as a list; see iter_projects"""
+    return list(iter_projects(n, seed, invalid_fraction, start_token_id))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="tests.synthetic", description="Write synthetic projects as NDJSON")
+    parser.add_argument("count", type=int, help="Number of projects")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON file (default: stdout)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--invalid-fraction", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for project in iter_projects(args.count, args.seed, args.invalid_fraction):
+            output.write(json.dumps(project) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
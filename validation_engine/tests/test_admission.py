@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from utils.admission import (
+    BULK,
+    INTERACTIVE,
+    AdmissionController,
+    AdmissionMiddleware,
+    Overloaded,
+    StageLimiter,
+    TokenBucketLimiter,
+)
+
+def test_slots_go_to_interactive_waiters_first():
+    """Test that a freed slot goes to the oldest interactive waiter before any bulk waiter"""
+    limiter = StageLimiter('cpu', concurrency=1, max_queue=10)
+    order = []
+
+    async def job(name, priority):
+        async with limiter.slot(priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    async def run():
+        async with limiter.slot(INTERACTIVE):
+            tasks = [asyncio.create_task(job(name, priority)) for name, priority in
+                     (('bulk-1', BULK), ('interactive-1', INTERACTIVE), ('bulk-2', BULK), ('interactive-2', INTERACTIVE))]
+            await asyncio.sleep(0)
+            assert limiter.stats()['queued'] == 4
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ['interactive-1', 'interactive-2', 'bulk-1', 'bulk-2']
+    assert limiter.stats()['active'] == 0
+
+def test_full_queue_is_refused_and_cancelled_waiters_leave():
+    """Test that requests beyond the queue bound fail fast and that cancelled waiters free their place"""
+    limiter = StageLimiter('io', concurrency=1, max_queue=1)
+
+    async def run():
+        async with limiter.slot() as waited:
+            assert waited == 0
+            waiter = asyncio.create_task(limiter.slot().__aenter__())
+            await asyncio.sleep(0)
+            with pytest.raises(Overloaded) as refused:
+                async with limiter.slot():
+                    pass
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            assert limiter.stats()['queued'] == 0
+        async with limiter.slot():
+            pass
+        return refused.value
+
+    refused = asyncio.run(run())
+    assert refused.reason == 'queue_full'
+    assert refused.retry_after > 0
+    assert limiter.stats()['active'] == 0
+    assert limiter.stats()['rejected'] == 1
+
+def test_token_bucket_limits_each_client():
+    """Test that a client is limited to its burst and that other clients are unaffected"""
+    controller = AdmissionController(cpu_concurrency=1, io_concurrency=1, max_queue=1, client_rate=1, client_burst=3)
+    controller.check_rate('a', cost=2)
+    controller.check_rate('a')
+    with pytest.raises(Overloaded) as limited:
+        controller.check_rate('a')
+    assert limited.value.reason == 'rate_limited'
+    assert 0 < limited.value.retry_after <= 1
+    controller.check_rate('b', cost=10)
+
+    unlimited = TokenBucketLimiter(rate=0, burst=1)
+    assert all(unlimited.take('a', cost=100) == 0 for _ in range(10))
+
+def test_middleware_counts_requests_not_yet_queued():
+    """Test that requests let through but not yet at the stage count against its slots and queue"""
+    controller = AdmissionController(cpu_concurrency=1, io_concurrency=1, max_queue=1)
+    release = asyncio.Event()
+    reached = []
+
+    async def app(scope, receive, send):
+        # Still reading and parsing: nothing has asked the stage for a slot yet
+        reached.append(scope["path"])
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = AdmissionMiddleware(app, lambda: controller, paths=["/validate-project"])
+
+    async def request(path="/validate-project"):
+        statuses = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        await middleware({"type": "http", "method": "POST", "path": path, "headers": []}, None, send)
+        return statuses[0]
+
+    async def run():
+        admitted = [asyncio.create_task(request()) for _ in range(2)]
+        await asyncio.sleep(0)
+        # Would wait for the release if it were let through
+        shed = await asyncio.wait_for(request(), timeout=1)
+        other = asyncio.create_task(request("/health"))
+        await asyncio.sleep(0)
+        release.set()
+        return shed, await asyncio.gather(*admitted), await other, await request()
+
+    shed, admitted, other, after = asyncio.run(run())
+    assert shed == 503
+    assert admitted == [200, 200] and other == 200 and after == 200
+    assert reached == ["/validate-project"] * 2 + ["/health", "/validate-project"]
+    assert controller.cpu.stats()["rejected"] == 1 and middleware.in_flight == 0
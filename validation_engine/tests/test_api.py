@@ -0,0 +1,317 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import httpx
+from tests.stubs import (
+    CONTRACT_ADDRESS,
+    OWNER_A,
+    VALIDATOR_PRIVATE_KEY,
+    StubChain,
+    StubIPFS,
+    start_stub_servers,
+    write_abi_file,
+)
+
+def configure_api(monkeypatch, tmp_path, rpc_url, ipfs_url):
+    """Point the API's components at the stub servers and keep their state under tmp_path"""
+    monkeypatch.setenv("ETHEREUM_RPC_URL", rpc_url)
+    monkeypatch.setenv("IPFS_API_URL", ipfs_url)
+    monkeypatch.setenv("PROJECT_NFT_CONTRACT_ADDRESS", CONTRACT_ADDRESS)
+    monkeypatch.setenv("VALIDATOR_PRIVATE_KEY", VALIDATOR_PRIVATE_KEY)
+    monkeypatch.setenv("PROJECT_NFT_ABI_PATH", write_abi_file(str(tmp_path / "ProjectNFT.json")))
+    monkeypatch.setenv("ANOMALY_MODEL_PATH", str(tmp_path / "model.joblib"))
+    monkeypatch.setenv("PROJECT_INDEX_PATH", str(tmp_path / "project_index.db"))
+    monkeypatch.setenv("IPFS_SPOOL_DIR", str(tmp_path / "ipfs_spool"))
+    monkeypatch.setenv("OVERLAP_INDEX_PATH", str(tmp_path / "overlap_index.db"))
+    monkeypatch.setenv("RESULT_STORE_PATH", str(tmp_path / "results.db"))
+
+def test_import_is_lazy():
+    """Test that importing the API builds no components and skips heavy imports"""
+    code = ("import sys, api; "
+            "assert not api.components._instances; "
+            "print(','.join(m for m in ('sklearn', 'web3', 'eth_keys') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            env=dict(os.environ, ETHEREUM_RPC_URL="http://127.0.0.1:1"))
+    assert result.stdout.strip() == ""
+
+def test_readiness_separate_from_health(tmp_path, monkeypatch):
+    """Test that /ready fails while the node is unreachable but /health stays up"""
+    import api
+
+    async def run():
+        runner, rpc_url, ipfs_url = await start_stub_servers(StubChain(), StubIPFS())
+        configure_api(monkeypatch, tmp_path, rpc_url, ipfs_url)
+
+        transport = httpx.ASGITransport(app=api.app)
+        async with api.lifespan(api.app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await api._warmup_task
+                ready = await client.get("/ready")
+                await runner.cleanup()
+                not_ready = await client.get("/ready")
+                health = await client.get("/health")
+        return ready, not_ready, health
+
+    ready, not_ready, health = asyncio.run(run())
+    assert ready.status_code == 200
+    assert ready.json()["checks"] == {"model": True, "ipfs_store": True, "verification_queue": True,
+                                      "project_indexer": True, "ethereum": True}
+    assert not_ready.status_code == 503
+    assert not_ready.json()["checks"]["ethereum"] == False
+    assert health.status_code == 200
+
+def test_serves_validation_without_chain_config(tmp_path, monkeypatch):
+    """Test that the API starts without chain settings, validates, and reports the chain workers down"""
+    import api
+    with open('tests/test_data.json', 'r') as f:
+        project = json.load(f)['invalid_project']
+
+    async def run():
+        runner, rpc_url, ipfs_url = await start_stub_servers(StubChain(), StubIPFS())
+        configure_api(monkeypatch, tmp_path, rpc_url, ipfs_url)
+        for name in ("ETHEREUM_RPC_URL", "PROJECT_NFT_CONTRACT_ADDRESS", "PROJECT_NFT_ABI_PATH"):
+            monkeypatch.delenv(name)
+
+        transport = httpx.ASGITransport(app=api.app)
+        try:
+            async with api.lifespan(api.app):
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    await api._warmup_task
+                    return (await client.get("/health"), await client.get("/ready"),
+                            await client.post("/validate-project", json=project))
+        finally:
+            await runner.cleanup()
+
+    health, ready, validation = asyncio.run(run())
+    assert health.status_code == 200
+    assert ready.status_code == 503
+    checks = ready.json()["checks"]
+    assert checks["model"] == True
+    assert checks["ipfs_store"] == True
+    assert checks["verification_queue"] == False
+    assert checks["project_indexer"] == False
+    assert "ETHEREUM_RPC_URL" in ready.json()["errors"]["verification_queue"]
+    assert set(ready.json()["errors"]) == {"verification_queue", "project_indexer"}
+    assert validation.status_code == 200
+    assert validation.json()["status"] == "REJECTED"
+
+def test_validation_is_idempotent(tmp_path, monkeypatch):
+    """Test that retried and concurrent identical requests share one validation, signature and job"""
+    import api
+    with open('tests/test_data.json', 'r') as f:
+        project = json.load(f)['valid_project']
+
+    async def run():
+        runner, rpc_url, ipfs_url = await start_stub_servers(StubChain(), StubIPFS())
+        configure_api(monkeypatch, tmp_path, rpc_url, ipfs_url)
+
+        transport = httpx.ASGITransport(app=api.app)
+        async with api.lifespan(api.app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                concurrent = await asyncio.gather(*(client.post("/validate-project", json=project)
+                                                    for _ in range(5)))
+                coalescer = api.components.request_coalescer.stats()
+                retried = await client.post("/validate-project", json=project)
+                batch = await client.post("/validate-projects", json=[project, project])
+                stored = await client.get(f"/validation/{project['tokenId']}")
+                missing = await client.get("/validation/999")
+                jobs = len(api.components.verification_queue.jobs)
+        await runner.cleanup()
+        return concurrent, coalescer, retried, batch, stored, missing, jobs
+
+    concurrent, coalescer, retried, batch, stored, missing, jobs = asyncio.run(run())
+    first = concurrent[0].json()
+    assert first["status"] == "VERIFIED"
+    assert all(response.json() == first for response in concurrent)
+    assert coalescer["started"] == 1
+    assert retried.json() == first
+    assert batch.json() == [first, first]
+    assert stored.json() == first
+    assert missing.status_code == 404
+    assert jobs == 1
+
+def test_telemetry_is_streamed_in_blocks(monkeypatch):
+    """Test that a chunked NDJSON upload is merged block by block and summarized per project"""
+    import api
+    monkeypatch.setattr(api, "TELEMETRY_BLOCK_BYTES", 256)
+    lines = [json.dumps({"tokenId": 7, "timestamp": 1699920000 + 3600 * i, "value": 1.0 + i % 2}).encode() + b"\n"
+             for i in range(48)]
+
+    async def chunks():
+        body = b"".join(lines)
+        for start in range(0, len(body), 100):
+            yield body[start:start + 100]
+
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                ingested = await client.post("/telemetry", content=chunks(),
+                                             headers={"Content-Type": "application/x-ndjson"})
+                telemetry = await client.get("/telemetry/7")
+                unknown = await client.get("/telemetry/8")
+                invalid = await client.post("/telemetry", content=b'{"tokenId": 7}\n')
+        finally:
+            await api.components.close()
+        return ingested, telemetry, unknown, invalid
+
+    ingested, telemetry, unknown, invalid = asyncio.run(run())
+    assert ingested.json() == {"received": 48, "accepted": 48}
+    summary = telemetry.json()["summary"]
+    assert summary["count"] == 48 and summary["mean"] == 1.5
+    assert [w["count"] for w in telemetry.json()["windows"]] == [24, 24]
+    assert unknown.status_code == 404
+    assert invalid.status_code == 422
+
+def test_admission_control_sheds_load(tmp_path, monkeypatch):
+    """Test that clients over their rate get 429 and a saturated pipeline gets 503, both with Retry-After"""
+    import api
+    with open('tests/test_data.json', 'r') as f:
+        project = json.load(f)['valid_project']
+    monkeypatch.setenv("CLIENT_RATE_LIMIT", "0.01")
+    monkeypatch.setenv("CLIENT_RATE_BURST", "1")
+    monkeypatch.setenv("ADMISSION_CPU_CONCURRENCY", "1")
+    monkeypatch.setenv("ADMISSION_MAX_QUEUE", "0")
+
+    async def run():
+        runner, rpc_url, ipfs_url = await start_stub_servers(StubChain(), StubIPFS())
+        configure_api(monkeypatch, tmp_path, rpc_url, ipfs_url)
+
+        transport = httpx.ASGITransport(app=api.app)
+        async with api.lifespan(api.app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                admitted = await client.post("/validate-project", json=project, headers={"X-Client-Id": "a"})
+                limited = await client.post("/validate-project", json=dict(project, tokenId=2),
+                                            headers={"X-Client-Id": "a"})
+                # Hold the only CPU slot, as a long validation would
+                async with api.components.admission.cpu.slot():
+                    shed = await client.post("/validate-project", json=dict(project, tokenId=3),
+                                             headers={"X-Client-Id": "b", "Origin": "https://app.example"})
+                stats = (await client.get("/admission/stats")).json()
+        await runner.cleanup()
+        return admitted, limited, shed, stats
+
+    admitted, limited, shed, stats = asyncio.run(run())
+    assert admitted.status_code == 200
+    assert float(admitted.headers["X-Queue-Wait-Ms"]) == 0
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+    assert shed.status_code == 503
+    assert int(shed.headers["Retry-After"]) >= 1
+    # CORS wraps admission, so browsers can read the 503 and its Retry-After
+    assert "access-control-allow-origin" in shed.headers
+    assert stats["cpu"]["rejected"] == 1 and stats["cpu"]["active"] == 0
+
+def test_msgpack_and_ndjson_content_negotiation(tmp_path, monkeypatch):
+    """Test that msgpack requests are accepted, responses follow Accept, and the IPFS content carries the signature"""
+    import api
+    import msgpack
+    from utils.serialization import canonical_json
+    from utils.signature_utils import ValidationSigner
+    with open('tests/test_data.json', 'r') as f:
+        project = json.load(f)['valid_project']
+
+    async def run():
+        ipfs = StubIPFS()
+        runner, rpc_url, ipfs_url = await start_stub_servers(StubChain(), ipfs)
+        configure_api(monkeypatch, tmp_path, rpc_url, ipfs_url)
+
+        transport = httpx.ASGITransport(app=api.app)
+        async with api.lifespan(api.app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                packed = await client.post("/validate-project", content=msgpack.packb(project),
+                                           headers={"Content-Type": "application/msgpack",
+                                                    "Accept": "application/msgpack"})
+                retried = await client.post("/validate-project", json=project)
+                batch = await client.post("/validate-projects", content=msgpack.packb([project, dict(project, tokenId=2)]),
+                                          headers={"Content-Type": "application/msgpack",
+                                                   "Accept": "application/x-ndjson"})
+                malformed = await client.post("/validate-project", content=b"\xc1",
+                                              headers={"Content-Type": "application/msgpack"})
+                invalid = await client.post("/validate-project", json=dict(project, tokenId="x"))
+        await runner.cleanup()
+        # Spooled results are uploaded on shutdown
+        return packed, retried, batch, malformed, invalid, ipfs.objects[retried.json()["ipfsHash"]]
+
+    packed, retried, batch, malformed, invalid, content = asyncio.run(run())
+    assert packed.status_code == 200
+    assert packed.headers["content-type"] == "application/msgpack"
+    first = msgpack.unpackb(packed.content)
+    assert first["status"] == "VERIFIED"
+    assert retried.headers["content-type"] == "application/json"
+    assert retried.json() == first
+    assert batch.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in batch.content.splitlines()]
+    assert lines[0] == first and lines[1]["projectId"] == 2
+    assert malformed.status_code == 422
+    assert invalid.status_code == 422 and invalid.json()["detail"][0]["loc"] == ["tokenId"]
+
+    # The signature covers exactly the canonical bytes stored in IPFS
+    record = json.loads(content)
+    assert canonical_json(record) == content
+    assert ValidationSigner(VALIDATOR_PRIVATE_KEY).verify(record, first["signature"]) == True
+
+def test_lost_verification_jobs_are_requeued(tmp_path, monkeypatch):
+    """Test that a stored response whose job failed or was lost in a restart gets a live job"""
+    import api
+    with open('tests/test_data.json', 'r') as f:
+        project = json.load(f)['valid_project']
+    chain = StubChain()
+
+    async def validate(client, path="/validate-project", body=project):
+        response = await client.post(path, json=body)
+        await api.components.verification_queue.join()
+        return response.json()
+
+    async def run():
+        runner, rpc_url, ipfs_url = await start_stub_servers(chain, StubIPFS())
+        configure_api(monkeypatch, tmp_path, rpc_url, ipfs_url)
+
+        transport = httpx.ASGITransport(app=api.app)
+        try:
+            async with api.lifespan(api.app):
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    # The project is not registered yet, so its verification reverts
+                    failed = await validate(client)
+                    failed_job = api.components.verification_queue.get_job(failed["jobId"]).status
+                    chain.register_project(project["tokenId"], OWNER_A)
+                    retried = await validate(client)
+                    retried_job = api.components.verification_queue.get_job(retried["jobId"]).status
+            async with api.lifespan(api.app):
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    restarted = await validate(client)
+                    batch = await validate(client, "/validate-projects", [project])
+                    job = (await client.get(f"/jobs/{retried['jobId']}")).json()
+        finally:
+            await runner.cleanup()
+        return failed, failed_job, retried, retried_job, restarted, batch, job
+
+    failed, failed_job, retried, retried_job, restarted, batch, job = asyncio.run(run())
+    assert failed_job == "failed"
+    assert retried["jobId"] != failed["jobId"]
+    assert retried["signature"] == failed["signature"]
+    assert retried_job == "confirmed"
+    assert chain.statuses[project["tokenId"]] == 2
+    # The confirmed job is recorded in the shared result store, so the restarted API keeps it
+    assert restarted == retried
+    assert batch == [retried]
+    assert job["status"] == "confirmed"
+
+def test_pending_jobs_of_other_workers_are_live(tmp_path, monkeypatch):
+    """Test that recorded jobs count as live while confirmed or recently updated, and not once failed or stale"""
+    import api
+    monkeypatch.setenv("RESULT_STORE_PATH", str(tmp_path / "results.db"))
+    statuses = {"queued-job": "queued", "submitted-job": "submitted", "confirmed-job": "confirmed",
+                "failed-job": "failed"}
+    try:
+        api.components.result_store.put_jobs([{"job_id": job_id, "project_id": 1, "status": status}
+                                              for job_id, status in statuses.items()])
+        live = api.live_job_ids(list(statuses) + ["unknown-job"])
+        monkeypatch.setattr(api, "JOB_LOST_AFTER", -1)
+        live_after_timeout = api.live_job_ids(list(statuses))
+    finally:
+        asyncio.run(api.components.close())
+    assert live == {"queued-job", "submitted-job", "confirmed-job"}
+    assert live_after_timeout == {"confirmed-job"}
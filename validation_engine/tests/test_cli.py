@@ -0,0 +1,134 @@
+import json
+import pandas as pd
+import pytest
+from cli import main, read_chunks
+from engine.overlap_index import OverlapIndex
+from engine.validation_engine import ValidationEngine
+from tests.synthetic import generate_projects
+
+@pytest.fixture
+def projects():
+    return generate_projects(50)
+
+@pytest.fixture
+def ndjson_path(projects, tmp_path):
+    path = tmp_path / 'projects.ndjson'
+    path.write_text("".join(json.dumps(project) + "\n" for project in projects))
+    return str(path)
+
+def read_results(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_validate_ndjson_matches_engine(projects, ndjson_path, tmp_path):
+    """Test that streamed results match validate_project, in input order"""
+    model_path = str(tmp_path / 'model.joblib')
+    output = str(tmp_path / 'results.ndjson')
+    assert main(['validate', ndjson_path, '-o', output, '--chunk-size', '7', '--workers', '2',
+                 '--model-path', model_path]) == 0
+
+    engine = ValidationEngine(model_path=model_path)
+    results = read_results(output)
+    assert [r['tokenId'] for r in results] == [p['tokenId'] for p in projects]
+    for project, result in zip(projects, results):
+        is_valid, reason, _ = engine.validate_project(project)
+        assert result['status'] == ("VERIFIED" if is_valid else "REJECTED")
+        assert result['reason'] == reason
+
+def test_resume_after_partial_output(projects, ndjson_path, tmp_path):
+    """Test that --resume continues after complete lines and drops a torn last line"""
+    model_path = str(tmp_path / 'model.joblib')
+    output = tmp_path / 'results.ndjson'
+    main(['validate', ndjson_path, '-o', str(output), '--workers', '1', '--model-path', model_path])
+    complete = output.read_text().splitlines(keepends=True)
+    expected = [(r['tokenId'], r['reason']) for r in read_results(output)]
+
+    output.write_text("".join(complete[:20]) + complete[20][:10])
+    main(['validate', ndjson_path, '-o', str(output), '--resume', '--workers', '1',
+          '--chunk-size', '8', '--model-path', model_path])
+    results = read_results(output)
+    assert [(r['tokenId'], r['reason']) for r in results] == expected
+    assert output.read_text().splitlines(keepends=True)[:20] == complete[:20]
+
+def test_resume_keeps_the_offset(projects, ndjson_path, tmp_path):
+    """Test that --resume continues from --offset plus the results already written"""
+    model_path = str(tmp_path / 'model.joblib')
+    output = tmp_path / 'results.ndjson'
+    main(['validate', ndjson_path, '-o', str(output), '--offset', '10', '--workers', '1', '--model-path', model_path])
+    expected = [(r['tokenId'], r['status'], r['reason']) for r in read_results(output)]
+    output.write_text("".join(line for line in output.read_text().splitlines(keepends=True)[:15]))
+    main(['validate', ndjson_path, '-o', str(output), '--offset', '10', '--resume', '--workers', '1',
+          '--model-path', model_path])
+    assert [(r['tokenId'], r['status'], r['reason']) for r in read_results(output)] == expected
+    assert [token_id for token_id, _, _ in expected] == [p['tokenId'] for p in projects[10:]]
+
+def test_malformed_lines_get_error_results(projects, tmp_path):
+    """Test that an undecodable line yields a rejected result in its place instead of aborting the run"""
+    path = tmp_path / 'projects.ndjson'
+    lines = [json.dumps(project) + "\n" for project in projects[:5]]
+    lines[2] = '{"tokenId": 3, "location": \n'
+    path.write_text("".join(lines))
+    output = str(tmp_path / 'results.ndjson')
+    assert main(['validate', str(path), '-o', output, '--workers', '1',
+                 '--model-path', str(tmp_path / 'model.joblib')]) == 0
+
+    results = read_results(output)
+    assert [r['tokenId'] for r in results] == [projects[0]['tokenId'], projects[1]['tokenId'], None,
+                                              projects[3]['tokenId'], projects[4]['tokenId']]
+    assert results[2]['status'] == "REJECTED"
+    assert results[2]['reason'].startswith("Validation error: Malformed JSON on line 3")
+    assert [r['status'] for r in results[:2] + results[3:]] == ["VERIFIED"] * 4
+
+def test_overlap_checks_use_only_the_given_index(tmp_path):
+    """Test that duplicates are rejected only against --overlap-index, whatever the workers and chunking"""
+    with open('tests/test_data.json') as f:
+        original = json.load(f)['valid_project']
+    model_path = str(tmp_path / 'model.joblib')
+    index_path = str(tmp_path / 'overlap.db')
+    engine = ValidationEngine(model_path=model_path, overlap_index=OverlapIndex(index_path))
+    engine.validate_project(original)
+    engine.confirm_verified([original['tokenId']])
+    engine.overlap_index.close()
+
+    path = tmp_path / 'projects.ndjson'
+    path.write_text("".join(json.dumps(dict(original, tokenId=token_id)) + "\n" for token_id in (2, 3, 4)))
+    outputs = []
+    for workers, chunk_size in (('1', '3'), ('2', '1')):
+        output = str(tmp_path / f'results-{workers}.ndjson')
+        main(['validate', str(path), '-o', output, '--workers', workers, '--chunk-size', chunk_size,
+              '--model-path', model_path])
+        outputs.append([r['status'] for r in read_results(output)])
+        main(['validate', str(path), '-o', output, '--workers', workers, '--chunk-size', chunk_size,
+              '--model-path', model_path, '--overlap-index', index_path])
+        outputs.append([(r['status'], r['validation_details'].get('overlapping_projects'))
+                        for r in read_results(output)])
+
+    assert outputs[0] == outputs[2] == ["VERIFIED"] * 3
+    assert outputs[1] == outputs[3] == [("REJECTED", [original['tokenId']])] * 3
+    # The index is only read
+    assert len(OverlapIndex(index_path)) == 1
+
+def test_read_csv_and_parquet(projects, tmp_path):
+    """Test that CSV (JSON-encoded nested cells) and Parquet exports stream the same records"""
+    csv_path = tmp_path / 'projects.csv'
+    frame = pd.DataFrame(projects)
+    encoded = frame.copy()
+    encoded['location'] = encoded['location'].map(json.dumps)
+    # Quoted cells spanning several lines and blank lines between records; the offset counts records
+    encoded['additional_data'] = encoded['additional_data'].map(lambda data: json.dumps(data, indent=2))
+    encoded['data_sources'] = encoded['data_sources'].map(';'.join)
+    encoded.to_csv(csv_path, index=False, lineterminator='\n\n')
+
+    csv_records = [record for chunk in read_chunks(str(csv_path), chunk_size=16, offset=10) for record in chunk]
+    assert [r['tokenId'] for r in csv_records] == list(range(10, 50))
+    assert csv_records[0]['data_sources'] == projects[10]['data_sources']
+    assert csv_records[0]['location'] == projects[10]['location']
+    assert csv_records[0]['additional_data'] == projects[10]['additional_data']
+
+    pytest.importorskip('pyarrow')
+    parquet_path = tmp_path / 'projects.parquet'
+    frame.to_parquet(parquet_path, row_group_size=12)
+    parquet_records = [record for chunk in read_chunks(str(parquet_path), chunk_size=16, offset=30)
+                       for record in chunk]
+    assert [r['tokenId'] for r in parquet_records] == list(range(30, 50))
+    assert parquet_records[0]['data_sources'] == projects[30]['data_sources']
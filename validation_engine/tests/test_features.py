@@ -0,0 +1,85 @@
+import json
+import numpy as np
+from engine.features import FEATURE_NAMES, N_FEATURES, SpatialGrid, build_features, project_columns
+from engine.model_store import load_model_artifact, save_model_artifact
+from engine.parsed_project import ParsedProject
+from engine.validation_engine import ValidationEngine
+
+with open('tests/test_data.json', 'r') as f:
+    test_data = json.load(f)
+
+def _features(projects, grid=None):
+    columns = project_columns([ParsedProject.from_dict(p) for p in projects])
+    density = (grid or SpatialGrid()).density(columns['latitude'], columns['longitude'])
+    return build_features(density=density, **columns)
+
+def test_fixed_schema_with_missing_fields():
+    """Test that missing or malformed optional fields keep the vector length and set indicators"""
+    full = dict(test_data['valid_project'])
+    full['additional_data'] = dict(full['additional_data'], area_hectares=250)
+    bare = {key: value for key, value in test_data['valid_project'].items()
+            if key not in ('location', 'additional_data')}
+    malformed = dict(test_data['valid_project'], location={'latitude': 'north', 'longitude': 500})
+
+    features = _features([full, bare, malformed])
+    assert features.shape == (3, N_FEATURES)
+    column = {name: i for i, name in enumerate(FEATURE_NAMES)}
+    assert features[:, column['has_location']].tolist() == [1, 0, 0]
+    assert features[:, column['has_area']].tolist() == [1, 0, 0]
+    assert features[0, column['reduction_per_hectare']] > 0
+    assert features[0, column['project_type_reforestation']] == 1
+    assert features[1, column['project_type_other']] == 1
+    assert features[:, 10:].sum(axis=1).tolist() == [1, 1, 1]
+
+def test_spatial_density_counts_neighbouring_cells():
+    """Test that density counts the 3x3 cell neighbourhood, identically for small and large batches"""
+    grid = SpatialGrid(cell_size=0.1)
+    grid.add_many(np.array([10.05] * 5 + [10.15, 10.45]), np.array([20.05] * 5 + [20.15, 20.05]))
+    assert len(grid) == 7
+
+    latitude = np.array([10.05, 10.15, 10.45, -40.0, np.nan])
+    longitude = np.array([20.05, 20.05, 20.05, 20.0, 20.0])
+    assert grid.density(latitude, longitude).tolist() == [6, 6, 1, 0, 0]
+
+    # Large batches use the sorted snapshot instead of dict lookups
+    repeated = grid.density(np.tile(latitude, 20), np.tile(longitude, 20))
+    assert repeated.tolist() == [6, 6, 1, 0, 0] * 20
+
+    # Removing locations bumps the version and invalidates the snapshot
+    version = grid.version
+    grid.add_many(np.array([10.05, 10.45]), np.array([20.05, 20.05]), count=-1)
+    assert grid.version > version
+    assert len(grid) == 5
+    assert grid.density(np.tile(latitude, 20), np.tile(longitude, 20)).tolist() == [5, 5, 0, 0, 0] * 20
+
+def test_update_model_on_heterogeneous_data(tmp_path):
+    """Test that update_model fits on projects with missing optional fields and skips unparseable ones"""
+    engine = ValidationEngine(model_path=str(tmp_path / 'model.joblib'))
+    projects = []
+    for i in range(40):
+        project = dict(test_data['valid_project'], estimated_emission_reduction=1000.0 + i * 100)
+        if i % 3 == 0:
+            del project['location']
+        if i % 4 == 0:
+            del project['additional_data']
+        projects.append(project)
+    projects.append({'tokenId': 99})
+
+    version = engine.update_model(projects)
+    assert engine.model_version == version
+    assert engine.model_n_features == N_FEATURES
+    is_valid, _, _ = engine.validate_project(test_data['valid_project'])
+    assert is_valid == True
+
+def test_model_of_old_feature_schema_is_replaced(tmp_path):
+    """Test that an artifact trained on another feature schema is not served"""
+    path = str(tmp_path / 'model.joblib')
+    engine = ValidationEngine(model_path=path)
+    engine.update_model([test_data['valid_project']] * 10)
+    artifact = load_model_artifact(path)
+    artifact.metadata['feature_schema'] = 1
+    save_model_artifact(artifact, path)
+
+    reloaded = ValidationEngine(model_path=path)
+    assert reloaded.model_version != artifact.version
+    assert reloaded.model_info()['source'] == 'bootstrap'
@@ -0,0 +1,35 @@
+import numpy as np
+from sklearn.ensemble import IsolationForest
+from engine.features import bootstrap_columns, build_features
+from engine.flat_forest import FlatIsolationForest
+from engine.model_store import ModelArtifact, load_model_artifact, save_model_artifact
+
+def test_scores_match_sklearn():
+    """Test that the flattened forest scores exactly like the sklearn model, with and without feature subsampling"""
+    train = build_features(**bootstrap_columns(2000))
+    test = build_features(**bootstrap_columns(5000, seed=7))
+    for model in (IsolationForest(contamination=0.1, random_state=42),
+                  IsolationForest(max_features=0.5, random_state=1)):
+        model.fit(train)
+        flat = FlatIsolationForest.from_sklearn(model)
+        assert np.allclose(flat.decision_function(test), model.decision_function(test), rtol=0, atol=1e-12)
+        assert (flat.predict(test) == model.predict(test)).all()
+        assert np.allclose(flat.decision_function(test[:1]), model.decision_function(test[:1]), rtol=0, atol=1e-12)
+
+def test_artifact_arrays_are_memory_mapped(tmp_path):
+    """Test that a saved artifact loads with its tree arrays mapped from the file, and old sklearn artifacts still load"""
+    features = build_features(**bootstrap_columns(500))
+    model = IsolationForest(random_state=0).fit(features)
+    path = str(tmp_path / 'model.joblib')
+    save_model_artifact(ModelArtifact(model=FlatIsolationForest.from_sklearn(model), version='v1', trained_at='',
+                                      n_samples=500, n_features=features.shape[1]), path)
+
+    mapped = load_model_artifact(path, mmap_mode='r').model
+    assert isinstance(mapped.children.base, np.memmap)
+    assert type(mapped.children) is np.ndarray
+    assert np.allclose(mapped.decision_function(features), model.decision_function(features), rtol=0, atol=1e-12)
+
+    # An artifact pickled with the sklearn model is flattened on load
+    save_model_artifact(ModelArtifact(model=model, version='v0', trained_at='', n_samples=500,
+                                      n_features=features.shape[1]), path)
+    assert isinstance(load_model_artifact(path).model, FlatIsolationForest)
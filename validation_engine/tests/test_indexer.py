@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from tests.stubs import OWNER_A, OWNER_B, STATUS_VERIFIED, make_bridge
+from utils.indexer import ProjectIndex, ProjectIndexer
+
+@pytest.fixture
+def index(tmp_path):
+    index = ProjectIndex(str(tmp_path / 'project_index.db'))
+    yield index
+    index.close()
+
+@pytest.fixture
+def bridge(chain, index, tmp_path):
+    return make_bridge(chain, tmp_path, project_index=index)
+
+def test_sync_indexes_events_in_chunks(bridge, chain, index):
+    """Test that registrations and verifications are mirrored through chunked eth_getLogs"""
+    asyncio.run(bridge.verify_projects([3, 4, 5]))
+    indexer = ProjectIndexer(bridge, index, chunk_size=4)
+    asyncio.run(indexer.sync())
+
+    assert index.last_block == chain.block_number
+    assert chain.calls['eth_getLogs'] > 1
+    assert index.count() == 20
+    assert [p['projectId'] for p in bridge.list_projects(status="Verified")] == [3, 4, 5]
+    assert [p['projectId'] for p in bridge.list_projects(owner=OWNER_B, limit=3)] == [2, 4, 6]
+    assert [p['projectId'] for p in bridge.list_projects(owner=OWNER_B, limit=3, after=6)] == [8, 10, 12]
+
+def test_sync_resumes_from_last_block(bridge, chain, index, tmp_path):
+    """Test that a restarted indexer only scans blocks after the stored position"""
+    asyncio.run(ProjectIndexer(bridge, index).sync())
+    chain.register_project(21, OWNER_A)
+    chain.statuses[21] = STATUS_VERIFIED
+    chain._emit("ProjectVerified(uint256)", [(21).to_bytes(32, 'big')], b"", "0x" + "00" * 32, 0)
+
+    reopened = ProjectIndex(index.path)
+    applied = asyncio.run(ProjectIndexer(bridge, reopened).sync())
+    # Mint Transfer, ProjectRegistered and ProjectVerified
+    assert applied == 3
+    assert reopened.get_status(21) == STATUS_VERIFIED
+    reopened.close()
+
+def test_statuses_served_from_index(bridge, chain, index):
+    """Test that indexed projects are answered without RPC and own verifications apply immediately"""
+    asyncio.run(ProjectIndexer(bridge, index).sync())
+    calls = chain.calls.get('eth_call', 0)
+    statuses = asyncio.run(bridge.get_project_statuses(list(range(1, 21))))
+    assert set(statuses.values()) == {"Unverified"}
+    assert chain.calls.get('eth_call', 0) == calls
+
+    asyncio.run(bridge.verify_project(7))
+    assert asyncio.run(bridge.get_project_status(7)) == "Verified"
+    assert chain.calls.get('eth_call', 0) == calls
+
+def test_transfers_update_the_owner(bridge, chain, index):
+    """Test that ERC721 transfers move a project to its new holder's listing"""
+    asyncio.run(ProjectIndexer(bridge, index).sync())
+    chain.transfer_project(1, OWNER_B)
+    asyncio.run(ProjectIndexer(bridge, index).sync())
+
+    assert 1 not in [p['projectId'] for p in bridge.list_projects(owner=OWNER_A)]
+    assert [p['projectId'] for p in bridge.list_projects(owner=OWNER_B, limit=2)] == [1, 2]
+    assert bridge.list_projects(owner=OWNER_B, limit=1)[0]['owner'] == OWNER_B
+    assert index.count() == 20
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import os
+import pytest
+from tests.stubs import StubChain, StubIPFS, start_stub_servers
+from utils.ipfs_client import AsyncIPFSClient, compute_cid, multiaddr_to_url
+from utils.ipfs_store import IPFSWriteBehindStore
+
+def test_multiaddr_to_url():
+    """Test conversion of IPFS API multiaddrs to HTTP URLs"""
+    assert multiaddr_to_url("/ip4/127.0.0.1/tcp/5001") == "http://127.0.0.1:5001"
+    assert multiaddr_to_url("/dns/ipfs.example.com/tcp/443/https") == "https://ipfs.example.com:443"
+    assert multiaddr_to_url("http://localhost:5001/") == "http://localhost:5001"
+    with pytest.raises(ValueError):
+        multiaddr_to_url("/unix/tmp/ipfs.sock")
+
+def test_add_json_encodes_once():
+    """Test that add_json stores the JSON document itself, not a JSON-encoded string"""
+    async def run():
+        ipfs = StubIPFS()
+        runner, _, ipfs_url = await start_stub_servers(StubChain(), ipfs)
+        client = AsyncIPFSClient(ipfs_url)
+        try:
+            cid = await client.add_json({"projectId": 1, "status": "VERIFIED"})
+        finally:
+            await client.close()
+            await runner.cleanup()
+        return json.loads(ipfs.objects[cid])
+
+    assert asyncio.run(run()) == {"projectId": 1, "status": "VERIFIED"}
+
+def test_compute_cid_matches_known_value():
+    """Test the CIDv1 raw-leaf CID of the empty block"""
+    assert compute_cid(b"") == "bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku"
+
+def test_write_behind_store_batches_and_dedupes(tmp_path):
+    """Test that results are addressed locally, deduplicated and uploaded as one directory"""
+    async def run():
+        ipfs = StubIPFS()
+        runner, _, ipfs_url = await start_stub_servers(StubChain(), ipfs)
+        client = AsyncIPFSClient(ipfs_url)
+        store = IPFSWriteBehindStore(client, str(tmp_path / 'spool'), flush_interval=60)
+        try:
+            cids = [await store.put_json({"projectId": i % 5}) for i in range(10)]
+            assert store.pending() == 5
+            assert ipfs.add_requests == 0
+            assert await store.flush() == 5
+        finally:
+            await client.close()
+            await runner.cleanup()
+        return ipfs, store, cids
+
+    ipfs, store, cids = asyncio.run(run())
+    assert ipfs.add_requests == 1
+    assert store.deduplicated == 5
+    assert ipfs.directories[store.last_directory] == cids[:5]
+    assert json.loads(ipfs.objects[cids[3]]) == {"projectId": 3}
+    assert os.listdir(tmp_path / 'spool') == []
+
+def test_write_behind_store_retries_and_survives_restart(tmp_path):
+    """Test that spooled results are kept across failures and restarts"""
+    async def run():
+        ipfs = StubIPFS(fail_requests=1)
+        runner, _, ipfs_url = await start_stub_servers(StubChain(), ipfs)
+        client = AsyncIPFSClient(ipfs_url)
+        try:
+            store = IPFSWriteBehindStore(client, str(tmp_path / 'spool'))
+            cid = await store.put_json({"projectId": 1})
+            with pytest.raises(Exception):
+                await store.flush()
+
+            # A new store picks up the spool and uploads it from the background task
+            restarted = IPFSWriteBehindStore(client, str(tmp_path / 'spool'), flush_interval=0.05)
+            assert restarted.pending() == 1
+            await restarted.start()
+            while restarted.pending():
+                await asyncio.sleep(0.01)
+            await restarted.stop()
+        finally:
+            await client.close()
+            await runner.cleanup()
+        return ipfs, cid
+
+    ipfs, cid = asyncio.run(run())
+    assert cid in ipfs.objects
+
+def test_write_behind_store_keeps_files_stored_under_another_cid(tmp_path):
+    """Test that a file the node addresses differently is counted, reported and kept in the spool"""
+    async def run():
+        ipfs = StubIPFS()
+        runner, _, ipfs_url = await start_stub_servers(StubChain(), ipfs)
+        client = AsyncIPFSClient(ipfs_url)
+        store = IPFSWriteBehindStore(client, str(tmp_path / 'spool'), flush_interval=60)
+        add_directory = client.add_directory
+
+        async def add_rechunked(files):
+            directory, file_cids = await add_directory(files)
+            return directory, dict(file_cids, **{files[0][0]: "bafyrechunked"})
+
+        client.add_directory = add_rechunked
+        try:
+            cids = [await store.put_json({"projectId": i}) for i in range(3)]
+            with pytest.raises(ValueError, match="bafyrechunked"):
+                await store.flush()
+            restarted = IPFSWriteBehindStore(client, str(tmp_path / 'spool'))
+        finally:
+            await client.close()
+            await runner.cleanup()
+        return store, restarted, cids
+
+    store, restarted, cids = asyncio.run(run())
+    assert store.stats()["uploaded"] == 2 and store.stats()["failed"] == 1
+    assert store.pending() == 0 and restarted.pending() == 0
+    assert os.listdir(tmp_path / 'spool') == [cids[0] + ".mismatch"]
+
+def test_write_behind_store_adds_large_content_as_cidv1(tmp_path):
+    """Test that content too large for one raw block is added with the batch uploads' CID options"""
+    async def run():
+        ipfs = StubIPFS()
+        runner, _, ipfs_url = await start_stub_servers(StubChain(), ipfs)
+        client = AsyncIPFSClient(ipfs_url)
+        store = IPFSWriteBehindStore(client, str(tmp_path / 'spool'))
+        try:
+            cid = await store.put_bytes(b"x" * (1024 * 1024))
+        finally:
+            await client.close()
+            await runner.cleanup()
+        return ipfs, store, cid
+
+    ipfs, store, cid = asyncio.run(run())
+    # The stub assigns CIDv1 raw-leaf CIDs only when asked for them
+    assert cid.startswith("b") and cid in ipfs.objects
+    assert store.pending() == 0
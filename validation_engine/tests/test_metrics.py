@@ -0,0 +1,133 @@
+import asyncio
+import json
+import os
+import threading
+import httpx
+from engine.validation_engine import ValidationEngine
+from utils.profiler import ProfilingMiddleware, bind_to_request
+
+with open('tests/test_data.json', 'r') as f:
+    test_data = json.load(f)
+
+def _busy_app():
+    async def app(scope, receive, send):
+        await receive()
+        # Burn CPU in a worker thread, as the API does for validation
+        def work():
+            total = 0
+            for i in range(300000):
+                total += i * i
+            return total
+        result = await asyncio.get_running_loop().run_in_executor(None, bind_to_request(work))
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": str(result).encode()})
+    return app
+
+def test_metrics_endpoint_exposes_stages_and_verdicts(tmp_path):
+    """Test that /metrics reports stage histograms and verdict counters after validations"""
+    import api
+
+    engine = ValidationEngine(model_path=str(tmp_path / 'anomaly_model.joblib'))
+    engine.validate_project(test_data['valid_project'])
+    engine.validate_project(test_data['invalid_project'])
+
+    async def scrape():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/metrics")
+
+    response = asyncio.run(scrape())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    for stage in ("validate", "parse", "rules", "features", "ml_scoring"):
+        assert f'validation_stage_seconds_count{{stage="{stage}"}}' in response.text
+    assert 'validation_verdicts_total{verdict="verified"}' in response.text
+    assert 'validation_rejections_total{reason="rule"}' in response.text
+    assert 'validation_model_info{' in response.text
+
+def test_profile_header_writes_folded_stacks(tmp_path):
+    """Test that only requests with the matching X-Profile header are profiled"""
+    app = ProfilingMiddleware(_busy_app(), token="secret", output_dir=str(tmp_path))
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            plain = await client.get("/work")
+            wrong = await client.get("/work", headers={"X-Profile": "guess"})
+            profiled = await client.get("/work", headers={"X-Profile": "secret"})
+        return plain, wrong, profiled
+
+    plain, wrong, profiled = asyncio.run(run())
+    assert "x-profile-id" not in plain.headers
+    assert "x-profile-id" not in wrong.headers
+    profile_id = profiled.headers["x-profile-id"]
+    assert str(tmp_path) not in profile_id
+    assert os.listdir(tmp_path) == [f"{profile_id}.folded"]
+
+    with open(tmp_path / f"{profile_id}.folded") as f:
+        lines = f.read().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("work (test_metrics.py" in line for line in lines)
+
+def test_profile_excludes_other_requests_and_threads(tmp_path):
+    """Test that a profile samples only its request, not concurrent requests or unrelated threads"""
+    busy_app = _busy_app()
+    stop = threading.Event()
+
+    def unrelated_work():
+        while not stop.is_set():
+            sum(i * i for i in range(1000))
+
+    def other_request_work():
+        return sum(i * i for i in range(300000))
+
+    def other_request_loop_work():
+        return sum(i * i for i in range(100000))
+
+    async def routed_app(scope, receive, send):
+        if scope["path"] == "/work":
+            return await busy_app(scope, receive, send)
+        await receive()
+        # Both the event loop and the worker thread run code of this request
+        other_request_loop_work()
+        await asyncio.get_running_loop().run_in_executor(None, bind_to_request(other_request_work))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    app = ProfilingMiddleware(routed_app, token="secret", output_dir=str(tmp_path))
+
+    async def run():
+        thread = threading.Thread(target=unrelated_work)
+        thread.start()
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(client.get("/work", headers={"X-Profile": "secret"}),
+                                            *(client.get("/other") for _ in range(3)))
+        finally:
+            stop.set()
+            thread.join()
+
+    profiled = asyncio.run(run())[0]
+    with open(tmp_path / f"{profiled.headers['x-profile-id']}.folded") as f:
+        folded = f.read()
+    assert "work (test_metrics.py" in folded
+    assert "unrelated_work" not in folded
+    assert "other_request_loop_work" not in folded
+    assert "other_request_work" not in folded
+
+def test_profiling_disabled_without_token(tmp_path):
+    """Test that the middleware passes requests straight through when no token is configured"""
+    app = ProfilingMiddleware(_busy_app(), token=None, output_dir=str(tmp_path))
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/work", headers={"X-Profile": ""})
+
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert os.listdir(tmp_path) == []
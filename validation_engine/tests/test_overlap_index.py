@@ -0,0 +1,117 @@
+import json
+import time
+from engine.overlap_index import OverlapIndex, footprint_radius
+from engine.validation_engine import ValidationEngine
+
+with open('tests/test_data.json', 'r') as f:
+    test_data = json.load(f)
+
+# Footprints as (token_id, latitude, longitude, radius_m, start_day, end_day)
+BASE = (1, -3.1190, -60.0217, 500.0, 19358.0, 19722.0)
+
+def test_query_matches_distance_and_dates(tmp_path):
+    """Test that overlaps need both intersecting circles and intersecting date ranges"""
+    index = OverlapIndex(str(tmp_path / 'overlap.db'))
+    index.insert_many([BASE])
+    _, latitude, longitude, radius, start, end = BASE
+
+    # ~890 m north: circles of 500 m each intersect
+    assert index.query(latitude + 0.008, longitude, 500.0, start, end) == [1]
+    # ~1.1 km north: they don't
+    assert index.query(latitude + 0.01, longitude, 500.0, start, end) == []
+    # Same place, later period
+    assert index.query(latitude, longitude, 500.0, end, end + 365) == []
+    assert index.query(latitude, longitude, 500.0, end - 1, end + 365) == [1]
+    # A project never overlaps itself
+    assert index.query(latitude, longitude, 500.0, start, end, exclude_token_id=1) == []
+
+def test_index_is_persisted(tmp_path):
+    """Test that the index is rebuilt from disk and that identical re-inserts change nothing"""
+    path = str(tmp_path / 'overlap.db')
+    index = OverlapIndex(path)
+    elsewhere = (3, 48.85, 2.35) + BASE[3:]
+    assert index.insert_many([BASE, elsewhere]) == [(BASE, None), (elsewhere, None)]
+    assert index.insert_many([BASE]) == []
+    moved = (3, 48.86, 2.35) + BASE[3:]
+    assert index.insert_many([moved]) == [(moved, elsewhere)]
+    index.close()
+
+    reloaded = OverlapIndex(path)
+    assert len(reloaded) == 2
+    assert reloaded.query(*BASE[1:], exclude_token_id=2) == [1]
+    reloaded.remove(1)
+    assert reloaded.query(*BASE[1:]) == []
+
+def test_large_footprints_are_found_from_any_cell(tmp_path):
+    """Test that a footprint too large for per-cell bucketing is still matched"""
+    index = OverlapIndex(":memory:")
+    radius = footprint_radius(50000000)  # 50 Mha, ~400 km
+    index.insert_many([(7, 0.0, 20.0, radius, 0.0, 100.0)])
+    assert index.query(2.0, 21.0, 100.0, 10.0, 20.0) == [7]
+    assert index.query(10.0, 30.0, 100.0, 10.0, 20.0) == []
+
+def test_engine_rejects_duplicate_claims(tmp_path):
+    """Test that a second token claiming the land of a verified project is rejected, in single and batch validation"""
+    engine = ValidationEngine(model_path=str(tmp_path / 'model.joblib'))
+    original = test_data['valid_project']
+    duplicate = dict(original, tokenId=2)
+
+    assert engine.validate_project(original)[0] == True
+    # An accepted project blocks nothing until its verification is confirmed on chain
+    assert engine.validate_project(duplicate)[0] == True
+    assert len(engine.overlap_index) == 0
+    assert engine.confirm_verified([1]) == 1
+    # Revalidating the same token is not a duplicate
+    assert engine.validate_project(original)[0] == True
+    is_valid, reason, details = engine.validate_project(duplicate)
+    assert is_valid == False
+    assert "overlap" in reason
+    assert details['overlapping_projects'] == [1]
+
+    results = engine.validate_batch([original, duplicate, dict(original, tokenId=3, location={
+        'latitude': 51.5, 'longitude': -0.12})])
+    assert [result[0] for result in results] == [True, False, True]
+    assert results[1][2]['overlapping_projects'] == [1]
+
+def test_flag_policy_accepts_with_details(tmp_path):
+    """Test that the flag policy accepts overlapping projects but reports them"""
+    engine = ValidationEngine(model_path=str(tmp_path / 'model.joblib'), overlap_policy='flag')
+    engine.validate_project(test_data['valid_project'])
+    engine.confirm_verified([1])
+    is_valid, _, details = engine.validate_project(dict(test_data['valid_project'], tokenId=2))
+    assert is_valid == True
+    assert details['overlapping_projects'] == [1]
+
+def test_engines_sharing_an_index_see_each_others_confirmations(tmp_path):
+    """Test that a footprint confirmed by one worker blocks duplicates in another without a restart"""
+    path = str(tmp_path / 'overlap.db')
+    first = ValidationEngine(model_path=str(tmp_path / 'model.joblib'), overlap_index=OverlapIndex(path))
+    second = ValidationEngine(model_path=str(tmp_path / 'model.joblib'), overlap_index=OverlapIndex(path))
+    original = test_data['valid_project']
+    duplicate = dict(original, tokenId=2)
+
+    assert first.validate_project(original)[0] == True
+    # The hold is persisted: another worker, or the same one after a restart, can confirm it
+    assert second.confirm_verified([1]) == 1
+    assert second.confirm_verified([1]) == 0
+
+    is_valid, reason, _ = first.validate_project(duplicate)
+    assert is_valid == False
+    assert "overlap" in reason
+    assert first.validate_batch([duplicate])[0][0] == False
+    assert len(first.spatial_grid) == 1
+
+    second.overlap_index.remove(1)
+    assert first.validate_project(duplicate)[0] == True
+    assert len(first.spatial_grid) == 0
+
+def test_expired_holds_are_dropped(tmp_path):
+    """Test that a footprint never confirmed within the pending TTL is not indexed"""
+    index = OverlapIndex(":memory:", pending_ttl=0)
+    index.hold_many([BASE])
+    time.sleep(0.01)
+    # Each hold drops the ones older than the TTL
+    index.hold_many([(2, 48.85, 2.35) + BASE[3:]])
+    assert index.confirm_many([1]) == (0, [])
+    assert index.confirm_many([2])[0] == 1
+    assert len(index) == 1
@@ -0,0 +1,33 @@
+import numpy as np
+from engine.reservoir import FeatureReservoir
+
+def test_reservoir_is_bounded():
+    """Test that the reservoir fills in order and then stays at capacity"""
+    reservoir = FeatureReservoir(capacity=100, n_features=3, seed=0)
+    for i in range(50):
+        reservoir.add([i, i, i])
+    assert len(reservoir) == 50
+    assert reservoir.snapshot()[:, 0].tolist() == list(range(50))
+
+    reservoir.add_many(np.arange(3000 * 3).reshape(3000, 3))
+    assert len(reservoir) == 100
+    assert reservoir.seen == 3050
+    assert reservoir.snapshot().shape == (100, 3)
+    assert reservoir.nbytes == 100 * 3 * 4
+
+def test_reservoir_sample_is_uniform():
+    """Test that single and batched adds both keep a uniform sample over everything seen"""
+    single = FeatureReservoir(capacity=2000, n_features=1, seed=1)
+    for i in range(20000):
+        single.add([i])
+    batched = FeatureReservoir(capacity=2000, n_features=1, seed=1)
+    for chunk in np.array_split(np.arange(20000), 37):
+        batched.add_many(chunk.reshape(-1, 1))
+
+    for reservoir in (single, batched):
+        sample = reservoir.snapshot()[:, 0]
+        # Each tenth of the stream should hold about a tenth of the sample
+        counts = np.histogram(sample, bins=10, range=(0, 20000))[0]
+        assert counts.min() > 150
+        assert counts.max() < 250
+        assert len(np.unique(sample)) == 2000
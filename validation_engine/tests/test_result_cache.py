@@ -0,0 +1,20 @@
+from engine.result_cache import LRUCache
+
+def test_lru_eviction_and_counters():
+    """Test size-bounded eviction order and hit/miss counters"""
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'a' becomes most recently used
+    cache.put('c', 3)           # evicts 'b'
+
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 2, 'misses': 1, 'evictions': 1}
+
+def test_disabled_cache():
+    """Test that a zero-sized cache stores nothing"""
+    cache = LRUCache(0)
+    cache.put('a', 1)
+    assert len(cache) == 0
+    assert cache.get('a') is None
@@ -0,0 +1,56 @@
+import asyncio
+from engine.parsed_project import project_content_hash
+from utils.result_store import RequestCoalescer, ResultStore, payload_hash
+
+def test_payload_hash_is_canonical():
+    """Test that key order does not change a payload's hash but its values do"""
+    assert payload_hash({'tokenId': 1, 'data_sources': ['sensor']}) == payload_hash({'data_sources': ['sensor'], 'tokenId': 1})
+    assert payload_hash({'tokenId': 1}) != payload_hash({'tokenId': 2})
+    # The engine's result cache keys on the same hash
+    assert payload_hash({'tokenId': 1, 'value': 0.5}) == project_content_hash({'value': 0.5, 'tokenId': 1})
+
+def test_first_stored_response_wins(tmp_path):
+    """Test that a second response for the same key returns the first, and that results persist"""
+    path = str(tmp_path / 'results.db')
+    store = ResultStore(path)
+    assert store.get(1, 'a') is None
+    assert store.put(1, 'a', {'signature': 'first'}) == {'signature': 'first'}
+    assert store.put(1, 'a', {'signature': 'second'}) == {'signature': 'first'}
+    store.put(1, 'b', {'signature': 'changed payload'})
+    store.close()
+
+    reopened = ResultStore(path)
+    assert reopened.get_many([(1, 'a'), (1, 'b'), (2, 'a')]) == {
+        (1, 'a'): {'signature': 'first'},
+        (1, 'b'): {'signature': 'changed payload'},
+    }
+    assert reopened.latest(1) == {'signature': 'changed payload'}
+    assert reopened.latest(2) is None
+
+def test_coalescer_runs_one_task_per_key():
+    """Test that concurrent callers of a key share one task, including its failure"""
+    calls = []
+
+    async def work(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        if key == 'bad':
+            raise ValueError(key)
+        return key.upper()
+
+    async def run():
+        coalescer = RequestCoalescer()
+        results = await asyncio.gather(
+            *(coalescer.run(key, lambda key=key: work(key)) for key in ['a', 'a', 'b', 'bad', 'bad']),
+            return_exceptions=True
+        )
+        # Finished keys start a new task
+        again = await coalescer.run('a', lambda: work('a'))
+        return results, again, len(coalescer)
+
+    results, again, in_flight = asyncio.run(run())
+    assert results[:3] == ['A', 'A', 'B']
+    assert all(isinstance(result, ValueError) for result in results[3:])
+    assert calls == ['a', 'b', 'bad', 'a']
+    assert again == 'A'
+    assert in_flight == 0
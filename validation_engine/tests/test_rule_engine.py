@@ -0,0 +1,99 @@
+import pytest
+import json
+import os
+import time
+import numpy as np
+from types import SimpleNamespace
+from engine.rule_engine import RuleEngine
+
+RULESET = {
+    'rules': [
+        {'name': 'emission_reduction', 'field': 'emission_reduction', 'check': 'range',
+         'min': 0, 'max': 1000000, 'message': 'Emission reduction outside acceptable range'},
+        {'name': 'project_duration', 'field': 'duration_days', 'check': 'range',
+         'min': 30, 'max': 3650, 'message': 'Project duration outside acceptable range'},
+        {'name': 'required_data_sources', 'field': 'data_sources', 'check': 'contains_all',
+         'values': ['sensor', 'satellite'], 'message': 'Missing required data sources: {missing}'},
+    ],
+    'project_types': {
+        'cookstove': {
+            'rules': [{'name': 'emission_reduction', 'max': 50000}],
+            'disable': ['required_data_sources'],
+        }
+    }
+}
+
+@pytest.fixture
+def ruleset_path(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps(RULESET))
+    return str(path)
+
+@pytest.fixture
+def rule_engine(ruleset_path):
+    return RuleEngine(ruleset_path, reload_interval=0)
+
+def test_default_ruleset_loads():
+    """Test that the bundled ruleset compiles"""
+    names = [rule.name for rule in RuleEngine().rules_for(None)]
+    assert names == ['emission_reduction', 'project_duration', 'min_data_sources', 'required_data_sources']
+
+def test_project_type_overrides(rule_engine):
+    """Test per-project-type overrides and disabled rules"""
+    facts = SimpleNamespace(emission_reduction=100000.0, duration_days=365, data_sources=['sensor'])
+
+    is_valid, reason, _ = rule_engine.evaluate(facts, 'cookstove')
+    assert is_valid == False
+    assert "Emission reduction" in reason
+
+    facts.emission_reduction = 1000.0
+    is_valid, _, details = rule_engine.evaluate(facts, 'cookstove')
+    assert is_valid == True
+    assert 'required_data_sources' not in details
+
+    # Unknown types fall back to the default rules
+    is_valid, reason, _ = rule_engine.evaluate(facts, 'unknown')
+    assert is_valid == False
+    assert "['satellite']" in reason
+
+def test_evaluate_all_reports_every_violation(rule_engine):
+    """Test that evaluate_all mode reports all violations in one pass"""
+    facts = SimpleNamespace(emission_reduction=-1.0, duration_days=5, data_sources=[])
+    is_valid, reason, details = rule_engine.evaluate(facts, evaluate_all=True)
+    assert is_valid == False
+    assert [v['rule'] for v in details['violations']] == [
+        'emission_reduction', 'project_duration', 'required_data_sources']
+    assert reason.count(';') == 2
+
+def test_evaluate_columns_matches_scalar(rule_engine):
+    """Test that column-wise checks agree with the scalar predicates"""
+    sources = np.empty(3, dtype=object)
+    for i, value in enumerate([['sensor', 'satellite'], ['sensor'], []]):
+        sources[i] = value
+    columns = {
+        'emission_reduction': np.array([10.0, 100000.0, -5.0]),
+        'duration_days': np.array([365, 10, 400]),
+        'data_sources': sources,
+    }
+    project_types = np.array([None, 'cookstove', None], dtype=object)
+
+    for rules, rows, ok in rule_engine.evaluate_columns(columns, project_types):
+        for r, rule in enumerate(rules):
+            for col, i in enumerate(rows):
+                assert ok[r, col] == (rule.check(columns[rule.field][i]) is None)
+
+def test_hot_reload(ruleset_path):
+    """Test that changes to the ruleset file are picked up without restarting"""
+    rule_engine = RuleEngine(ruleset_path, reload_interval=0.01)
+    facts = SimpleNamespace(emission_reduction=2000.0)
+    assert rule_engine.evaluate(facts)[0] == True
+
+    updated = dict(RULESET, rules=[dict(RULESET['rules'][0], max=1000)])
+    with open(ruleset_path, 'w') as f:
+        json.dump(updated, f)
+    os.utime(ruleset_path, (time.time() + 5, time.time() + 5))
+    time.sleep(0.02)
+
+    assert rule_engine.reload_if_changed() == True
+    assert rule_engine.generation == 2
+    assert rule_engine.evaluate(facts)[0] == False
@@ -0,0 +1,26 @@
+import datetime
+import numpy as np
+import pytest
+from utils.serialization import JSON, MSGPACK, NDJSON, canonical_json, decode, encode, negotiate
+
+def test_canonical_json_is_deterministic():
+    """Test that key order does not change the encoding and that values without a JSON type are written as strings"""
+    first = {'b': [1, {'y': 2, 'x': 1}], 'a': 'é', 'c': datetime.date(2024, 1, 1)}
+    second = {'c': datetime.date(2024, 1, 1), 'a': 'é', 'b': [1, {'x': 1, 'y': 2}]}
+    assert canonical_json(first) == canonical_json(second)
+    assert canonical_json(first) == '{"a":"é","b":[1,{"x":1,"y":2}],"c":"2024-01-01"}'.encode()
+    assert canonical_json({'v': np.float64(0.5), 1: 'int key'}) == b'{"1":"int key","v":0.5}'
+
+def test_negotiate_and_round_trip():
+    """Test that Accept picks the first supported type and that each media type decodes what it encodes"""
+    assert negotiate("") == JSON
+    assert negotiate("*/*") == JSON
+    assert negotiate("text/html, application/vnd.msgpack;q=0.9, application/json") == MSGPACK
+    assert negotiate("application/x-ndjson") == NDJSON
+
+    items = [{'projectId': 1, 'proof': ['0xab']}, {'projectId': 2, 'proof': None}]
+    for kind in (JSON, MSGPACK, NDJSON):
+        assert decode(encode(items, kind), kind + "; charset=utf-8") == items
+    assert encode(items[0], NDJSON) == b'{"projectId":1,"proof":["0xab"]}\n'
+    with pytest.raises(ValueError):
+        decode(b'{"projectId":', JSON)
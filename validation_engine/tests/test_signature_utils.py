@@ -0,0 +1,76 @@
+import hashlib
+import json
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from tests.stubs import VALIDATOR_PRIVATE_KEY
+from utils.serialization import canonical_json
+from utils.signature_utils import (
+    ValidationSigner,
+    legacy_canonical_json,
+    sign_validation_result,
+    verify_merkle_proof,
+    verify_signature,
+)
+
+RESULTS = [{"projectId": i, "status": "VERIFIED", "reason": "ok"} for i in range(25)]
+
+# A result and its signature as issued by releases that signed json.dumps(data, sort_keys=True)
+LEGACY_RESULT = {
+    "projectId": 7,
+    "status": "VERIFIED",
+    "reason": "Project validated successfully",
+    "timestamp": "2024-03-01T12:00:00.000000",
+    "validation_details": {"ml_validation": {"anomaly_score": 0.0873, "prediction": 1, "is_valid": True}},
+}
+LEGACY_SIGNATURE = (
+    "0xce84072f80dcf66444386a6cc4916e4977c2e3c27443d34c9196f92f56ab6714"
+    "463096e9f30c4abb5a15105bae91ec5e5a27aa767b9d6ceafaa5ca4368f4f3091b"
+)
+VALIDATOR_ADDRESS = "0xf39Fd6e51aad88F6F4ce6aB8827279cffFb92266"
+
+def test_signature_matches_eth_account():
+    """Test that signatures stay compatible with the original EIP-191 scheme"""
+    signer = ValidationSigner(VALIDATOR_PRIVATE_KEY)
+    data_hash = hashlib.sha256(canonical_json(RESULTS[0])).hexdigest()
+    expected = Account.sign_message(encode_defunct(text=data_hash), private_key=VALIDATOR_PRIVATE_KEY)
+    assert signer.sign(RESULTS[0]) == expected.signature.hex()
+    assert signer.sign_encoded(canonical_json(RESULTS[0])) == expected.signature.hex()
+    assert signer.verify(RESULTS[0], expected.signature.hex()) == True
+
+    # Results signed by earlier releases verify with the legacy encoding
+    legacy_hash = hashlib.sha256(json.dumps(RESULTS[0], sort_keys=True).encode()).hexdigest()
+    legacy = Account.sign_message(encode_defunct(text=legacy_hash), private_key=VALIDATOR_PRIVATE_KEY)
+    assert ValidationSigner(VALIDATOR_PRIVATE_KEY, encoder=legacy_canonical_json).verify(
+        RESULTS[0], legacy.signature.hex()) == True
+
+def test_verify_signature_accepts_legacy_results(monkeypatch):
+    """Test that the public helpers verify new signatures and those issued before the encoding change"""
+    monkeypatch.setenv("VALIDATOR_PRIVATE_KEY", VALIDATOR_PRIVATE_KEY)
+    monkeypatch.setenv("VALIDATOR_ADDRESS", VALIDATOR_ADDRESS.lower())
+    assert verify_signature(LEGACY_RESULT, LEGACY_SIGNATURE) == True
+    assert verify_signature(LEGACY_RESULT, sign_validation_result(LEGACY_RESULT)) == True
+    assert verify_signature(dict(LEGACY_RESULT, status="REJECTED"), LEGACY_SIGNATURE) == False
+
+def test_sign_many_with_process_pool(monkeypatch):
+    """Test that pooled signing matches in-thread signing and verifies"""
+    monkeypatch.setattr("utils.signature_utils.SIGN_CHUNK_SIZE", 4)
+    signer = ValidationSigner(VALIDATOR_PRIVATE_KEY, workers=2)
+    try:
+        signatures = signer.sign_many(RESULTS)
+        assert signatures == [signer.sign(result) for result in RESULTS]
+        signatures[3] = signatures[4]
+        assert signer.verify_many(RESULTS, signatures) == [i != 3 for i in range(len(RESULTS))]
+    finally:
+        signer.close()
+
+def test_merkle_batch_signature():
+    """Test that one root signature plus a proof authenticates each result"""
+    signer = ValidationSigner(VALIDATOR_PRIVATE_KEY)
+    batch = signer.sign_merkle_batch(RESULTS)
+    assert len(batch.proofs) == len(RESULTS)
+    for result, proof in zip(RESULTS, batch.proofs):
+        assert signer.verify_merkle_item(result, proof, batch.root, batch.signature) == True
+
+    tampered = dict(RESULTS[5], status="REJECTED")
+    assert verify_merkle_proof(tampered, batch.proofs[5], batch.root) == False
+    assert signer.verify_merkle_item(RESULTS[5], batch.proofs[6], batch.root, batch.signature) == False
@@ -0,0 +1,110 @@
+import json
+import numpy as np
+import pytest
+from engine.telemetry import TelemetryStore, parse_ndjson
+from engine.validation_engine import ValidationEngine
+
+with open('tests/test_data.json', 'r') as f:
+    test_data = json.load(f)
+
+DAY = 86400
+T0 = 1700000000 - 1700000000 % DAY
+
+def test_aggregates_match_numpy_across_batches():
+    """Test that window aggregates merged batch by batch equal those computed over all readings at once"""
+    rng = np.random.default_rng(0)
+    token_ids = rng.integers(1, 20, 20000)
+    timestamps = T0 + rng.uniform(0, 10 * DAY, 20000)
+    values = rng.normal(5, 2, 20000)
+    store = TelemetryStore(n_windows=30)
+    for start in range(0, len(values), 1234):
+        batch = slice(start, start + 1234)
+        store.ingest(token_ids[batch], timestamps[batch], values[batch])
+
+    summary = store.summary([7, 99])
+    mine = token_ids == 7
+    assert summary['count'].tolist() == [mine.sum(), 0]
+    assert np.isclose(summary['mean'][0], values[mine].mean())
+    assert np.isclose(summary['std'][0], values[mine].std())
+    assert summary['min'][0] == values[mine].min() and summary['max'][0] == values[mine].max()
+    assert np.isclose(summary['measured_per_day'][0], values[mine].sum() / 10)
+    assert np.isnan(summary['measured_per_day'][1])
+
+    windows = store.windows(7)
+    assert len(windows) == 10
+    first_day = mine & (timestamps < T0 + DAY)
+    assert windows[0]['window_start'] == T0
+    assert windows[0]['count'] == first_day.sum()
+    assert np.isclose(windows[0]['std'], values[first_day].std())
+    assert store.windows(99) is None
+
+def test_windows_roll_over_and_late_readings_drop():
+    """Test that only the newest n_windows windows are kept and readings older than them are dropped"""
+    store = TelemetryStore(n_windows=3)
+    assert store.ingest([1, 1], [T0, T0 + DAY], [1.0, 2.0]) == 2
+    version = store.version(1)
+    # Day 3 evicts day 0 from the ring; its slot is reused
+    assert store.ingest([1, 1], [T0 + 3 * DAY, T0 + 3 * DAY + 1], [4.0, 6.0]) == 2
+    assert store.version(1) != version
+    assert [w['window_start'] for w in store.windows(1)] == [T0 + DAY, T0 + 3 * DAY]
+    assert store.summary([1])['count'][0] == 3
+    # Day 0 is now outside the ring, day 2 still inside; NaN values are invalid
+    assert store.ingest([1, 1, 1], [T0 + 10, T0 + 2 * DAY, T0 + 3 * DAY], [9.0, 3.0, np.nan]) == 1
+    assert [w['count'] for w in store.windows(1)] == [1, 1, 2]
+    assert store.stats()['received'] == 7 and store.stats()['accepted'] == 5
+
+def test_least_recently_updated_projects_are_evicted():
+    """Test that memory stays bounded by max_projects"""
+    store = TelemetryStore(max_projects=3)
+    for token_id in (1, 2, 3):
+        store.ingest([token_id], [T0], [1.0])
+    store.ingest([1], [T0 + 1], [1.0])
+    store.ingest([4, 5], [T0, T0], [1.0, 1.0])
+    assert len(store) == 3
+    assert store.windows(2) is None and store.windows(3) is None
+    assert store.summary([1])['count'][0] == 2
+    assert store.stats()['evicted'] == 2
+
+def test_batch_without_room_for_its_projects_is_dropped():
+    """Test that a batch whose projects all lack a row is counted as received and merges nothing"""
+    store = TelemetryStore(max_projects=0)
+    assert store.ingest([1, 2], [T0, T0 + 1], [1.0, 2.0]) == 0
+    assert store.summary([1])['count'][0] == 0
+    assert store.stats()['received'] == 2 and store.stats()['accepted'] == 0
+
+def test_parse_ndjson_timestamps():
+    """Test that epoch and ISO 8601 timestamps parse to the same epoch seconds"""
+    token_ids, timestamps, values = parse_ndjson(
+        b'{"tokenId": 1, "timestamp": 1700000000, "value": 1.5}\n'
+        b'\n'
+        b'{"tokenId": 2, "timestamp": 1700000000.5, "value": 2}\n'
+    )
+    assert token_ids.tolist() == [1, 2]
+    assert timestamps.tolist() == [1700000000, 1700000000.5]
+    assert values.tolist() == [1.5, 2.0]
+    _, timestamps, _ = parse_ndjson(b'{"tokenId": 1, "timestamp": "2023-11-14T22:13:20Z", "value": 1}\n')
+    assert timestamps.tolist() == [1700000000]
+    with pytest.raises(ValueError):
+        parse_ndjson(b'{"tokenId": 1, "value": 1}\n')
+
+def test_telemetry_contradicting_the_claim_is_anomalous(tmp_path):
+    """Test that a project whose sensors measure far less than it claims is rejected by the model"""
+    engine = ValidationEngine(model_path=str(tmp_path / 'anomaly_model.joblib'), cache_size=16,
+                              overlap_policy='off', telemetry=TelemetryStore(n_windows=10))
+    project = test_data['valid_project']
+    hours = T0 + np.arange(120) * 3600.0
+    claimed_per_hour = project['estimated_emission_reduction'] / 364 / 24
+
+    engine.telemetry.ingest(np.full(120, 1), hours, np.full(120, claimed_per_hour))
+    is_valid, _, details = engine.validate_project(project)
+    assert is_valid == True
+    assert details['ml_validation']['features'][10] == 1.0
+
+    # Five more days at 1% of the claim halve the measured rate and make readings erratic;
+    # the cached result is not reused
+    engine.telemetry.ingest(np.full(120, 1), hours + 120 * 3600, np.full(120, claimed_per_hour / 100))
+    is_valid, reason, _ = engine.validate_project(project)
+    assert is_valid == False
+    assert "anomalies" in reason
+    assert engine.validate_batch([project])[0][0] == False
+    assert engine.validate_batch([dict(project, tokenId=2)])[0][0] == True
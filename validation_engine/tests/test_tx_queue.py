@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+from tests.stubs import STATUS_VERIFIED, make_chain
+from utils.tx_queue import JOB_CONFIRMED, JOB_FAILED, VerificationQueue
+
+@pytest.fixture
+def chain():
+    # Latency lets receipts of concurrently submitted transactions overlap
+    return make_chain(latency=0.001)
+
+def run_queue(bridge, project_ids, **kwargs):
+    async def run():
+        queue = VerificationQueue(bridge, poll_interval=0.01, **kwargs)
+        await queue.start()
+        jobs = [queue.enqueue(project_id) for project_id in project_ids]
+        await queue.join()
+        await queue.stop()
+        return queue, jobs
+    return asyncio.run(run())
+
+def test_concurrent_jobs_use_sequential_local_nonces(bridge, chain):
+    """Test that many queued verifications confirm without nonce collisions"""
+    queue, jobs = run_queue(bridge, range(1, 21), max_in_flight=8, max_batch_size=1)
+
+    assert all(job.status == JOB_CONFIRMED for job in jobs)
+    assert all(chain.statuses[project_id] == STATUS_VERIFIED for project_id in range(1, 21))
+    assert chain.nonces[bridge.validator_address] == 20
+    # Nonce is fetched once and the gas price is served from the TTL cache
+    assert chain.calls['eth_getTransactionCount'] == 1
+    assert chain.calls['eth_gasPrice'] == 1
+    assert queue.get_job(jobs[0].job_id).tx_hash is not None
+
+def test_reverting_job_is_reported_failed(bridge):
+    """Test that a verification that would revert is reported on the job and only confirmed ones reach the hook"""
+    confirmed = []
+    _, [job, ok] = run_queue(bridge, [999, 3], max_batch_size=1, on_confirmed=confirmed.extend)
+    assert job.status == JOB_FAILED
+    assert "execution reverted" in job.error
+    assert ok.status == JOB_CONFIRMED
+    assert confirmed == [3]
+
+def test_coalesced_jobs_share_batch_transactions(bridge, chain):
+    """Test that jobs queued together are chunked by gas into batch transactions"""
+    async def run():
+        # Budget fits ~6 projects per transaction with the estimate margin applied
+        queue = VerificationQueue(bridge, poll_interval=0.01, max_gas_per_tx=130_000)
+        await queue.start()
+        jobs = queue.enqueue_many(list(range(1, 21)))
+        await queue.join()
+        await queue.stop()
+        return jobs
+
+    jobs = asyncio.run(run())
+    assert all(job.status == JOB_CONFIRMED for job in jobs)
+    tx_hashes = {job.tx_hash for job in jobs}
+    assert 1 < len(tx_hashes) < 20
+    assert chain.nonces[bridge.validator_address] == len(tx_hashes)
+
+def test_bad_project_in_batch_is_isolated(bridge):
+    """Test that one unknown project does not fail the rest of its batch"""
+    async def run():
+        queue = VerificationQueue(bridge, poll_interval=0.01)
+        await queue.start()
+        jobs = queue.enqueue_many([1, 999, 2])
+        await queue.join()
+        await queue.stop()
+        return jobs
+
+    good, bad, other = asyncio.run(run())
+    assert good.status == JOB_CONFIRMED
+    assert other.status == JOB_CONFIRMED
+    assert bad.status == JOB_FAILED
+
+def test_nonce_resync_after_external_transaction(bridge, chain):
+    """Test that the queue recovers when the account nonce moves underneath it"""
+    async def run():
+        queue = VerificationQueue(bridge, poll_interval=0.01)
+        await queue.start()
+        first = queue.enqueue(1)
+        await queue.join()
+        # Another process used the validator account
+        chain.nonces[bridge.validator_address] += 1
+        second = queue.enqueue(2)
+        await queue.join()
+        await queue.stop()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.status == JOB_CONFIRMED
+    assert second.status == JOB_CONFIRMED
+
+def test_direct_verification_shares_the_queue_nonce(bridge, chain):
+    """Test that verify_projects called while the queue is busy never reuses one of its nonces"""
+    async def run():
+        queue = VerificationQueue(bridge, poll_interval=0.01, max_batch_size=1)
+        await queue.start()
+        jobs = queue.enqueue_many(range(1, 11))
+        tx_hashes = await bridge.verify_projects(list(range(11, 21)), max_gas_per_tx=100_000)
+        await queue.join()
+        await queue.stop()
+        return jobs, tx_hashes
+
+    jobs, tx_hashes = asyncio.run(run())
+    assert all(job.status == JOB_CONFIRMED for job in jobs)
+    assert all(chain.statuses[project_id] == STATUS_VERIFIED for project_id in range(1, 21))
+    assert chain.nonces[bridge.validator_address] == len(jobs) + len(tx_hashes)
+    assert chain.calls['eth_getTransactionCount'] == 1
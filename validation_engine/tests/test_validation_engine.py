@@ -1,15 +1,18 @@
 import pytest
 import json
-from datetime import datetime
-from engine.validation_engine import ValidationEngine
+import time
+from engine.model_updater import ModelUpdater
+from engine.overlap_index import OverlapIndex
+from engine.validation_engine import MIN_RETRAIN_SAMPLES, ValidationEngine
+from tests.synthetic import generate_projects
 
 # Load test data
 with open('tests/test_data.json', 'r') as f:
     test_data = json.load(f)
 
 @pytest.fixture
-def validation_engine():
-    return ValidationEngine()
+def validation_engine(tmp_path):
+    return ValidationEngine(model_path=str(tmp_path / 'anomaly_model.joblib'))
 
 def test_valid_project(validation_engine):
     """Test validation of a valid project"""
@@ -57,6 +60,24 @@ def test_model_update(validation_engine):
     is_valid, reason, details = validation_engine.validate_project(test_data['valid_project'])
     assert is_valid == True
 
+def test_model_persistence(validation_engine):
+    """Test that update_model persists a versioned artifact that is loaded at startup"""
+    training_data = []
+    for i in range(50):
+        project = test_data['valid_project'].copy()
+        project['estimated_emission_reduction'] = 1000.0 + i * 200
+        training_data.append(project)
+
+    version = validation_engine.update_model(training_data)
+    assert validation_engine.model_version == version
+
+    reloaded = ValidationEngine(model_path=validation_engine.model_path)
+    assert reloaded.model_version == version
+
+    _, _, details = reloaded._ml_based_validation(test_data['valid_project'])
+    assert details['model_version'] == version
+    assert isinstance(details['anomaly_score'], float)
+
 def test_rule_based_validation(validation_engine):
     """Test rule-based validation specifically"""
     # Test emission reduction limits
@@ -89,10 +110,202 @@ def test_ml_based_validation(validation_engine):
     assert "passed" in reason
     assert 'features' in details
     assert 'prediction' in details
+    assert details['anomaly_score'] >= 0
+    assert details['model_version'] == validation_engine.model_version
     
     # Test with anomalous data
     anomalous_data = test_data['valid_project'].copy()
     anomalous_data['estimated_emission_reduction'] = 1000000  # Very high value
     is_valid, reason, details = validation_engine._ml_based_validation(anomalous_data)
     assert is_valid == False
-    assert "anomalies" in reason 
\ No newline at end of file
+    assert "anomalies" in reason 
+
+def test_validate_batch_matches_single(validation_engine):
+    """Test that batch validation agrees with per-project validation, in input order"""
+    short_project = test_data['valid_project'].copy()
+    short_project['project_end_date'] = "2023-01-15T00:00:00Z"
+    bad_date_project = test_data['valid_project'].copy()
+    bad_date_project['project_start_date'] = "invalid-date"
+    anomalous_project = test_data['valid_project'].copy()
+    anomalous_project['estimated_emission_reduction'] = 1000000
+
+    projects = [
+        test_data['valid_project'],
+        test_data['invalid_project'],
+        short_project,
+        bad_date_project,
+        anomalous_project,
+    ]
+    results = validation_engine.validate_batch(projects)
+
+    assert len(results) == len(projects)
+    for project, (is_valid, reason, details) in zip(projects, results):
+        expected_valid, expected_reason, _ = validation_engine.validate_project(project)
+        assert is_valid == expected_valid
+        assert reason.split(':')[0] == expected_reason.split(':')[0]
+
+    assert results[0][2]['ml_validation']['model_version'] == validation_engine.model_version
+    assert "Validation error" in results[3][1]
+    assert "anomalies" in results[4][1]
+
+def test_batch_dates_parse_like_single(validation_engine):
+    """Test that batch validation parses dates exactly as validate_project, with the same error messages"""
+    dates = [
+        ("2023-01-01T05:30:00+05:30", "2029-01-01T00:00:00Z"),
+        ("2023-01-01", "2029-01-01T00:00:00"),
+        ("2023-01-01T00:00:00Z", "2029-01-01T00:00:00"),
+        ("2023-13-01T00:00:00Z", "2029-01-01T00:00:00Z"),
+        ("2023-01-01T00:00:00Z", "not-a-date"),
+        (20230101, "2029-01-01T00:00:00Z"),
+    ]
+    projects = [dict(test_data['valid_project'], project_start_date=start, project_end_date=end)
+                for start, end in dates]
+    results = validation_engine.validate_batch(projects)
+
+    for project, (is_valid, reason, details) in zip(projects, results):
+        expected_valid, expected_reason, expected_details = validation_engine.validate_project(project)
+        assert (is_valid, reason) == (expected_valid, expected_reason)
+        assert details.get('rule_validation') == expected_details.get('rule_validation')
+    assert [result[0] for result in results] == [True, True, False, False, False, False]
+    assert "offset-naive and offset-aware" in results[2][1]
+    assert "not-a-date" in results[4][1]
+
+def test_evaluate_all_mode(validation_engine):
+    """Test that evaluate_all reports every rule violation for single and batch validation"""
+    data = test_data['invalid_project'].copy()
+    is_valid, reason, details = validation_engine.validate_project(data, evaluate_all=True)
+    assert is_valid == False
+    assert len(details['violations']) == 3
+
+    [(batch_valid, batch_reason, batch_details)] = validation_engine.validate_batch([data], evaluate_all=True)
+    assert batch_valid == False
+    assert batch_reason == reason
+    assert batch_details['violations'] == details['violations']
+
+def test_result_cache_skips_rescoring(tmp_path, monkeypatch):
+    """Test that resubmitting an identical payload is served from the result cache"""
+    engine = ValidationEngine(model_path=str(tmp_path / 'anomaly_model.joblib'), cache_size=8)
+    first = engine.validate_project(test_data['valid_project'])
+
+    def fail_if_called(*args, **kwargs):
+        raise AssertionError("cached result should not be re-scored")
+    monkeypatch.setattr(engine, '_validate_parsed', fail_if_called)
+
+    # Same content, different key order
+    resubmitted = dict(reversed(list(test_data['valid_project'].items())))
+    assert engine.validate_project(resubmitted) == first
+    assert engine.cache_stats()['hits'] == 1
+    assert engine.cache_stats()['misses'] == 1
+
+def test_cached_acceptance_is_held_and_sampled_again(tmp_path):
+    """Test that a cache hit for an accepted project re-holds its footprint and feeds the reservoir"""
+    engine = ValidationEngine(model_path=str(tmp_path / 'anomaly_model.joblib'), cache_size=8,
+                              overlap_index=OverlapIndex(":memory:", pending_ttl=0), overlap_policy='flag')
+    assert engine.validate_project(test_data['valid_project'])[0] == True
+    time.sleep(0.01)
+    # Holding another project drops the first hold as expired
+    assert engine.validate_project(dict(test_data['valid_project'], tokenId=2))[0] == True
+    assert engine.validate_project(test_data['valid_project'])[0] == True
+    assert engine.cache_stats()['hits'] == 1
+    assert len(engine.reservoir) == 3
+    assert engine.confirm_verified([1]) == 1
+
+def test_spatial_density_counts_verified_projects(tmp_path):
+    """Test that density counts only confirmed projects, is rebuilt from the overlap index and keys the cache"""
+    index_path = str(tmp_path / 'overlap.db')
+    engine = ValidationEngine(model_path=str(tmp_path / 'anomaly_model.joblib'), cache_size=8,
+                              overlap_index=OverlapIndex(index_path), overlap_policy='flag')
+    neighbour = dict(test_data['valid_project'], tokenId=2)
+
+    first = engine.validate_project(neighbour)
+    assert first[2]['ml_validation']['features'][6] == 0
+    engine.validate_project(test_data['valid_project'])
+    # Accepted but not yet verified on chain
+    assert engine.validate_project(neighbour) == first
+    assert engine.confirm_verified([1]) == 1
+    # The cached result predates the new neighbour
+    assert engine.validate_project(neighbour)[2]['ml_validation']['features'][6] > 0
+    assert engine.cache_stats()['hits'] == 1
+    engine.overlap_index.close()
+
+    restarted = ValidationEngine(model_path=str(tmp_path / 'anomaly_model.joblib'),
+                                 overlap_index=OverlapIndex(index_path), overlap_policy='off')
+    assert len(restarted.spatial_grid) == 1
+    assert restarted.validate_project(neighbour)[2]['ml_validation']['features'][6] > 0
+
+def test_retrain_from_reservoir_and_rollback(validation_engine):
+    """Test that retraining on accepted projects swaps in a new archived version that can be rolled back"""
+    bootstrap_version = validation_engine.model_version
+    assert validation_engine.retrain() is None
+
+    validation_engine.validate_batch(generate_projects(600))
+    assert len(validation_engine.reservoir) >= MIN_RETRAIN_SAMPLES
+
+    version = validation_engine.retrain()
+    assert validation_engine.model_version == version
+    assert validation_engine.model_history.versions() == [bootstrap_version, version]
+    assert ValidationEngine(model_path=validation_engine.model_path).model_version == version
+    _, _, details = validation_engine._ml_based_validation(test_data['valid_project'])
+    assert details['model_version'] == version
+
+    assert validation_engine.rollback() == bootstrap_version
+    assert validation_engine.model_version == bootstrap_version
+    assert ValidationEngine(model_path=validation_engine.model_path).model_version == bootstrap_version
+    with pytest.raises(ValueError):
+        validation_engine.rollback()
+
+    assert validation_engine.rollback(version) == version
+    with pytest.raises(KeyError):
+        validation_engine.rollback("missing")
+
+def test_repeated_retrains_keep_acceptance_stable(validation_engine):
+    """Test that retraining on stationary traffic does not reject more of it each round"""
+    accepted = []
+    for round_number in range(5):
+        results = validation_engine.validate_batch(
+            generate_projects(2000, seed=round_number + 1, start_token_id=round_number * 2000))
+        accepted.append(sum(is_valid for is_valid, _, _ in results))
+        assert validation_engine.retrain() is not None
+    assert min(accepted) >= 0.95 * accepted[0]
+
+def test_model_updater_retrains_after_new_samples(validation_engine):
+    """Test that the background updater retrains once enough new projects were accepted"""
+    updater = ModelUpdater(validation_engine, retrain_after=300, min_samples=100, poll_interval=0.01)
+    bootstrap_version = validation_engine.model_version
+    updater.start()
+    try:
+        validation_engine.validate_batch(generate_projects(100))
+        time.sleep(0.1)
+        assert updater.retrains == 0
+
+        validation_engine.validate_batch(generate_projects(400, seed=1))
+        deadline = time.monotonic() + 10
+        while updater.retrains == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        updater.stop()
+
+    assert updater.retrains == 1
+    assert validation_engine.model_version != bootstrap_version
+    assert validation_engine.model_info()['source'] == 'reservoir'
+
+def test_engines_share_and_follow_the_model_file(validation_engine):
+    """Test that an engine serving the same file picks up a model fitted elsewhere without restarting"""
+    other = ValidationEngine(model_path=validation_engine.model_path)
+    assert other.model_version == validation_engine.model_version
+    assert other.reload_model() == False
+
+    version = validation_engine.update_model(generate_projects(300))
+    updater = ModelUpdater(other, reload_interval=0.01, poll_interval=0.01)
+    updater.start()
+    try:
+        deadline = time.monotonic() + 10
+        while updater.reloads == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        updater.stop()
+
+    assert other.model_version == version
+    assert updater.reloads == 1
+    _, _, details = other._ml_based_validation(test_data['valid_project'])
+    assert details == validation_engine._ml_based_validation(test_data['valid_project'])[2]
@@ -0,0 +1,73 @@
+import asyncio
+import os
+from tests.stubs import (
+    CONTRACT_ADDRESS,
+    STATUS_VERIFIED,
+    VALIDATOR_PRIVATE_KEY,
+    StubProvider,
+    make_bridge,
+)
+from utils.web3_bridge import DEFAULT_ABI_PATH, Web3Bridge
+
+def test_verify_project(bridge, chain):
+    """Test that verify_project submits a transaction and returns its hash"""
+    tx_hash = asyncio.run(bridge.verify_project(1))
+    assert isinstance(tx_hash, str)
+    assert chain.statuses[1] == STATUS_VERIFIED
+    assert asyncio.run(bridge.get_project_status(1)) == "Verified"
+
+def test_check_validator_role(bridge):
+    """Test role lookup through the async contract interface"""
+    assert asyncio.run(bridge.check_validator_role()) == True
+
+def test_verify_projects_chunks_by_gas(bridge, chain):
+    """Test that verify_projects splits work into gas-bounded batch transactions"""
+    chunks = asyncio.run(bridge.plan_verify_batches(list(range(1, 11)), max_gas_per_tx=100_000))
+    assert [project_id for chunk, _ in chunks for project_id in chunk] == list(range(1, 11))
+    assert all(gas <= 100_000 for _, gas in chunks)
+    assert len(chunks) > 1
+
+    tx_hashes = asyncio.run(bridge.verify_projects(list(range(1, 11)), max_gas_per_tx=100_000))
+    assert len(tx_hashes) == len(chunks)
+    assert all(chain.statuses[project_id] == STATUS_VERIFIED for project_id in range(1, 11))
+
+def test_get_project_statuses_uses_multicall(bridge, chain):
+    """Test that bulk status reads are aggregated into a single eth_call"""
+    chain.statuses[3] = STATUS_VERIFIED
+    statuses = asyncio.run(bridge.get_project_statuses([1, 2, 3, 99]))
+    assert statuses == {1: "Unverified", 2: "Unverified", 3: "Verified", 99: None}
+    assert chain.calls['eth_call'] == 1
+
+    # Known statuses are now served from the cache
+    asyncio.run(bridge.get_project_statuses([1, 2, 3]))
+    assert chain.calls['eth_call'] == 1
+
+def test_get_project_statuses_without_multicall(chain, tmp_path):
+    """Test the concurrent eth_call fallback when multicall is disabled"""
+    chain.multicall = False
+    bridge = make_bridge(chain, tmp_path, multicall_address="")
+    statuses = asyncio.run(bridge.get_project_statuses([1, 2, 99]))
+    assert statuses == {1: "Unverified", 2: "Unverified", 99: None}
+
+def test_status_cache_invalidated_by_own_verification(bridge, chain):
+    """Test that confirming a verification drops the stale cached status"""
+    assert asyncio.run(bridge.get_project_statuses([1]))[1] == "Unverified"
+    asyncio.run(bridge.verify_project(1))
+    assert asyncio.run(bridge.get_project_statuses([1]))[1] == "Verified"
+
+def test_validator_role_hash_is_memoized(bridge, chain):
+    """Test that VALIDATOR_ROLE() is fetched once across role checks"""
+    asyncio.run(bridge.check_validator_role())
+    asyncio.run(bridge.check_validator_role())
+    assert chain.calls['eth_call'] == 3
+
+def test_default_abi_matches_the_contract(chain, monkeypatch):
+    """Test that without PROJECT_NFT_ABI_PATH the bridge loads an ABI with the calls and events it uses"""
+    monkeypatch.delenv("PROJECT_NFT_ABI_PATH", raising=False)
+    assert os.path.exists(DEFAULT_ABI_PATH)
+    bridge = Web3Bridge(rpc_url=None, contract_address=CONTRACT_ADDRESS, private_key=VALIDATOR_PRIVATE_KEY,
+                        provider=StubProvider(chain))
+    asyncio.run(bridge.verify_project(1))
+    assert asyncio.run(bridge.get_project_status(1)) == "Verified"
+    assert {'ProjectRegistered', 'ProjectUpdated', 'ProjectVerified'} <= {
+        entry['name'] for entry in bridge.contract_abi if entry['type'] == 'event'}
@@ -0,0 +1,279 @@
+"""
+Admission control in front of the validation pipeline
+
+Each stage (CPU: rules and ML; I/O: IPFS, signing and the chain queue) runs
+at most a fixed number of requests at a time. Requests beyond that wait in a
+bounded priority queue, where interactive single validations go ahead of
+bulk batches. When a queue is full the request fails straight away with a
+Retry-After hint instead of adding to the backlog, so the latency of
+admitted requests stays bounded however hard clients push. A per-client
+token bucket stops one client from using up the queues on its own.
+AdmissionMiddleware sheds requests to a full stage before their bodies are
+read and parsed, so turning a request away costs far less than serving it.
+"""
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Tuple
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+
+from starlette.responses import JSONResponse
+
+from utils.metrics import ADMISSION_QUEUE_SECONDS, ADMISSION_REJECTIONS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', BULK: 'bulk'}
+
+# Weight of the newest sample in the moving average of slot hold times
+SERVICE_TIME_ALPHA = 0.1
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        """
+        A request turned away by admission control
+
+        Args:
+            reason: 'rate_limited' when the client exceeded its rate,
+                'queue_full' when the service is at capacity
+            retry_after: Seconds after which a retry would likely be admitted
+        """
+        super().__init__(f"{reason.replace('_', ' ').capitalize()}, retry after {retry_after:.1f}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        """
+        Per-client token buckets
+
+        Args:
+            rate: Tokens each client earns per second; 0 disables the limit
+            burst: Bucket size, the most a client can spend at once
+            max_clients: Buckets kept; the longest idle client is forgotten
+                first, which only ever gives it a full bucket back
+        """
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_clients = max_clients
+        self._buckets: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+
+    def take(self, client: str, cost: float = 1.0) -> float:
+        """
+        Spend cost tokens from a client's bucket
+
+        A cost above the bucket size is charged as a full bucket, so large
+        batches are slowed down rather than refused forever.
+
+        Returns:
+            0 if the tokens were spent, otherwise the seconds until they would be
+        """
+        if self.rate <= 0:
+            return 0.0
+        cost = min(cost, self.burst)
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class StageLimiter:
+    def __init__(self, name: str, concurrency: int, max_queue: int):
+        """
+        Concurrency limit with a bounded priority queue
+
+        Slots are handed to waiters in priority order, first come first
+        served within a priority.
+
+        Args:
+            name: Stage label in metrics
+            concurrency: Requests in the stage at the same time
+            max_queue: Requests waiting for a slot before new ones are refused
+        """
+        self.name = name
+        self.concurrency = max(concurrency, 1)
+        self.max_queue = max_queue
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._service_time = None
+        self.admitted = 0
+        self.rejected = 0
+
+    def retry_after(self) -> float:
+        """Time for the current queue to drain at the observed service rate"""
+        service_time = self._service_time if self._service_time is not None else 1.0
+        return (len(self._waiters) + 1) * service_time / self.concurrency
+
+    def is_full(self) -> bool:
+        """Whether a request arriving now would be refused"""
+        if self._active < self.concurrency and not self._waiters:
+            return False
+        return len(self._waiters) >= self.max_queue
+
+    @asynccontextmanager
+    async def slot(self, priority: int = INTERACTIVE) -> AsyncIterator[float]:
+        """
+        Hold one of the stage's slots for the duration of the block
+
+        Yields:
+            Seconds spent waiting for the slot
+
+        Raises:
+            Overloaded: If the queue is full
+        """
+        waited = 0.0
+        if self._active < self.concurrency and not self._waiters:
+            self._active += 1
+        else:
+            if self.is_full():
+                self.rejected += 1
+                raise Overloaded('queue_full', self.retry_after())
+            start = time.perf_counter()
+            entry = (priority, next(self._sequence), asyncio.get_running_loop().create_future())
+            heapq.heappush(self._waiters, entry)
+            try:
+                await entry[2]
+            except asyncio.CancelledError:
+                if entry[2].cancelled():
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                else:
+                    # The slot was handed over just as the waiter went away; pass it on
+                    self._release()
+                raise
+            waited = time.perf_counter() - start
+        self.admitted += 1
+        ADMISSION_QUEUE_SECONDS.labels(self.name, PRIORITY_NAMES.get(priority, str(priority))).observe(waited)
+        started = time.perf_counter()
+        try:
+            yield waited
+        finally:
+            held = time.perf_counter() - started
+            self._service_time = held if self._service_time is None else \
+                self._service_time + SERVICE_TIME_ALPHA * (held - self._service_time)
+            self._release()
+
+    def _release(self):
+        # Hand the slot straight to the next waiter, so a newcomer cannot take it first
+        if self._waiters:
+            heapq.heappop(self._waiters)[2].set_result(None)
+        else:
+            self._active -= 1
+
+    def stats(self) -> Dict:
+        return {
+            'concurrency': self.concurrency,
+            'active': self._active,
+            'queued': len(self._waiters),
+            'max_queue': self.max_queue,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'service_time_ms': None if self._service_time is None else self._service_time * 1000,
+        }
+
+
+class AdmissionController:
+    def __init__(self, cpu_concurrency: int, io_concurrency: int, max_queue: int,
+                 client_rate: float = 0, client_burst: float = 100, max_clients: int = 10000):
+        """
+        Stage limits and per-client rate limits of the validation endpoints
+
+        Args:
+            cpu_concurrency: Requests in rule/ML validation at the same time
+            io_concurrency: Requests storing, signing and queueing results at the same time
+            max_queue: Requests waiting per stage before new ones get 503
+            client_rate: Projects per second each client may submit; 0 disables the limit
+            client_burst: Projects a client may submit at once
+            max_clients: Clients whose rate is tracked
+        """
+        self.cpu = StageLimiter('cpu', cpu_concurrency, max_queue)
+        self.io = StageLimiter('io', io_concurrency, max_queue)
+        self.clients = TokenBucketLimiter(client_rate, client_burst, max_clients)
+
+    def check_rate(self, client: str, cost: float = 1.0):
+        """
+        Charge a client for cost projects
+
+        Raises:
+            Overloaded: If the client exceeded its rate
+        """
+        wait = self.clients.take(client, cost)
+        if wait > 0:
+            raise Overloaded('rate_limited', wait)
+
+    def stats(self) -> Dict:
+        return {
+            'cpu': self.cpu.stats(),
+            'io': self.io.stats(),
+            'client_rate': self.clients.rate,
+            'client_burst': self.clients.burst,
+            'clients': len(self.clients),
+        }
+
+
+def overloaded_response(exc: Overloaded) -> JSONResponse:
+    """429 for clients over their rate, 503 while the pipeline is at capacity; both with Retry-After"""
+    ADMISSION_REJECTIONS.labels(exc.reason).inc()
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=429 if exc.reason == 'rate_limited' else 503,
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: Callable[[], AdmissionController], paths: Iterable[str]):
+        """
+        ASGI middleware answering 503 to requests for a full stage before reading them
+
+        Requests let through are counted until they are answered: in a burst,
+        many pass this check before any of them reaches the stage queue, and
+        each one refused only when it asks for its slot has already been read,
+        parsed and looked up. Once the requests in flight would fill the
+        stage's slots and queue, new ones are refused here instead. The stage
+        check is repeated when the request asks for its slot.
+
+        Args:
+            app: ASGI application to wrap
+            controller: Returns the admission controller; called per request,
+                so the controller can be built lazily
+            paths: POST paths whose requests enter the CPU stage
+        """
+        self.app = app
+        self.controller = controller
+        self.paths = frozenset(paths)
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+        stage = self.controller().cpu
+        if stage.is_full() or self.in_flight >= stage.concurrency + stage.max_queue:
+            stage.rejected += 1
+            return await overloaded_response(Overloaded('queue_full', stage.retry_after()))(scope, receive, send)
+        self.in_flight += 1
+        try:
+            return await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
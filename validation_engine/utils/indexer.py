@@ -0,0 +1,333 @@
+from typing import Dict, Iterable, List, Optional
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+
+from eth_abi import decode
+from eth_utils import keccak, to_checksum_address
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'project_index.db')
+
+TOPIC_PROJECT_REGISTERED = "0x" + keccak(text="ProjectRegistered(uint256,address,string)").hex()
+TOPIC_PROJECT_UPDATED = "0x" + keccak(text="ProjectUpdated(uint256,string)").hex()
+TOPIC_PROJECT_VERIFIED = "0x" + keccak(text="ProjectVerified(uint256)").hex()
+# ERC721 ownership changes, including the mint in registerProject
+TOPIC_TRANSFER = "0x" + keccak(text="Transfer(address,address,uint256)").hex()
+PROJECT_TOPICS = [TOPIC_PROJECT_REGISTERED, TOPIC_PROJECT_UPDATED, TOPIC_PROJECT_VERIFIED, TOPIC_TRANSFER]
+ZERO_ADDRESS = "0x" + "00" * 20
+
+# Contract Status enum values
+STATUS_UNVERIFIED = 0
+STATUS_VERIFIED = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    project_id INTEGER PRIMARY KEY,
+    owner TEXT,
+    metadata_uri TEXT,
+    status INTEGER NOT NULL DEFAULT 0,
+    registered_block INTEGER,
+    updated_block INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_projects_status ON projects (status, project_id);
+CREATE INDEX IF NOT EXISTS idx_projects_owner ON projects (owner, project_id);
+CREATE TABLE IF NOT EXISTS index_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Every statement is an upsert that only moves state forward, so applying the same
+# event twice, or a verification before its registration, converges to chain state.
+# The owner follows transfers; logs are applied in chain order, so replaying a range does too
+REGISTER_SQL = """
+INSERT INTO projects (project_id, owner, metadata_uri, status, registered_block, updated_block)
+VALUES (?, ?, ?, 0, ?, ?)
+ON CONFLICT (project_id) DO UPDATE SET
+    owner = excluded.owner,
+    metadata_uri = COALESCE(projects.metadata_uri, excluded.metadata_uri),
+    registered_block = excluded.registered_block,
+    updated_block = MAX(projects.updated_block, excluded.updated_block)
+"""
+UPDATE_SQL = """
+INSERT INTO projects (project_id, metadata_uri, updated_block) VALUES (?, ?, ?)
+ON CONFLICT (project_id) DO UPDATE SET
+    metadata_uri = excluded.metadata_uri,
+    updated_block = MAX(projects.updated_block, excluded.updated_block)
+"""
+TRANSFER_SQL = """
+INSERT INTO projects (project_id, owner, updated_block) VALUES (?, ?, ?)
+ON CONFLICT (project_id) DO UPDATE SET
+    owner = excluded.owner,
+    updated_block = MAX(projects.updated_block, excluded.updated_block)
+"""
+VERIFY_SQL = """
+INSERT INTO projects (project_id, status, updated_block) VALUES (?, 2, ?)
+ON CONFLICT (project_id) DO UPDATE SET
+    status = 2,
+    updated_block = MAX(projects.updated_block, excluded.updated_block)
+"""
+
+
+def _hex_to_int(value) -> int:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return int.from_bytes(value, 'big')
+    return int(value, 16)
+
+
+def _to_bytes(value) -> bytes:
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return bytes.fromhex(value[2:] if value.startswith('0x') else value)
+
+
+class ProjectIndex:
+    def __init__(self, path: Optional[str] = None):
+        """
+        SQLite mirror of ProjectNFT project state built from contract events
+
+        Args:
+            path: Database file. Defaults to the PROJECT_INDEX_PATH environment
+                variable or data/project_index.db; ":memory:" keeps it in memory
+        """
+        self.path = path or os.getenv("PROJECT_INDEX_PATH", DEFAULT_INDEX_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    @property
+    def last_block(self) -> Optional[int]:
+        """Last block whose events are fully applied, or None before the first sync"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM index_state WHERE key = 'last_block'").fetchone()
+        return row[0] if row else None
+
+    def apply_logs(self, logs: Iterable[Dict], last_block: Optional[int] = None) -> int:
+        """
+        Apply ProjectNFT event logs in one transaction
+
+        Args:
+            logs: Raw eth_getLogs entries, in chain order
+            last_block: Block to record as fully processed together with the logs
+
+        Returns:
+            Number of project events applied
+        """
+        applied = 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for log in logs:
+                    applied += self._apply_log(log)
+                if last_block is not None:
+                    self._conn.execute(
+                        "INSERT INTO index_state (key, value) VALUES ('last_block', ?) "
+                        "ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)",
+                        (last_block,)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return applied
+
+    def _apply_log(self, log: Dict) -> int:
+        topics = ["0x" + _to_bytes(topic).hex() for topic in log['topics']]
+        if not topics:
+            return 0
+        block_number = _hex_to_int(log['blockNumber'])
+        if topics[0] == TOPIC_TRANSFER:
+            # Transfer(from, to, tokenId); a burn leaves the project without an owner
+            owner = to_checksum_address(_to_bytes(topics[2])[-20:])
+            self._conn.execute(TRANSFER_SQL, (_hex_to_int(topics[3]), None if owner == ZERO_ADDRESS else owner,
+                                              block_number))
+            return 1
+        project_id = _hex_to_int(topics[1])
+        if topics[0] == TOPIC_PROJECT_REGISTERED:
+            owner = to_checksum_address(_to_bytes(topics[2])[-20:])
+            (metadata_uri,) = decode(['string'], _to_bytes(log['data']))
+            self._conn.execute(REGISTER_SQL, (project_id, owner, metadata_uri, block_number, block_number))
+        elif topics[0] == TOPIC_PROJECT_UPDATED:
+            (metadata_uri,) = decode(['string'], _to_bytes(log['data']))
+            self._conn.execute(UPDATE_SQL, (project_id, metadata_uri, block_number))
+        elif topics[0] == TOPIC_PROJECT_VERIFIED:
+            self._conn.execute(VERIFY_SQL, (project_id, block_number))
+        else:
+            return 0
+        return 1
+
+    def mark_verified(self, project_ids: Iterable[int], block_number: int):
+        """Record verifications known from our own confirmed receipts ahead of the log sync"""
+        with self._lock:
+            self._conn.executemany(VERIFY_SQL, [(project_id, block_number) for project_id in project_ids])
+
+    def get_status(self, project_id: int) -> Optional[int]:
+        """Indexed status of a registered project, or None if it is not in the index"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status FROM projects WHERE project_id = ? AND owner IS NOT NULL", (project_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_statuses(self, project_ids: List[int]) -> Dict[int, int]:
+        """Indexed statuses of the given registered projects; unindexed IDs are omitted"""
+        statuses = {}
+        with self._lock:
+            # Stay below SQLite's bound-parameter limit
+            for start in range(0, len(project_ids), 500):
+                chunk = project_ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT project_id, status FROM projects WHERE owner IS NOT NULL "
+                    f"AND project_id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                statuses.update(rows)
+        return statuses
+
+    def list_projects(self, status: Optional[int] = None, owner: Optional[str] = None,
+                      limit: int = 100, after: int = 0) -> List[Dict]:
+        """
+        List registered projects filtered by status and/or owner
+
+        Results are ordered by project ID; pass the last returned ID as after
+        to fetch the next page.
+        """
+        query = ("SELECT project_id, owner, metadata_uri, status, registered_block, updated_block "
+                 "FROM projects WHERE owner IS NOT NULL AND project_id > ?")
+        params = [after]
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        if owner is not None:
+            query += " AND owner = ?"
+            params.append(to_checksum_address(owner))
+        query += " ORDER BY project_id LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            {'projectId': row[0], 'owner': row[1], 'metadataURI': row[2], 'status': row[3],
+             'registeredBlock': row[4], 'updatedBlock': row[5]}
+            for row in rows
+        ]
+
+    def count(self, status: Optional[int] = None) -> int:
+        with self._lock:
+            if status is None:
+                row = self._conn.execute("SELECT COUNT(*) FROM projects WHERE owner IS NOT NULL").fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT COUNT(*) FROM projects WHERE owner IS NOT NULL AND status = ?", (status,)
+                ).fetchone()
+        return row[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ProjectIndexer:
+    def __init__(self, bridge, index: ProjectIndex, start_block: int = 0, chunk_size: int = 2000,
+                 confirmations: int = 0, poll_interval: float = 5.0):
+        """
+        Follow ProjectNFT events into a ProjectIndex with chunked eth_getLogs
+
+        Args:
+            bridge: Web3Bridge whose node and contract address are indexed
+            index: Store receiving the events; syncing resumes after its last block
+            start_block: First block to scan when the index is empty (the deployment block)
+            chunk_size: Blocks per eth_getLogs request; halved when the node rejects a range
+            confirmations: Blocks behind head to stay, so reorged events are not indexed
+            poll_interval: Seconds between sync rounds of the background task
+        """
+        self.bridge = bridge
+        self.index = index
+        self.start_block = start_block
+        self.chunk_size = chunk_size
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def sync(self) -> int:
+        """
+        Index every event up to the confirmed head
+
+        Returns:
+            Number of project events applied
+        """
+        head = await self.bridge.w3.eth.block_number - self.confirmations
+        last_block = self.index.last_block
+        from_block = self.start_block if last_block is None else last_block + 1
+        applied = 0
+        chunk_size = self.chunk_size
+
+        while from_block <= head:
+            to_block = min(from_block + chunk_size - 1, head)
+            try:
+                logs = await self._get_logs(from_block, to_block)
+            except Exception as e:
+                # Providers cap the range or result count of a single query
+                if chunk_size == 1:
+                    raise
+                chunk_size = max(1, chunk_size // 2)
+                logger.warning(f"eth_getLogs {from_block}-{to_block} failed, retrying with {chunk_size} blocks: {str(e)}")
+                continue
+            logs = sorted(logs, key=lambda log: (_hex_to_int(log['blockNumber']), _hex_to_int(log['logIndex'])))
+            applied += await asyncio.to_thread(self.index.apply_logs, logs, to_block)
+            from_block = to_block + 1
+
+        if applied:
+            logger.info(f"Indexed {applied} project events up to block {head}")
+        return applied
+
+    async def _get_logs(self, from_block: int, to_block: int) -> List[Dict]:
+        """
+        Raw eth_getLogs entries of the contract's project events in a block range
+
+        The request goes straight to the provider: web3's result formatters
+        checksum the address of every log on the event loop, which stalls it
+        for hundreds of milliseconds on a large range, and apply_logs reads
+        the raw hex fields anyway.
+
+        Raises:
+            ValueError: If the node returns an error, e.g. for a range too large
+        """
+        response = await self.bridge.w3.provider.make_request('eth_getLogs', [{
+            'address': self.bridge.contract_address,
+            'fromBlock': hex(from_block),
+            'toBlock': hex(to_block),
+            'topics': [PROJECT_TOPICS],
+        }])
+        if response.get('error'):
+            raise ValueError(response['error'])
+        return response['result']
+
+    async def start(self):
+        """Start syncing in the background on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Project indexer started")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Project index sync failed: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
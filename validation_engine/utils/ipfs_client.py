@@ -0,0 +1,128 @@
+import aiohttp
+import base64
+import hashlib
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default UnixFS chunk size; content up to this size is stored as a single raw block
+MAX_RAW_BLOCK_SIZE = 262144
+
+# CIDv1 prefix: version 1, raw codec (0x55), sha2-256 multihash of 32 bytes
+_CIDV1_RAW_SHA256_PREFIX = bytes([0x01, 0x55, 0x12, 0x20])
+
+
+def compute_cid(data: bytes) -> str:
+    """
+    CID that `ipfs add --cid-version=1 --raw-leaves` assigns to data
+
+    Only single-block content (up to MAX_RAW_BLOCK_SIZE bytes) can be addressed
+    without building a UnixFS DAG.
+    """
+    if len(data) > MAX_RAW_BLOCK_SIZE:
+        raise ValueError(f"Content of {len(data)} bytes exceeds a single raw block")
+    cid = _CIDV1_RAW_SHA256_PREFIX + hashlib.sha256(data).digest()
+    # Multibase 'b': lowercase RFC 4648 base32 without padding
+    return "b" + base64.b32encode(cid).decode().lower().rstrip("=")
+
+
+def multiaddr_to_url(address: str) -> str:
+    """
+    Convert an IPFS API multiaddr (e.g. /ip4/127.0.0.1/tcp/5001) to an HTTP base URL
+
+    Plain http(s):// URLs are returned unchanged.
+    """
+    if address.startswith(("http://", "https://")):
+        return address.rstrip("/")
+
+    parts = [part for part in address.split("/") if part]
+    if len(parts) < 4 or parts[0] not in ("ip4", "ip6", "dns", "dns4", "dns6") or parts[2] != "tcp":
+        raise ValueError(f"Unsupported IPFS API address: {address}")
+
+    host = f"[{parts[1]}]" if parts[0] == "ip6" else parts[1]
+    scheme = "https" if "https" in parts[4:] else "http"
+    return f"{scheme}://{host}:{parts[3]}"
+
+
+class AsyncIPFSClient:
+    def __init__(self, api_address: str, max_connections: int = 32, timeout: float = 30.0):
+        """
+        Minimal asyncio client for the IPFS HTTP API
+
+        Args:
+            api_address: API multiaddr or http(s) URL of the IPFS node
+            max_connections: Size of the pooled HTTP connection limit
+            timeout: Total per-request timeout in seconds
+        """
+        self.base_url = multiaddr_to_url(api_address)
+        self.max_connections = max_connections
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created lazily so the client can be constructed outside a running loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=self.timeout
+            )
+        return self._session
+
+    async def add_bytes(self, data: bytes, filename: str = "data.json", cid_version: int = 0,
+                        raw_leaves: bool = False) -> str:
+        """
+        Add raw bytes to IPFS
+
+        Args:
+            data: Content to add
+            filename: Name of the file in the upload
+            cid_version: CID version the node assigns; 1 as for add_directory
+            raw_leaves: Store leaf blocks as raw blocks rather than UnixFS nodes
+
+        Returns:
+            CID of the added content
+        """
+        form = aiohttp.FormData()
+        form.add_field("file", data, filename=filename, content_type="application/octet-stream")
+        params = {"cid-version": str(cid_version), "raw-leaves": "true" if raw_leaves else "false"}
+        async with self._get_session().post(f"{self.base_url}/api/v0/add", data=form, params=params) as response:
+            response.raise_for_status()
+            result = await response.json(content_type=None)
+        return result["Hash"]
+
+    async def add_json(self, data: Dict) -> str:
+        """Encode a JSON-serializable object once and add it to IPFS"""
+        return await self.add_bytes(json.dumps(data).encode())
+
+    async def add_directory(self, files: List[Tuple[str, bytes]]) -> Tuple[str, Dict[str, str]]:
+        """
+        Add several files in one request, wrapped in a directory
+
+        Files are added as CIDv1 raw leaves, so single-block files get the CID
+        computed by compute_cid.
+
+        Returns:
+            Tuple of (directory CID, mapping of file name to CID)
+        """
+        form = aiohttp.FormData()
+        for name, data in files:
+            form.add_field("file", data, filename=name, content_type="application/octet-stream")
+        params = {"wrap-with-directory": "true", "cid-version": "1", "raw-leaves": "true", "pin": "true"}
+        async with self._get_session().post(f"{self.base_url}/api/v0/add", data=form, params=params) as response:
+            response.raise_for_status()
+            body = await response.text()
+
+        # The API streams one JSON object per added entry; the wrapping directory has an empty name
+        entries = [json.loads(line) for line in body.splitlines() if line.strip()]
+        file_cids = {entry["Name"]: entry["Hash"] for entry in entries if entry["Name"]}
+        directory = next((entry["Hash"] for entry in entries if not entry["Name"]), None)
+        if directory is None:
+            raise ValueError("IPFS response did not include the wrapping directory")
+        return directory, file_cids
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
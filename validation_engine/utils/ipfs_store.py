@@ -0,0 +1,219 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import os
+
+from utils.ipfs_client import AsyncIPFSClient, compute_cid
+from utils.serialization import canonical_json
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPOOL_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'ipfs_spool')
+# Suffix of spooled files the node stored under a different CID; kept for inspection, never re-uploaded
+MISMATCH_SUFFIX = ".mismatch"
+
+
+class IPFSWriteBehindStore:
+    def __init__(self, client: AsyncIPFSClient, spool_dir: Optional[str] = None, batch_size: int = 256,
+                 flush_interval: float = 1.0, max_retry_delay: float = 60.0, dedupe_size: int = 100000):
+        """
+        Content-addressed result storage that writes to IPFS behind the request path
+
+        put_json computes the CID locally and spools the content to disk; a
+        background task uploads spooled content in batches, one wrapping
+        directory per batch. Spooled files survive restarts and are uploaded
+        on the next start. A file the node stores under a CID other than the
+        one returned by put_json is counted as failed and left in the spool
+        with a .mismatch suffix.
+
+        Args:
+            client: IPFS API client used for uploads
+            spool_dir: Directory of content awaiting upload. Defaults to the
+                IPFS_SPOOL_DIR environment variable or data/ipfs_spool
+            batch_size: Maximum number of files per upload
+            flush_interval: Seconds between flushes of a partial batch
+            max_retry_delay: Upper bound of the backoff between failed uploads
+            dedupe_size: Number of recently stored CIDs remembered for deduplication
+        """
+        self.client = client
+        self.spool_dir = spool_dir or os.getenv("IPFS_SPOOL_DIR", DEFAULT_SPOOL_DIR)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retry_delay = max_retry_delay
+        self.dedupe_size = dedupe_size
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+        self._pending: "OrderedDict[str, None]" = OrderedDict(
+            (name, None) for name in sorted(os.listdir(self.spool_dir), key=self._spool_mtime)
+            if not name.endswith((".tmp", MISMATCH_SUFFIX))
+        )
+        self._stored: "OrderedDict[str, None]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.uploaded = 0
+        self.deduplicated = 0
+        self.failed = 0
+        self.last_directory: Optional[str] = None
+
+    def _spool_mtime(self, name: str) -> float:
+        return os.path.getmtime(os.path.join(self.spool_dir, name))
+
+    def _spool_path(self, cid: str) -> str:
+        return os.path.join(self.spool_dir, cid)
+
+    async def put_json(self, data: Any) -> str:
+        """Store a JSON document; returns its CID before it reaches IPFS"""
+        return await self.put_bytes(canonical_json(data))
+
+    async def put_bytes(self, data: bytes) -> str:
+        """
+        Store raw content; returns its CID before it reaches IPFS
+
+        Content larger than a single raw block is uploaded synchronously, since
+        its CID depends on the node's DAG layout; it is added with the same
+        CID version and leaf encoding as batched uploads.
+        """
+        try:
+            cid = compute_cid(data)
+        except ValueError:
+            return await self.client.add_bytes(data, cid_version=1, raw_leaves=True)
+
+        if cid in self._pending or cid in self._stored:
+            self.deduplicated += 1
+            return cid
+
+        # A small page-cache write; cheaper inline than a thread handoff per result
+        self._write_spool_file(cid, data)
+        self._pending[cid] = None
+        if self._wakeup is not None and len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return cid
+
+    def _write_spool_file(self, cid: str, data: bytes):
+        path = self._spool_path(cid)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def pending(self) -> int:
+        """Number of spooled files not yet uploaded"""
+        return len(self._pending)
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "uploaded": self.uploaded,
+            "deduplicated": self.deduplicated,
+            "failed": self.failed,
+            "last_directory": self.last_directory,
+        }
+
+    async def start(self):
+        """Start the background uploader on the running event loop"""
+        if self._worker is None:
+            self._wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._worker = asyncio.create_task(self._run())
+            logger.info(f"IPFS write-behind store started with {len(self._pending)} spooled files")
+
+    async def stop(self, flush: bool = True):
+        """Stop the uploader, optionally uploading what is still spooled first"""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if flush and self._pending:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Final IPFS flush failed, {len(self._pending)} files stay spooled: {str(e)}")
+
+    async def flush(self) -> int:
+        """
+        Upload every spooled file now
+
+        Returns:
+            Number of files uploaded
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        uploaded = 0
+        async with self._flush_lock:
+            while self._pending:
+                uploaded += await self._upload_batch(list(self._pending)[:self.batch_size])
+        return uploaded
+
+    async def _upload_batch(self, cids: List[str]) -> int:
+        """
+        Upload spooled files as one directory
+
+        Raises:
+            ValueError: If the node stored any file under a different CID, after
+                the rest of the batch is recorded as uploaded
+        """
+        files = await asyncio.to_thread(self._read_spool_files, cids)
+        directory, file_cids = await self.client.add_directory(files)
+
+        # The node chunked or encoded these differently than compute_cid assumed
+        mismatched = {cid: file_cids.get(cid) for cid in cids if file_cids.get(cid) != cid}
+        stored = [cid for cid in cids if cid not in mismatched]
+        await asyncio.to_thread(self._remove_spool_files, stored)
+        await asyncio.to_thread(self._set_aside_spool_files, list(mismatched))
+        for cid in cids:
+            self._pending.pop(cid, None)
+        for cid in stored:
+            self._remember(cid)
+
+        self.uploaded += len(stored)
+        self.failed += len(mismatched)
+        self.last_directory = directory
+        logger.info(f"Uploaded {len(stored)} results to IPFS directory {directory}")
+        if mismatched:
+            raise ValueError(f"IPFS stored {len(mismatched)} spooled files under other CIDs, kept with a "
+                             f"{MISMATCH_SUFFIX} suffix: " +
+                             ", ".join(f"{cid} as {stored_as}" for cid, stored_as in mismatched.items()))
+        return len(stored)
+
+    def _read_spool_files(self, cids: List[str]) -> List:
+        files = []
+        for cid in cids:
+            with open(self._spool_path(cid), "rb") as f:
+                files.append((cid, f.read()))
+        return files
+
+    def _remove_spool_files(self, cids: List[str]):
+        for cid in cids:
+            try:
+                os.remove(self._spool_path(cid))
+            except FileNotFoundError:
+                pass
+
+    def _set_aside_spool_files(self, cids: List[str]):
+        for cid in cids:
+            os.replace(self._spool_path(cid), self._spool_path(cid) + MISMATCH_SUFFIX)
+
+    def _remember(self, cid: str):
+        self._stored[cid] = None
+        while len(self._stored) > self.dedupe_size:
+            self._stored.popitem(last=False)
+
+    async def _run(self):
+        retry_delay = self.flush_interval
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=retry_delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._pending:
+                continue
+            try:
+                await self.flush()
+                retry_delay = self.flush_interval
+            except Exception as e:
+                retry_delay = min(max(retry_delay, self.flush_interval) * 2, self.max_retry_delay)
+                logger.error(f"IPFS flush of {len(self._pending)} files failed, retrying in {retry_delay:.1f}s: {str(e)}")
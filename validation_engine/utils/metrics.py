@@ -0,0 +1,102 @@
+from collections import Counter as Tally
+from contextlib import contextmanager
+from typing import Callable, Iterable, Tuple
+import functools
+import time
+
+from prometheus_client import Counter, Gauge, Histogram, Info
+
+# Validation stages run from tens of microseconds (rules) to seconds (receipt waits)
+STAGE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_SECONDS = Histogram(
+    'validation_stage_seconds', 'Time spent in each stage of the validation pipeline',
+    ['stage'], buckets=STAGE_BUCKETS
+)
+WEB3_CALL_SECONDS = Histogram(
+    'web3_call_seconds', 'Latency of Web3Bridge calls to the Ethereum node',
+    ['method'], buckets=STAGE_BUCKETS
+)
+ADMISSION_QUEUE_SECONDS = Histogram(
+    'admission_queue_seconds', 'Time requests waited for a slot in a pipeline stage',
+    ['stage', 'priority'], buckets=STAGE_BUCKETS
+)
+ADMISSION_REJECTIONS = Counter(
+    'admission_rejections_total', 'Requests turned away by admission control',
+    ['reason']  # rate_limited (429) or queue_full (503)
+)
+VERDICTS = Counter('validation_verdicts_total', 'Validation verdicts', ['verdict'])
+REJECTIONS = Counter('validation_rejections_total', 'Rejected validations by reason category', ['reason'])
+IDEMPOTENT_REQUESTS = Counter(
+    'validation_idempotent_requests_total', 'Validation requests by how they were answered',
+    ['outcome']  # stored, coalesced or validated
+)
+TELEMETRY_READINGS = Counter(
+    'telemetry_readings_total', 'Telemetry readings received',
+    ['outcome']  # accepted, or dropped as invalid or older than the project's windows
+)
+RULE_FAILURES = Counter('validation_rule_failures_total', 'Rule violations by rule name', ['rule'])
+QUEUE_DEPTH = Gauge('verification_queue_depth', 'Verification jobs waiting to be submitted')
+IPFS_PENDING = Gauge('ipfs_spool_pending', 'Validation results spooled but not yet uploaded to IPFS')
+MODEL_INFO = Info('validation_model', 'Anomaly model currently served')
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Observe the wall time of the enclosed block as one pipeline stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def observe_web3_call(method: str) -> Callable:
+    """Decorate an async Web3Bridge method to record its latency"""
+    def decorator(func):
+        histogram = WEB3_CALL_SECONDS.labels(method)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def rejection_category(reason: str) -> str:
+    """Bounded label for a rejection reason; rule messages embed values and would explode cardinality"""
+    if reason.startswith("Validation error"):
+        return "validation_error"
+    if reason.startswith("ML validation error"):
+        return "ml_error"
+    if reason.startswith("ML model detected"):
+        return "ml_anomaly"
+    if reason.startswith("Footprint and dates overlap"):
+        return "overlap"
+    return "rule"
+
+
+def record_verdict(is_valid: bool, reason: str):
+    """Count one validation verdict and, for rejections, its reason category"""
+    if is_valid:
+        VERDICTS.labels("verified").inc()
+    else:
+        VERDICTS.labels("rejected").inc()
+        REJECTIONS.labels(rejection_category(reason)).inc()
+
+
+def record_verdicts(results: Iterable[Tuple]):
+    """Count a batch of (is_valid, reason, details) verdicts with one increment per label"""
+    tally = Tally(None if is_valid else rejection_category(reason) for is_valid, reason, _ in results)
+    verified = tally.pop(None, 0)
+    if verified:
+        VERDICTS.labels("verified").inc(verified)
+    if tally:
+        VERDICTS.labels("rejected").inc(sum(tally.values()))
+        for category, count in tally.items():
+            REJECTIONS.labels(category).inc(count)
@@ -0,0 +1,217 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from typing import Callable, Dict, List, Optional, Set
+import asyncio
+import hmac
+import logging
+import os
+import sys
+import threading
+import uuid
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'profiles')
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# (file suffix, function) pairs of frames where a thread is parked rather than working
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+}
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES
+
+
+# Sampler of the request being profiled in the current context
+_active_sampler: ContextVar[Optional["StackSampler"]] = ContextVar("active_sampler", default=None)
+
+
+def bind_to_request(func: Callable) -> Callable:
+    """
+    Wrap func so the worker thread running it is sampled with the profiled request that submitted it
+
+    Executor threads do not inherit the submitting context, so call this
+    before handing func to the pool. Returns func unchanged when the
+    current request is not being profiled.
+    """
+    sampler = _active_sampler.get()
+    if sampler is None:
+        return func
+    return partial(_run_attributed, sampler, func)
+
+
+def _run_attributed(sampler: "StackSampler", func: Callable, *args, **kwargs):
+    with sampler.attribute():
+        return func(*args, **kwargs)
+
+
+ATTRIBUTED_CODE = _run_attributed.__code__
+
+
+class StackSampler:
+    def __init__(self, interval: float = 0.001, tasks: Optional[Set[asyncio.Task]] = None):
+        """
+        Wall-clock sampling profiler producing folded stacks
+
+        Samples the Python stack of every other thread of the process each
+        interval seconds. Threads parked in selectors, locks or queues are
+        skipped, so the profile shows where work happened.
+
+        Args:
+            interval: Seconds between samples
+            tasks: Restrict samples to stacks running one of these tasks on
+                the event loop, plus work wrapped with bind_to_request. None
+                samples every thread
+        """
+        self.interval = interval
+        self.tasks = tasks
+        self.samples: Counter = Counter()
+        self._threads: Set[int] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.tasks is not None:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    @contextmanager
+    def attribute(self):
+        """Mark the calling thread as running work of the sampled tasks; used by bind_to_request"""
+        thread_id = threading.get_ident()
+        self._threads.add(thread_id)
+        try:
+            yield
+        finally:
+            self._threads.discard(thread_id)
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.samples
+
+    def _sampled(self, thread_id: int, frames: List) -> bool:
+        # Decided from the captured frames, as the thread may have moved on to other work since
+        if self.tasks is None:
+            return True
+        if thread_id == self._loop_thread:
+            task_frames = {id(getattr(task.get_coro(), 'cr_frame', None)) for task in list(self.tasks)}
+            return any(id(frame) in task_frames for frame in frames)
+        return thread_id in self._threads and any(frame.f_code is ATTRIBUTED_CODE for frame in frames)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names: Dict[int, str] = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or _is_idle(frame):
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(frame)
+                    frame = frame.f_back
+                if not self._sampled(thread_id, frames):
+                    continue
+                stack = [_frame_label(frame) for frame in frames]
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def write_folded(self, path: str):
+        """Write samples in the folded format read by flamegraph.pl and speedscope"""
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, token: Optional[str] = None, output_dir: Optional[str] = None,
+                 interval: float = 0.001):
+        """
+        ASGI middleware profiling requests that carry a matching X-Profile header
+
+        Only the request's own work is sampled: its task and the tasks it
+        starts on the event loop, and executor work wrapped with
+        bind_to_request. The folded-stack profile is written to output_dir as
+        <id>.folded and the opaque id returned in the X-Profile-Id response
+        header. Without a token profiling is off and requests pass straight
+        through. One request is profiled at a time.
+
+        Args:
+            app: ASGI application to wrap
+            token: Value the X-Profile header must carry to enable profiling
+            output_dir: Directory for profiles. Defaults to data/profiles
+            interval: Seconds between stack samples
+        """
+        self.app = app
+        self.token = token.encode() if token else None
+        self.output_dir = output_dir or DEFAULT_PROFILE_DIR
+        self.interval = interval
+        self._busy = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if self.token is None or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        requested = next((value for name, value in scope["headers"] if name == PROFILE_HEADER), None)
+        if requested is None or not hmac.compare_digest(requested, self.token):
+            return await self.app(scope, receive, send)
+        if not self._busy.acquire(blocking=False):
+            logger.warning("Profile requested while another request is being profiled; skipping")
+            return await self.app(scope, receive, send)
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._busy.release()
+
+    async def _profile(self, scope, receive, send):
+        os.makedirs(self.output_dir, exist_ok=True)
+        profile_id = uuid.uuid4().hex
+        path = os.path.join(self.output_dir, f"{profile_id}.folded")
+
+        async def send_with_header(message):
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=list(message.get("headers", [])) + [(PROFILE_ID_HEADER, profile_id.encode())])
+            await send(message)
+
+        sampler = StackSampler(self.interval, tasks={asyncio.current_task()})
+        loop = asyncio.get_running_loop()
+        previous_factory = loop.get_task_factory()
+        loop.set_task_factory(partial(_follow_tasks, previous_factory))
+        token = _active_sampler.set(sampler)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_header)
+        finally:
+            sampler.stop()
+            _active_sampler.reset(token)
+            loop.set_task_factory(previous_factory)
+            sampler.write_folded(path)
+            logger.info(f"Wrote profile {profile_id} of {scope['path']} with "
+                        f"{sum(sampler.samples.values())} samples to {path}")
+
+
+def _follow_tasks(factory, loop, coro, **kwargs) -> asyncio.Task:
+    # Tasks started from a profiled request are sampled with it
+    task = factory(loop, coro, **kwargs) if factory is not None else asyncio.Task(coro, loop=loop, **kwargs)
+    sampler = _active_sampler.get()
+    if sampler is not None:
+        sampler.tasks.add(task)
+    return task
@@ -0,0 +1,243 @@
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import orjson
+
+from utils.serialization import content_hash
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULT_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'results.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    token_id INTEGER NOT NULL,
+    payload_hash TEXT NOT NULL,
+    response TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    PRIMARY KEY (token_id, payload_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_results_token ON results (token_id, stored_at);
+-- On-chain verification jobs of every worker sharing the file, by the jobId in stored responses
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    job TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+# The first response stored for a key wins; a later writer reads it back instead
+INSERT_SQL = "INSERT INTO results VALUES (?, ?, ?, ?) ON CONFLICT (token_id, payload_hash) DO NOTHING"
+
+ResultKey = Tuple[int, str]
+
+
+def payload_hash(payload: Dict) -> str:
+    """SHA-256 of a request payload's canonical JSON, so key order and whitespace do not matter"""
+    return content_hash(payload)
+
+
+class ResultStore:
+    def __init__(self, path: Optional[str] = None):
+        """
+        Persistent signed validation responses keyed by tokenId and payload hash
+
+        A retried request finds its earlier response here and is answered
+        without re-running validation, IPFS storage or the on-chain update.
+        The verification jobs those responses refer to are recorded here too,
+        so a retry handled by another worker, or after a restart, can tell a
+        pending job from a lost one.
+
+        Args:
+            path: Database file. Defaults to the RESULT_STORE_PATH environment
+                variable or data/results.db; ":memory:" keeps it in memory
+        """
+        self.path = path or os.getenv("RESULT_STORE_PATH", DEFAULT_RESULT_STORE_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token_id: int, digest: str) -> Optional[Dict]:
+        """Stored response for a request, or None if it was never answered"""
+        return self.get_many([(token_id, digest)]).get((token_id, digest))
+
+    def get_many(self, keys: List[ResultKey]) -> Dict[ResultKey, Dict]:
+        """Stored responses of the given (token_id, payload_hash) keys; unknown keys are omitted"""
+        found = {}
+        with self._lock:
+            # Two bound parameters per key; stay below SQLite's limit
+            for start in range(0, len(keys), 250):
+                chunk = keys[start:start + 250]
+                rows = self._conn.execute(
+                    f"SELECT token_id, payload_hash, response FROM results "
+                    f"WHERE (token_id, payload_hash) IN (VALUES {','.join('(?, ?)' for _ in chunk)})",
+                    [value for key in chunk for value in key]
+                ).fetchall()
+                found.update({(token_id, digest): orjson.loads(response) for token_id, digest, response in rows})
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put(self, token_id: int, digest: str, response: Dict) -> Dict:
+        """Store a response unless one is already stored for the key; returns the stored response"""
+        return self.put_many([((token_id, digest), response)])[0]
+
+    def put_many(self, items: List[Tuple[ResultKey, Dict]]) -> List[Dict]:
+        """
+        Store responses in one transaction
+
+        Another process may have answered the same request first; its
+        response is kept and returned in place of ours, so every caller of a
+        key sees the same signed result.
+
+        Args:
+            items: ((token_id, payload_hash), response) pairs
+
+        Returns:
+            The stored response per item
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                stored = []
+                for (token_id, digest), response in items:
+                    cursor = self._conn.execute(INSERT_SQL, (token_id, digest, orjson.dumps(response).decode(), now))
+                    if cursor.rowcount:
+                        stored.append(response)
+                    else:
+                        row = self._conn.execute(
+                            "SELECT response FROM results WHERE token_id = ? AND payload_hash = ?",
+                            (token_id, digest)
+                        ).fetchone()
+                        stored.append(orjson.loads(row[0]))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return stored
+
+    def replace_many(self, items: List[Tuple[ResultKey, Dict]]):
+        """
+        Overwrite stored responses in one transaction
+
+        Used when the on-chain part of a stored response changes, e.g. its
+        verification job was re-queued; the signed validation is unchanged.
+
+        Args:
+            items: ((token_id, payload_hash), response) pairs of stored keys
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "UPDATE results SET response = ? WHERE token_id = ? AND payload_hash = ?",
+                    [(orjson.dumps(response).decode(), token_id, digest) for (token_id, digest), response in items]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def latest(self, token_id: int) -> Optional[Dict]:
+        """Most recently stored response for a project, or None if it was never validated"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM results WHERE token_id = ? ORDER BY stored_at DESC, rowid DESC LIMIT 1",
+                (token_id,)
+            ).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def put_jobs(self, jobs: List[Dict]):
+        """Record the current state of verification jobs, as VerificationJob.to_dict() returns them"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?)",
+                                       [(job['job_id'], orjson.dumps(job).decode(), now) for job in jobs])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get_jobs(self, job_ids: List[str]) -> Dict[str, Tuple[Dict, float]]:
+        """Recorded jobs by ID as (job, time of its last update); unknown IDs are omitted"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(job_ids), 500):
+                chunk = job_ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT job_id, job, updated_at FROM jobs WHERE job_id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update({job_id: (orjson.loads(job), updated_at) for job_id, job, updated_at in rows})
+        return found
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def stats(self) -> Dict:
+        return {'size': len(self), 'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RequestCoalescer:
+    def __init__(self):
+        """
+        Runs at most one task per key at a time
+
+        Callers that arrive while a task for their key is in flight await
+        that task instead of starting another. The task is shielded, so one
+        caller disconnecting does not cancel the work the others wait on.
+        """
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable]):
+        """
+        Await the in-flight task for key, starting one from factory if there is none
+
+        Returns:
+            The task's result; its exception is raised to every waiter
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so a task whose waiters all went away is not reported as unhandled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict:
+        return {'in_flight': len(self._inflight), 'started': self.started, 'coalesced': self.coalesced}
@@ -0,0 +1,100 @@
+"""
+Encoding of validation payloads
+
+canonical_json is the one deterministic encoding of a document: keys
+sorted, no whitespace, UTF-8. A result record is encoded once and the same
+bytes are hashed for its CID, signed and spooled to IPFS. Request bodies
+are decoded by their Content-Type and responses encoded in the media type
+the client's Accept header prefers: JSON, msgpack or NDJSON.
+"""
+from typing import Any, List
+import hashlib
+import logging
+
+import msgpack
+import orjson
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+NDJSON = "application/x-ndjson"
+
+# Accepted spellings of each media type, in Content-Type and Accept headers
+MEDIA_TYPES = {
+    "application/json": JSON,
+    "application/msgpack": MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    "application/x-ndjson": NDJSON,
+    "application/ndjson": NDJSON,
+    "application/jsonlines": NDJSON,
+    "application/x-jsonlines": NDJSON,
+}
+
+CANONICAL_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def canonical_json(data: Any) -> bytes:
+    """
+    Deterministic JSON encoding used for hashing, signing and storage
+
+    Keys are sorted at every level and values without a JSON type (dates,
+    decimals) are written as strings, so equal documents give equal bytes.
+    """
+    return orjson.dumps(data, default=str, option=CANONICAL_OPTIONS)
+
+
+def content_hash(data: Any) -> str:
+    """Hex SHA-256 of a document's canonical encoding, independent of key order"""
+    return hashlib.sha256(canonical_json(data)).hexdigest()
+
+
+def media_type(header: str) -> str:
+    """Canonical name of the media type in a Content-Type header; JSON when missing or unknown"""
+    return MEDIA_TYPES.get(header.split(";", 1)[0].strip().lower(), JSON)
+
+
+def negotiate(accept: str) -> str:
+    """
+    Response media type for an Accept header
+
+    The first supported type listed wins; quality values are not weighed.
+    Defaults to JSON, also for */* and a missing header.
+    """
+    for item in accept.split(","):
+        name = item.split(";", 1)[0].strip().lower()
+        if name in MEDIA_TYPES:
+            return MEDIA_TYPES[name]
+    return JSON
+
+
+def decode(body: bytes, content_type: str) -> Any:
+    """
+    Parse a request body by its media type
+
+    NDJSON yields the list of its non-blank lines.
+
+    Raises:
+        ValueError: If the body is not valid in its media type
+    """
+    kind = media_type(content_type)
+    try:
+        if kind == NDJSON:
+            return [orjson.loads(line) for line in body.splitlines() if line.strip()]
+        if kind == MSGPACK:
+            return msgpack.unpackb(body, raw=False)
+        return orjson.loads(body)
+    except (msgpack.UnpackException, ValueError) as e:
+        raise ValueError(f"Malformed {kind} body: {str(e)}")
+
+
+def encode(data: Any, kind: str) -> bytes:
+    """Encode a response document, or for NDJSON a list of them, in the given media type"""
+    if kind == MSGPACK:
+        return msgpack.packb(data, use_bin_type=True, default=str)
+    if kind == NDJSON:
+        items: List = data if isinstance(data, list) else [data]
+        return b"".join(orjson.dumps(item, default=str) + b"\n" for item in items)
+    return orjson.dumps(data, default=str)
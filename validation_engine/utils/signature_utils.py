@@ -1,74 +1,306 @@
-from eth_account import Account
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from eth_account.messages import defunct_hash_message
+from eth_keys import keys
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
 import json
 import hashlib
-from typing import Dict
+from typing import Any, Callable, Dict, List, Optional
 import os
 from dotenv import load_dotenv
 
+from utils.serialization import canonical_json
+
 # Load environment variables
 load_dotenv()
 
+# Items per task handed to a signing worker process
+SIGN_CHUNK_SIZE = 512
+
+
+def legacy_canonical_json(data: Any) -> bytes:
+    """
+    Encoding of results signed by earlier releases
+
+    New results are signed over canonical_json. verify_signature accepts
+    either encoding; verify with ValidationSigner(encoder=legacy_canonical_json)
+    to check only old ones.
+    """
+    return json.dumps(data, sort_keys=True).encode()
+
+
+def result_message_hash(encoded: bytes) -> bytes:
+    """
+    EIP-191 hash signed for a single result
+
+    The signed message is the hex SHA-256 digest of the encoded result, which
+    keeps signatures compatible with those issued by earlier releases.
+    """
+    return defunct_hash_message(text=hashlib.sha256(encoded).hexdigest())
+
+
+def _sign_hash(private_key: keys.PrivateKey, message_hash: bytes) -> str:
+    signature = private_key.sign_msg_hash(message_hash).to_bytes()
+    # eth_account encodes v as 27/28
+    return HexBytes(signature[:64] + bytes([signature[64] + 27])).hex()
+
+
+def _recover_hash(message_hash: bytes, signature: str) -> str:
+    signature_bytes = bytes(HexBytes(signature))
+    if len(signature_bytes) != 65:
+        raise ValueError("Signature must be 65 bytes")
+    v = signature_bytes[64]
+    signature_obj = keys.Signature(signature_bytes[:64] + bytes([v - 27 if v >= 27 else v]))
+    return signature_obj.recover_public_key_from_msg_hash(message_hash).to_checksum_address()
+
+
+# Signing key held by each worker process, installed once by the pool initializer
+_worker_key: Optional[keys.PrivateKey] = None
+
+
+def _init_worker(private_key_bytes: bytes):
+    global _worker_key
+    _worker_key = keys.PrivateKey(private_key_bytes)
+
+
+def _sign_hashes(message_hashes: List[bytes]) -> List[str]:
+    return [_sign_hash(_worker_key, message_hash) for message_hash in message_hashes]
+
+
+def _recover_hashes(pairs: List[tuple]) -> List[Optional[str]]:
+    addresses = []
+    for message_hash, signature in pairs:
+        try:
+            addresses.append(_recover_hash(message_hash, signature))
+        except Exception:
+            addresses.append(None)
+    return addresses
+
+
+def _merkle_leaf(encoded: bytes) -> bytes:
+    # Double-hashed leaves cannot be confused with internal nodes
+    return keccak(keccak(encoded))
+
+
+def _merkle_parent(left: bytes, right: bytes) -> bytes:
+    # Sorted pairs, as in OpenZeppelin's MerkleProof, so proofs need no position bits
+    return keccak(left + right) if left <= right else keccak(right + left)
+
+
+def build_merkle_tree(leaves: List[bytes]) -> List[List[bytes]]:
+    """
+    Build all levels of a Merkle tree, leaves first
+
+    An unpaired node at the end of a level is carried up unchanged.
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_merkle_parent(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_proof(levels: List[List[bytes]], index: int) -> List[str]:
+    """Sibling hashes proving the leaf at index is included under the root"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append("0x" + level[sibling].hex())
+        index //= 2
+    return proof
+
+
+def verify_merkle_proof(data: Any, proof: List[str], root: str,
+                        encoder: Callable[[Any], bytes] = canonical_json) -> bool:
+    """Check that a validation result is included under a Merkle root"""
+    node = _merkle_leaf(encoder(data))
+    for sibling in proof:
+        node = _merkle_parent(node, bytes(HexBytes(sibling)))
+    return node == bytes(HexBytes(root))
+
+
+@dataclass
+class MerkleSignedBatch:
+    """One signature over the Merkle root of a batch, with an inclusion proof per result"""
+    root: str
+    signature: str
+    proofs: List[List[str]] = field(default_factory=list)
+
+
+class ValidationSigner:
+    def __init__(self, private_key: Optional[str] = None,
+                 encoder: Callable[[Any], bytes] = canonical_json, workers: int = 0):
+        """
+        Signs validation results with a key loaded once
+
+        Args:
+            private_key: Validator private key. Defaults to the VALIDATOR_PRIVATE_KEY
+                environment variable
+            encoder: Canonical encoding of a result into the bytes that are hashed
+            workers: Processes used by sign_many/verify_many for large batches;
+                0 or 1 signs in the calling thread
+        """
+        private_key = private_key or os.getenv("VALIDATOR_PRIVATE_KEY")
+        if not private_key:
+            raise ValueError("Validator private key not found in environment variables")
+        self._private_key = keys.PrivateKey(bytes(HexBytes(private_key)))
+        self.address = self._private_key.public_key.to_checksum_address()
+        self.encoder = encoder
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self._private_key.to_bytes(),)
+            )
+        return self._pool
+
+    def _use_pool(self, count: int) -> bool:
+        return self.workers > 1 and count > SIGN_CHUNK_SIZE
+
+    def sign(self, data: Dict) -> str:
+        """Sign one validation result; returns the hex-encoded signature"""
+        return self.sign_encoded(self.encoder(data))
+
+    def sign_encoded(self, encoded: bytes) -> str:
+        """Sign a result already encoded with this signer's encoder, e.g. the bytes stored in IPFS"""
+        return _sign_hash(self._private_key, result_message_hash(encoded))
+
+    def verify(self, data: Dict, signature: str, address: Optional[str] = None) -> bool:
+        """Check a signature over one result against address (default: this signer)"""
+        try:
+            recovered = _recover_hash(result_message_hash(self.encoder(data)), signature)
+        except Exception:
+            return False
+        return recovered == to_checksum_address(address or self.address)
+
+    def sign_many(self, items: List[Dict]) -> List[str]:
+        """
+        Sign many validation results, spreading ECDSA work across the process pool
+
+        Encoding and hashing happen here; workers only receive 32-byte digests.
+        """
+        return self.sign_many_encoded([self.encoder(item) for item in items])
+
+    def sign_many_encoded(self, encoded_items: List[bytes]) -> List[str]:
+        """sign_many for results already encoded with this signer's encoder"""
+        message_hashes = [result_message_hash(encoded) for encoded in encoded_items]
+        if not self._use_pool(len(message_hashes)):
+            return [_sign_hash(self._private_key, message_hash) for message_hash in message_hashes]
+        chunks = [message_hashes[i:i + SIGN_CHUNK_SIZE] for i in range(0, len(message_hashes), SIGN_CHUNK_SIZE)]
+        return [signature for chunk in self._get_pool().map(_sign_hashes, chunks) for signature in chunk]
+
+    def verify_many(self, items: List[Dict], signatures: List[str],
+                    address: Optional[str] = None) -> List[bool]:
+        """Check one signature per result, recovering signers across the process pool"""
+        if len(items) != len(signatures):
+            raise ValueError("Expected one signature per item")
+        expected = to_checksum_address(address or self.address)
+        pairs = [(result_message_hash(self.encoder(item)), signature) for item, signature in zip(items, signatures)]
+        if not self._use_pool(len(pairs)):
+            recovered = _recover_hashes(pairs)
+        else:
+            chunks = [pairs[i:i + SIGN_CHUNK_SIZE] for i in range(0, len(pairs), SIGN_CHUNK_SIZE)]
+            recovered = [address for chunk in self._get_pool().map(_recover_hashes, chunks) for address in chunk]
+        return [address == expected for address in recovered]
+
+    def sign_merkle_batch(self, items: List[Dict]) -> MerkleSignedBatch:
+        """
+        Sign a whole batch with one signature over the Merkle root of its results
+
+        Each result is accompanied by an inclusion proof; verify_merkle_proof plus
+        recovering the root signature authenticates any single result.
+        """
+        return self.sign_merkle_encoded([self.encoder(item) for item in items])
+
+    def sign_merkle_encoded(self, encoded_items: List[bytes]) -> MerkleSignedBatch:
+        """sign_merkle_batch for results already encoded with this signer's encoder"""
+        levels = build_merkle_tree([_merkle_leaf(encoded) for encoded in encoded_items])
+        root = levels[-1][0]
+        return MerkleSignedBatch(
+            root="0x" + root.hex(),
+            signature=_sign_hash(self._private_key, defunct_hash_message(primitive=root)),
+            proofs=[merkle_proof(levels, index) for index in range(len(encoded_items))]
+        )
+
+    def verify_merkle_item(self, data: Dict, proof: List[str], root: str, signature: str,
+                           address: Optional[str] = None) -> bool:
+        """Check a result's inclusion proof and the signature over its batch root"""
+        if not verify_merkle_proof(data, proof, root, self.encoder):
+            return False
+        try:
+            recovered = _recover_hash(defunct_hash_message(primitive=bytes(HexBytes(root))), signature)
+        except Exception:
+            return False
+        return recovered == to_checksum_address(address or self.address)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+_default_signer: Optional[ValidationSigner] = None
+
+
+def _get_default_signer() -> ValidationSigner:
+    global _default_signer
+    private_key = os.getenv("VALIDATOR_PRIVATE_KEY")
+    if _default_signer is None or (private_key and bytes(HexBytes(private_key)) != _default_signer._private_key.to_bytes()):
+        _default_signer = ValidationSigner(private_key)
+    return _default_signer
+
+
 def sign_validation_result(data: Dict) -> str:
     """
     Sign validation result data using validator's private key
-    
+
     Args:
         data: Dictionary containing validation result
-        
+
     Returns:
         Hex-encoded signature
     """
     try:
-        # Get validator's private key
-        private_key = os.getenv("VALIDATOR_PRIVATE_KEY")
-        if not private_key:
-            raise ValueError("Validator private key not found in environment variables")
-        
-        # Create deterministic string representation of data
-        data_str = json.dumps(data, sort_keys=True)
-        
-        # Hash the data
-        data_hash = hashlib.sha256(data_str.encode()).hexdigest()
-        
-        # Sign the hash
-        signed_message = Account.sign_message(
-            message=data_hash,
-            private_key=private_key
-        )
-        
-        return signed_message.signature.hex()
-        
+        return _get_default_signer().sign(data)
     except Exception as e:
         raise Exception(f"Error signing validation result: {str(e)}")
 
 def verify_signature(data: Dict, signature: str) -> bool:
     """
     Verify the signature of a validation result
-    
+
+    Accepts signatures over the current canonical encoding and, for results
+    signed by earlier releases, over the legacy json.dumps encoding.
+
     Args:
         data: Dictionary containing validation result
         signature: Hex-encoded signature to verify
-        
+
     Returns:
         True if signature is valid, False otherwise
     """
     try:
-        # Create deterministic string representation of data
-        data_str = json.dumps(data, sort_keys=True)
-        
-        # Hash the data
-        data_hash = hashlib.sha256(data_str.encode()).hexdigest()
-        
         # Get validator's address
         validator_address = os.getenv("VALIDATOR_ADDRESS")
         if not validator_address:
             raise ValueError("Validator address not found in environment variables")
-        
-        # Verify signature
-        return Account.recover_message(
-            message=data_hash,
-            signature=signature
-        ) == validator_address
-        
+
+        validator_address = to_checksum_address(validator_address)
+        for encoder in (canonical_json, legacy_canonical_json):
+            if _recover_hash(result_message_hash(encoder(data)), signature) == validator_address:
+                return True
+        return False
+
     except Exception as e:
-        raise Exception(f"Error verifying signature: {str(e)}") 
\ No newline at end of file
+        raise Exception(f"Error verifying signature: {str(e)}")
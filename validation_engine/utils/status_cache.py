@@ -0,0 +1,63 @@
+from typing import Dict, Iterable, Optional, Tuple
+import threading
+import time
+
+
+class StatusCache:
+    def __init__(self, ttl: float = 30.0, max_entries: int = 100000):
+        """
+        TTL cache of on-chain project statuses tagged with the block they were read at
+
+        Args:
+            ttl: Seconds a status is served from cache; 0 disables caching
+            max_entries: Entry count above which expired entries are purged
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[int, Tuple[str, int, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, project_id: int) -> Optional[str]:
+        """Return the cached status, or None if absent or expired"""
+        entry = self._entries.get(project_id)
+        if entry is None or time.monotonic() - entry[2] >= self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def put(self, project_id: int, status: str, block_number: int):
+        """Cache a status read at block_number, unless a newer read is already cached"""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            entry = self._entries.get(project_id)
+            if entry is not None and entry[1] > block_number:
+                return
+            self._entries[project_id] = (status, block_number, time.monotonic())
+            if len(self._entries) > self.max_entries:
+                self._purge_expired()
+
+    def invalidate(self, project_ids: Iterable[int], block_number: Optional[int] = None):
+        """
+        Drop cached statuses that a state change may have made stale
+
+        Args:
+            project_ids: Projects whose status changed
+            block_number: Block the change was mined in; entries read at or after it are kept
+        """
+        with self._lock:
+            for project_id in project_ids:
+                entry = self._entries.get(project_id)
+                if entry is not None and (block_number is None or entry[1] < block_number):
+                    del self._entries[project_id]
+
+    def _purge_expired(self):
+        cutoff = time.monotonic() - self.ttl
+        for project_id in [pid for pid, entry in self._entries.items() if entry[2] <= cutoff]:
+            del self._entries[project_id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,250 @@
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import asyncio
+import logging
+import time
+import uuid
+
+from utils.metrics import stage_timer
+from utils.web3_bridge import DEFAULT_MAX_GAS_PER_TX, Web3Bridge
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_SUBMITTED = "submitted"
+JOB_CONFIRMED = "confirmed"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class VerificationJob:
+    """On-chain verification request and its receipt status"""
+    job_id: str
+    project_id: int
+    status: str
+    created_at: str
+    tx_hash: Optional[str] = None
+    block_number: Optional[int] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class VerificationQueue:
+    def __init__(self, bridge: Web3Bridge, max_in_flight: int = 64, gas_price_ttl: float = 15.0,
+                 receipt_timeout: float = 120.0, poll_interval: float = 0.5, max_jobs: int = 100000,
+                 max_batch_size: int = 500, max_gas_per_tx: int = DEFAULT_MAX_GAS_PER_TX,
+                 on_confirmed: Optional[Callable[[List[int]], None]] = None,
+                 on_update: Optional[Callable[[List[VerificationJob]], None]] = None):
+        """
+        Background pipeline submitting project verification transactions
+
+        A single worker sends transactions with nonces from the bridge's local
+        counter, so concurrent validations never race on the same nonce, and
+        keeps up to max_in_flight transactions awaiting receipts at once. Jobs that are queued together are coalesced
+        into verifyProjectStatusBatch transactions chunked by gas.
+
+        Args:
+            bridge: Web3 bridge used to build, send and track transactions
+            max_in_flight: Maximum number of submitted transactions awaiting receipts
+            gas_price_ttl: Seconds a fetched gas price is reused
+            receipt_timeout: Seconds to wait for a receipt before failing a job
+            poll_interval: Seconds between receipt polls
+            max_jobs: Number of job records kept for status queries
+            max_batch_size: Maximum number of queued jobs coalesced per submission round;
+                1 disables batching
+            max_gas_per_tx: Gas budget for a single batch transaction
+            on_confirmed: Called with the project IDs of each confirmed transaction
+            on_update: Called with jobs whenever they are queued or change status
+        """
+        self.bridge = bridge
+        self.max_in_flight = max_in_flight
+        self.gas_price_ttl = gas_price_ttl
+        self.receipt_timeout = receipt_timeout
+        self.poll_interval = poll_interval
+        self.max_jobs = max_jobs
+        self.max_batch_size = max_batch_size
+        self.max_gas_per_tx = max_gas_per_tx
+        self.on_confirmed = on_confirmed
+        self.on_update = on_update
+
+        self.jobs: "OrderedDict[str, VerificationJob]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._receipt_tasks = set()
+        self._gas_price: Optional[int] = None
+        self._gas_price_expires = 0.0
+
+    async def start(self):
+        """Start the submission worker on the running event loop"""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+            self._worker = asyncio.create_task(self._run())
+            logger.info("Verification queue started")
+
+    async def stop(self):
+        """Stop the worker and cancel outstanding receipt waits"""
+        if self._worker is not None:
+            self._worker.cancel()
+            for task in list(self._receipt_tasks):
+                task.cancel()
+            await asyncio.gather(self._worker, *self._receipt_tasks, return_exceptions=True)
+            self._worker = None
+
+    def enqueue(self, project_id: int) -> VerificationJob:
+        """
+        Queue a project for on-chain verification
+
+        Returns:
+            The job record; its status is updated as the transaction progresses
+        """
+        return self.enqueue_many([project_id])[0]
+
+    def enqueue_many(self, project_ids: List[int]) -> List[VerificationJob]:
+        """Queue several projects at once so they can share batch transactions"""
+        if self._queue is None:
+            raise RuntimeError("Verification queue is not running")
+        created_at = datetime.utcnow().isoformat()
+        jobs = [
+            VerificationJob(job_id=uuid.uuid4().hex, project_id=project_id, status=JOB_QUEUED, created_at=created_at)
+            for project_id in project_ids
+        ]
+        self._updated(jobs)
+        for job in jobs:
+            self.jobs[job.job_id] = job
+            self._evict_finished_jobs()
+            self._queue.put_nowait(job)
+        return jobs
+
+    def _updated(self, jobs: List[VerificationJob]):
+        if self.on_update is not None and jobs:
+            try:
+                self.on_update(jobs)
+            except Exception as e:
+                logger.error(f"Job update hook failed for {len(jobs)} job(s): {str(e)}")
+
+    def get_job(self, job_id: str) -> Optional[VerificationJob]:
+        return self.jobs.get(job_id)
+
+    def depth(self) -> int:
+        """Number of jobs waiting to be submitted"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def join(self):
+        """Wait until every queued job has a final status"""
+        await self._queue.join()
+        while self._receipt_tasks:
+            await asyncio.gather(*list(self._receipt_tasks), return_exceptions=True)
+
+    def _evict_finished_jobs(self):
+        while len(self.jobs) > self.max_jobs:
+            job_id, job = next(iter(self.jobs.items()))
+            if job.status not in (JOB_CONFIRMED, JOB_FAILED):
+                break
+            del self.jobs[job_id]
+
+    async def _run(self):
+        while True:
+            jobs = [await self._queue.get()]
+            while len(jobs) < self.max_batch_size and not self._queue.empty():
+                jobs.append(self._queue.get_nowait())
+            try:
+                await self._submit_jobs(jobs)
+            finally:
+                for _ in jobs:
+                    self._queue.task_done()
+
+    async def _submit_jobs(self, jobs: List[VerificationJob]):
+        """Submit one round of jobs, as batch transactions where possible"""
+        if len(jobs) == 1:
+            await self._submit_chunk(jobs)
+            return
+
+        try:
+            chunks = await self.bridge.plan_verify_batches(
+                [job.project_id for job in jobs], self.max_gas_per_tx, self.max_batch_size
+            )
+        except Exception as e:
+            # A batch reverts as a whole (e.g. one unknown project); isolate the bad jobs
+            logger.warning(f"Batch gas estimation failed, submitting {len(jobs)} jobs individually: {str(e)}")
+            for job in jobs:
+                await self._submit_chunk([job])
+            return
+
+        offset = 0
+        for chunk, gas in chunks:
+            await self._submit_chunk(jobs[offset:offset + len(chunk)], gas)
+            offset += len(chunk)
+
+    async def _submit_chunk(self, jobs: List[VerificationJob], gas: Optional[int] = None):
+        """Send one transaction covering jobs and start tracking its receipt"""
+        await self._in_flight.acquire()
+        try:
+            with stage_timer('tx_submit'):
+                tx_hash = await self._send([job.project_id for job in jobs], gas)
+        except Exception as e:
+            self._in_flight.release()
+            for job in jobs:
+                job.status = JOB_FAILED
+                job.error = str(e)
+            self._updated(jobs)
+            logger.error(f"Verification of projects {[job.project_id for job in jobs]} failed to submit: {str(e)}")
+            return
+
+        tx_hash_hex = tx_hash.hex() if hasattr(tx_hash, 'hex') else str(tx_hash)
+        for job in jobs:
+            job.status = JOB_SUBMITTED
+            job.tx_hash = tx_hash_hex
+        self._updated(jobs)
+        task = asyncio.create_task(self._track_receipt(jobs, tx_hash))
+        self._receipt_tasks.add(task)
+        task.add_done_callback(self._receipt_tasks.discard)
+
+    async def _send(self, project_ids: List[int], gas: Optional[int] = None):
+        """Sign and send one transaction with the bridge's next local nonce"""
+        return await self.bridge.send_verify_transaction(project_ids, await self._current_gas_price(), gas)
+
+    async def _current_gas_price(self) -> int:
+        now = time.monotonic()
+        if self._gas_price is None or now >= self._gas_price_expires:
+            self._gas_price = await self.bridge.get_gas_price()
+            self._gas_price_expires = now + self.gas_price_ttl
+        return self._gas_price
+
+    async def _track_receipt(self, jobs: List[VerificationJob], tx_hash):
+        try:
+            with stage_timer('receipt_wait'):
+                receipt = await self.bridge.wait_for_receipt(
+                    tx_hash, timeout=self.receipt_timeout, poll_latency=self.poll_interval
+                )
+            for job in jobs:
+                job.block_number = receipt['blockNumber']
+                if receipt['status'] == 1:
+                    job.status = JOB_CONFIRMED
+                else:
+                    job.status = JOB_FAILED
+                    job.error = "Transaction reverted"
+            self._updated(jobs)
+            if receipt['status'] == 1:
+                # Our ProjectVerified state change makes earlier status reads stale
+                self.bridge.record_verified([job.project_id for job in jobs], receipt['blockNumber'])
+                logger.info(f"Verified {len(jobs)} project(s) in block {receipt['blockNumber']}")
+                if self.on_confirmed is not None:
+                    try:
+                        self.on_confirmed([job.project_id for job in jobs])
+                    except Exception as e:
+                        logger.error(f"Confirmation hook failed for {len(jobs)} project(s): {str(e)}")
+        except Exception as e:
+            for job in jobs:
+                job.status = JOB_FAILED
+                job.error = str(e)
+            self._updated(jobs)
+            logger.error(f"Verification transaction {tx_hash.hex() if hasattr(tx_hash, 'hex') else tx_hash} failed: {str(e)}")
+        finally:
+            self._in_flight.release()
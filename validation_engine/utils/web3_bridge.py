@@ -1,15 +1,66 @@
-from web3 import Web3
+from web3 import AsyncWeb3
+from web3.providers.async_base import AsyncBaseProvider
+from eth_abi import decode
 from eth_account import Account
+from functools import lru_cache
 import json
 import logging
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+import asyncio
 import os
 
+from utils.metrics import observe_web3_call
+from utils.status_cache import StatusCache
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Headroom added on top of eth_estimateGas results
+GAS_ESTIMATE_MARGIN = 1.2
+DEFAULT_MAX_GAS_PER_TX = 5_000_000
+DEFAULT_MAX_BATCH_SIZE = 500
+
+# Canonical Multicall3 deployment, present on mainnet and most public chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [{
+    "type": "function", "name": "aggregate3", "stateMutability": "payable",
+    "inputs": [{"name": "calls", "type": "tuple[]", "components": [
+        {"name": "target", "type": "address"},
+        {"name": "allowFailure", "type": "bool"},
+        {"name": "callData", "type": "bytes"}]}],
+    "outputs": [{"name": "returnData", "type": "tuple[]", "components": [
+        {"name": "success", "type": "bool"},
+        {"name": "returnData", "type": "bytes"}]}],
+}]
+DEFAULT_MULTICALL_BATCH_SIZE = 500
+
+STATUS_MAP = {0: "Unverified", 1: "UnderReview", 2: "Verified"}
+
+# Hardhat compilation output of the ProjectNFT contract, present after `npx hardhat compile`
+HARDHAT_ABI_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'artifacts', 'contracts', 'ProjectNFT.sol', 'ProjectNFT.json'
+)
+# ABI of contracts/ProjectNFT.sol shipped with the engine, used when the contracts are not compiled
+BUNDLED_ABI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'abi', 'ProjectNFT.json')
+DEFAULT_ABI_PATH = HARDHAT_ABI_PATH if os.path.exists(HARDHAT_ABI_PATH) else BUNDLED_ABI_PATH
+
+
+@lru_cache(maxsize=None)
+def _load_abi(abi_path: str) -> Tuple:
+    with open(abi_path, 'r') as f:
+        return tuple(json.load(f)['abi'])
+
+
+def load_contract_abi(abi_path: str) -> List[Dict]:
+    """Load the ABI from a compiled contract JSON; each file is read and parsed once per process"""
+    return list(_load_abi(os.path.abspath(abi_path)))
+
 class Web3Bridge:
-    def __init__(self, rpc_url: str, contract_address: str, private_key: str):
+    def __init__(self, rpc_url: str, contract_address: str, private_key: str,
+                 abi_path: Optional[str] = None, provider: Optional[AsyncBaseProvider] = None,
+                 multicall_address: Optional[str] = None, status_cache_ttl: float = 30.0,
+                 multicall_batch_size: int = DEFAULT_MULTICALL_BATCH_SIZE, project_index=None):
         """
         Initialize Web3 bridge with contract connection
         
@@ -17,15 +68,25 @@ class Web3Bridge:
             rpc_url: Ethereum node RPC URL
             contract_address: ProjectNFT contract address
             private_key: Validator's private key for signing transactions
+            abi_path: Path of the ProjectNFT ABI JSON. Defaults to the
+                PROJECT_NFT_ABI_PATH environment variable, the Hardhat artifact
+                when the contracts are compiled, or the bundled ABI
+            provider: Async provider to use instead of an HTTP provider for rpc_url
+            multicall_address: Multicall3 contract used for bulk reads. Defaults to the
+                MULTICALL3_ADDRESS environment variable or the canonical deployment;
+                an empty string disables multicall in favour of concurrent eth_calls
+            status_cache_ttl: Seconds a project status read is reused; 0 disables the cache
+            multicall_batch_size: Maximum number of calls aggregated into one eth_call
+            project_index: Event-built ProjectIndex answering status and listing
+                queries locally; projects it does not know fall back to RPC
         """
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
-        self.contract_address = contract_address
+        self.w3 = AsyncWeb3(provider or AsyncWeb3.AsyncHTTPProvider(rpc_url))
+        self.contract_address = AsyncWeb3.to_checksum_address(contract_address)
         self.private_key = private_key
+        abi_path = abi_path or os.getenv("PROJECT_NFT_ABI_PATH", DEFAULT_ABI_PATH)
         
         # Load contract ABI
-        with open('contracts/ProjectNFT.json', 'r') as f:
-            contract_json = json.load(f)
-            self.contract_abi = contract_json['abi']
+        self.contract_abi = load_contract_abi(abi_path)
         
         # Initialize contract
         self.contract = self.w3.eth.contract(
@@ -35,9 +96,27 @@ class Web3Bridge:
         
         # Get validator address from private key
         self.validator_address = Account.from_key(private_key).address
+        self._chain_id: Optional[int] = None
+        self._validator_role: Optional[bytes] = None
+        # Next nonce of the validator account, shared by every transaction this bridge sends
+        self._nonce: Optional[int] = None
+        self._nonce_lock: Optional[asyncio.Lock] = None
+        self._nonce_lock_loop = None
+        
+        # Bulk status reads
+        if multicall_address is None:
+            multicall_address = os.getenv("MULTICALL3_ADDRESS", MULTICALL3_ADDRESS)
+        self.multicall = self.w3.eth.contract(
+            address=AsyncWeb3.to_checksum_address(multicall_address),
+            abi=MULTICALL3_ABI
+        ) if multicall_address else None
+        self.multicall_batch_size = multicall_batch_size
+        self.status_cache = StatusCache(status_cache_ttl)
+        self.project_index = project_index
         
         logger.info(f"Web3Bridge initialized for validator: {self.validator_address}")
 
+    @observe_web3_call("verify_project")
     async def verify_project(self, project_id: int) -> str:
         """
         Call verifyProjectStatus on the smart contract
@@ -49,35 +128,17 @@ class Web3Bridge:
             Transaction hash
         """
         try:
-            # Build transaction
-            nonce = self.w3.eth.get_transaction_count(self.validator_address)
-            
             # Get gas price
-            gas_price = self.w3.eth.gas_price
+            gas_price = await self.get_gas_price()
             
-            # Build transaction
-            transaction = self.contract.functions.verifyProjectStatus(
-                project_id
-            ).build_transaction({
-                'from': self.validator_address,
-                'nonce': nonce,
-                'gas': 200000,  # Gas limit
-                'gasPrice': gas_price
-            })
-            
-            # Sign transaction
-            signed_txn = self.w3.eth.account.sign_transaction(
-                transaction,
-                self.private_key
-            )
-            
-            # Send transaction
-            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.rawTransaction)
+            # Build, sign and send transaction with the next local nonce
+            tx_hash = await self.send_verify_transaction(project_id, gas_price)
             
             # Wait for transaction receipt
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+            receipt = await self.wait_for_receipt(tx_hash)
             
             if receipt['status'] == 1:
+                self.record_verified([project_id], receipt['blockNumber'])
                 logger.info(f"Project {project_id} verified successfully")
                 return receipt['transactionHash'].hex()
             else:
@@ -87,6 +148,189 @@ class Web3Bridge:
             logger.error(f"Error verifying project: {str(e)}")
             raise
 
+    @observe_web3_call("verify_projects")
+    async def verify_projects(self, project_ids: List[int],
+                              max_gas_per_tx: int = DEFAULT_MAX_GAS_PER_TX) -> List[str]:
+        """
+        Verify many projects with verifyProjectStatusBatch
+        
+        Projects are split into chunks whose estimated gas fits max_gas_per_tx;
+        all chunk transactions are sent before waiting for their receipts.
+        
+        Args:
+            project_ids: IDs of the projects to verify
+            max_gas_per_tx: Gas limit budget for a single transaction
+            
+        Returns:
+            Transaction hashes, one per chunk
+        """
+        try:
+            chunks = await self.plan_verify_batches(project_ids, max_gas_per_tx)
+            gas_price = await self.get_gas_price()
+            
+            tx_hashes = []
+            for chunk, gas in chunks:
+                tx_hashes.append(await self.send_verify_transaction(chunk, gas_price, gas))
+            
+            receipts = await asyncio.gather(*(self.wait_for_receipt(tx_hash) for tx_hash in tx_hashes))
+            for (chunk, _gas), receipt in zip(chunks, receipts):
+                if receipt['status'] == 1:
+                    self.record_verified(chunk, receipt['blockNumber'])
+            if any(receipt['status'] != 1 for receipt in receipts):
+                raise Exception("Batch transaction failed")
+            
+            logger.info(f"Verified {len(project_ids)} projects in {len(chunks)} transactions")
+            return [receipt['transactionHash'].hex() for receipt in receipts]
+            
+        except Exception as e:
+            logger.error(f"Error verifying projects: {str(e)}")
+            raise
+
+    def _verify_function(self, project_ids):
+        """Contract call verifying one project (int) or a list of projects"""
+        if isinstance(project_ids, int):
+            return self.contract.functions.verifyProjectStatus(project_ids)
+        if len(project_ids) == 1:
+            return self.contract.functions.verifyProjectStatus(project_ids[0])
+        return self.contract.functions.verifyProjectStatusBatch(list(project_ids))
+
+    @observe_web3_call("estimate_verify_gas")
+    async def estimate_verify_gas(self, project_ids) -> int:
+        """Estimate gas for verifying one project (int) or a list of projects"""
+        return await self._verify_function(project_ids).estimate_gas({'from': self.validator_address})
+
+    async def plan_verify_batches(self, project_ids: List[int], max_gas_per_tx: int = DEFAULT_MAX_GAS_PER_TX,
+                                  max_batch_size: int = DEFAULT_MAX_BATCH_SIZE) -> List[Tuple[List[int], int]]:
+        """
+        Split project IDs into chunks that fit the per-transaction gas budget
+        
+        Each chunk's gas is estimated; oversized chunks are shrunk in proportion
+        to their estimate and re-estimated.
+        
+        Returns:
+            List of (project_ids, gas_limit) with the estimate margin applied
+        """
+        budget = max_gas_per_tx / GAS_ESTIMATE_MARGIN
+        remaining = list(project_ids)
+        size = min(len(remaining), max_batch_size)
+        chunks = []
+        while remaining:
+            chunk = remaining[:size]
+            gas = await self.estimate_verify_gas(chunk)
+            if gas > budget and len(chunk) > 1:
+                size = max(1, min(len(chunk) - 1, int(len(chunk) * budget / gas)))
+                continue
+            chunks.append((chunk, int(gas * GAS_ESTIMATE_MARGIN)))
+            remaining = remaining[len(chunk):]
+        return chunks
+
+    @observe_web3_call("build_verify_transaction")
+    async def build_verify_transaction(self, project_ids, nonce: int, gas_price: int,
+                                       gas: Optional[int] = None) -> bytes:
+        """
+        Build and sign a verification transaction without sending it
+        
+        Args:
+            project_ids: ID of the project to verify, or a list of IDs for a batch
+            nonce: Nonce to use for the validator account
+            gas_price: Gas price in wei
+            gas: Gas limit; estimated when omitted
+            
+        Returns:
+            Signed raw transaction
+        """
+        if gas is None:
+            gas = int(await self.estimate_verify_gas(project_ids) * GAS_ESTIMATE_MARGIN)
+        
+        transaction = await self._verify_function(project_ids).build_transaction({
+            'from': self.validator_address,
+            'nonce': nonce,
+            'gas': gas,
+            'gasPrice': gas_price,
+            'chainId': await self.get_chain_id()
+        })
+        
+        signed_txn = self.w3.eth.account.sign_transaction(
+            transaction,
+            self.private_key
+        )
+        return signed_txn.rawTransaction
+
+    def _get_nonce_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._nonce_lock is None or self._nonce_lock_loop is not loop:
+            self._nonce_lock, self._nonce_lock_loop = asyncio.Lock(), loop
+        return self._nonce_lock
+
+    async def send_verify_transaction(self, project_ids, gas_price: int, gas: Optional[int] = None):
+        """
+        Sign and send a verification transaction with the next local nonce
+        
+        Every verification this bridge sends, from VerificationQueue or from
+        verify_project(s), takes its nonce from one counter, so they never
+        reuse a nonce. The counter starts from the node's pending nonce and
+        is resynced once when the node rejects a nonce.
+        
+        Args:
+            project_ids: ID of the project to verify, or a list of IDs for a batch
+            gas_price: Gas price in wei
+            gas: Gas limit; estimated when omitted
+            
+        Returns:
+            Transaction hash
+        """
+        async with self._get_nonce_lock():
+            for attempt in range(2):
+                if self._nonce is None:
+                    self._nonce = await self.get_pending_nonce()
+                raw_transaction = await self.build_verify_transaction(project_ids, self._nonce, gas_price, gas)
+                try:
+                    tx_hash = await self.send_raw_transaction(raw_transaction)
+                except Exception as e:
+                    # The node's view of our nonce disagrees with ours; resync and retry once
+                    self._nonce = None
+                    if attempt == 0 and 'nonce' in str(e).lower():
+                        logger.warning(f"Nonce mismatch, resyncing from node: {str(e)}")
+                        continue
+                    raise
+                self._nonce += 1
+                return tx_hash
+
+    @observe_web3_call("get_chain_id")
+    async def get_chain_id(self) -> int:
+        """Chain ID of the connected network, fetched once"""
+        if self._chain_id is None:
+            self._chain_id = await self.w3.eth.chain_id
+        return self._chain_id
+
+    @observe_web3_call("get_block_number")
+    async def get_block_number(self) -> int:
+        """Latest block number of the connected node"""
+        return await self.w3.eth.block_number
+
+    @observe_web3_call("get_pending_nonce")
+    async def get_pending_nonce(self) -> int:
+        """Next nonce for the validator account, including pending transactions"""
+        return await self.w3.eth.get_transaction_count(self.validator_address, 'pending')
+
+    @observe_web3_call("get_gas_price")
+    async def get_gas_price(self) -> int:
+        """Current gas price in wei"""
+        return await self.w3.eth.gas_price
+
+    @observe_web3_call("send_raw_transaction")
+    async def send_raw_transaction(self, raw_transaction: bytes):
+        """Broadcast a signed transaction and return its hash"""
+        return await self.w3.eth.send_raw_transaction(raw_transaction)
+
+    @observe_web3_call("wait_for_receipt")
+    async def wait_for_receipt(self, tx_hash, timeout: float = 120, poll_latency: float = 0.1):
+        """Wait for a transaction to be mined and return its receipt"""
+        return await self.w3.eth.wait_for_transaction_receipt(
+            tx_hash, timeout=timeout, poll_latency=poll_latency
+        )
+
+    @observe_web3_call("get_project_status")
     async def get_project_status(self, project_id: int) -> str:
         """
         Get the current status of a project
@@ -97,14 +341,141 @@ class Web3Bridge:
         Returns:
             Project status as string
         """
+        if self.project_index is not None:
+            indexed = self.project_index.get_status(project_id)
+            if indexed is not None:
+                return STATUS_MAP[indexed]
+        cached = self.status_cache.get(project_id)
+        if cached is not None:
+            return cached
         try:
-            status = self.contract.functions.getProjectStatus(project_id).call()
-            status_map = {0: "Unverified", 1: "UnderReview", 2: "Verified"}
-            return status_map[status]
+            block_number = await self.w3.eth.block_number
+            status = await self.contract.functions.getProjectStatus(project_id).call(
+                block_identifier=block_number
+            )
+            self.status_cache.put(project_id, STATUS_MAP[status], block_number)
+            return STATUS_MAP[status]
         except Exception as e:
             logger.error(f"Error getting project status: {str(e)}")
             raise
 
+    @observe_web3_call("get_project_statuses")
+    async def get_project_statuses(self, project_ids: List[int]) -> Dict[int, Optional[str]]:
+        """
+        Get the statuses of many projects in as few RPC round trips as possible
+        
+        Indexed and cached statuses are served locally; the rest are read at a
+        single block through Multicall3 aggregate3, multicall_batch_size calls
+        per eth_call.
+        
+        Args:
+            project_ids: IDs of the projects to check
+            
+        Returns:
+            Mapping of project ID to status string, or None for unknown projects
+        """
+        statuses = {}
+        if self.project_index is not None:
+            statuses = {
+                project_id: STATUS_MAP[status]
+                for project_id, status in self.project_index.get_statuses(list(dict.fromkeys(project_ids))).items()
+            }
+        missing = []
+        for project_id in dict.fromkeys(project_ids):
+            if project_id in statuses:
+                continue
+            cached = self.status_cache.get(project_id)
+            if cached is not None:
+                statuses[project_id] = cached
+            else:
+                missing.append(project_id)
+        
+        if missing:
+            try:
+                # Pin every read to one block so the results are mutually consistent
+                block_number = await self.w3.eth.block_number
+                if self.multicall is not None:
+                    fetched = await self._read_statuses_multicall(missing, block_number)
+                else:
+                    fetched = await self._read_statuses_concurrently(missing, block_number)
+            except Exception as e:
+                logger.error(f"Error getting project statuses: {str(e)}")
+                raise
+            for project_id, status in fetched.items():
+                if status is not None:
+                    self.status_cache.put(project_id, status, block_number)
+                statuses[project_id] = status
+        
+        return {project_id: statuses[project_id] for project_id in project_ids}
+
+    async def _read_statuses_multicall(self, project_ids: List[int],
+                                       block_number: int) -> Dict[int, Optional[str]]:
+        statuses = {}
+        for start in range(0, len(project_ids), self.multicall_batch_size):
+            chunk = project_ids[start:start + self.multicall_batch_size]
+            calls = [
+                (self.contract_address, True,
+                 self.contract.functions.getProjectStatus(project_id)._encode_transaction_data())
+                for project_id in chunk
+            ]
+            results = await self.multicall.functions.aggregate3(calls).call(block_identifier=block_number)
+            for project_id, (success, return_data) in zip(chunk, results):
+                # getProjectStatus reverts for tokens that were never minted
+                statuses[project_id] = STATUS_MAP[decode(['uint8'], return_data)[0]] if success else None
+        return statuses
+
+    async def _read_statuses_concurrently(self, project_ids: List[int],
+                                          block_number: int) -> Dict[int, Optional[str]]:
+        results = await asyncio.gather(*(
+            self.contract.functions.getProjectStatus(project_id).call(block_identifier=block_number)
+            for project_id in project_ids
+        ), return_exceptions=True)
+        return {
+            project_id: None if isinstance(result, Exception) else STATUS_MAP[result]
+            for project_id, result in zip(project_ids, results)
+        }
+
+    def record_verified(self, project_ids: List[int], block_number: Optional[int] = None):
+        """
+        Record that our own transaction mined in block_number verified project_ids
+        
+        Called when verification receipts confirm: stale cached statuses are
+        dropped and the project index is updated ahead of its next log sync.
+        """
+        self.status_cache.invalidate(project_ids, block_number)
+        if self.project_index is not None and block_number is not None:
+            self.project_index.mark_verified(project_ids, block_number)
+
+    def list_projects(self, status: Optional[str] = None, owner: Optional[str] = None,
+                      limit: int = 100, after: int = 0) -> List[Dict]:
+        """
+        List indexed projects filtered by status name and/or owner address
+        
+        Raises:
+            RuntimeError: If no project index is attached
+            ValueError: If status is not a known status name
+        """
+        if self.project_index is None:
+            raise RuntimeError("Project listing requires a project index")
+        status_code = None
+        if status is not None:
+            codes = {name: code for code, name in STATUS_MAP.items()}
+            if status not in codes:
+                raise ValueError(f"Unknown project status: {status}")
+            status_code = codes[status]
+        projects = self.project_index.list_projects(status_code, owner, limit, after)
+        for project in projects:
+            project['status'] = STATUS_MAP[project['status']]
+        return projects
+
+    @observe_web3_call("get_validator_role")
+    async def get_validator_role(self) -> bytes:
+        """Return the VALIDATOR_ROLE hash; it is a contract constant, so it is fetched once"""
+        if self._validator_role is None:
+            self._validator_role = await self.contract.functions.VALIDATOR_ROLE().call()
+        return self._validator_role
+
+    @observe_web3_call("check_validator_role")
     async def check_validator_role(self) -> bool:
         """
         Check if the current validator has the VALIDATOR_ROLE
@@ -113,12 +484,11 @@ class Web3Bridge:
             True if validator has role, False otherwise
         """
         try:
-            validator_role = self.contract.functions.VALIDATOR_ROLE().call()
-            has_role = self.contract.functions.hasRole(
-                validator_role,
+            has_role = await self.contract.functions.hasRole(
+                await self.get_validator_role(),
                 self.validator_address
             ).call()
             return has_role
         except Exception as e:
             logger.error(f"Error checking validator role: {str(e)}")
-            raise 
\ No newline at end of file
+            raise